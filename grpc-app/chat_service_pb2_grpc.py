@@ -91,6 +91,31 @@ class ChatServiceStub(object):
                 request_serializer=chat__service__pb2.EmptyRequest.SerializeToString,
                 response_deserializer=chat__service__pb2.GenericResponse.FromString,
                 _registered_method=True)
+        self.Subscribe = channel.unary_stream(
+                '/chat.ChatService/Subscribe',
+                request_serializer=chat__service__pb2.EmptyRequest.SerializeToString,
+                response_deserializer=chat__service__pb2.ChatMessage.FromString,
+                _registered_method=True)
+        self.SendMessages = channel.stream_unary(
+                '/chat.ChatService/SendMessages',
+                request_serializer=chat__service__pb2.SendMessageRequest.SerializeToString,
+                response_deserializer=chat__service__pb2.BulkSendResponse.FromString,
+                _registered_method=True)
+        self.Stats = channel.unary_unary(
+                '/chat.ChatService/Stats',
+                request_serializer=chat__service__pb2.EmptyRequest.SerializeToString,
+                response_deserializer=chat__service__pb2.StatsResponse.FromString,
+                _registered_method=True)
+        self.Batch = channel.unary_unary(
+                '/chat.ChatService/Batch',
+                request_serializer=chat__service__pb2.BatchRequest.SerializeToString,
+                response_deserializer=chat__service__pb2.BatchResponse.FromString,
+                _registered_method=True)
+        self.GetMessages = channel.unary_unary(
+                '/chat.ChatService/GetMessages',
+                request_serializer=chat__service__pb2.GetMessagesRequest.SerializeToString,
+                response_deserializer=chat__service__pb2.ListMessagesResponse.FromString,
+                _registered_method=True)
 
 
 class ChatServiceServicer(object):
@@ -175,6 +200,46 @@ class ChatServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def Subscribe(self, request, context):
+        """12) subscribe
+        Streams messages sent to the caller from now on, until logout or cancel.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SendMessages(self, request_iterator, context):
+        """13) send_messages
+        Many sends in one call; recipients are checked and rows inserted a chunk at a time.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Stats(self, request, context):
+        """14) stats
+        Per-method call counts, status codes, latency histograms and sizes since startup.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Batch(self, request, context):
+        """15) batch
+        Runs the calls in order against one database snapshot and returns all the responses.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetMessages(self, request, context):
+        """16) get_messages
+        Full content of the given messages, for inbox pages listed with preview_chars.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ChatServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -233,6 +298,31 @@ def add_ChatServiceServicer_to_server(servicer, server):
                     request_deserializer=chat__service__pb2.EmptyRequest.FromString,
                     response_serializer=chat__service__pb2.GenericResponse.SerializeToString,
             ),
+            'Subscribe': grpc.unary_stream_rpc_method_handler(
+                    servicer.Subscribe,
+                    request_deserializer=chat__service__pb2.EmptyRequest.FromString,
+                    response_serializer=chat__service__pb2.ChatMessage.SerializeToString,
+            ),
+            'SendMessages': grpc.stream_unary_rpc_method_handler(
+                    servicer.SendMessages,
+                    request_deserializer=chat__service__pb2.SendMessageRequest.FromString,
+                    response_serializer=chat__service__pb2.BulkSendResponse.SerializeToString,
+            ),
+            'Stats': grpc.unary_unary_rpc_method_handler(
+                    servicer.Stats,
+                    request_deserializer=chat__service__pb2.EmptyRequest.FromString,
+                    response_serializer=chat__service__pb2.StatsResponse.SerializeToString,
+            ),
+            'Batch': grpc.unary_unary_rpc_method_handler(
+                    servicer.Batch,
+                    request_deserializer=chat__service__pb2.BatchRequest.FromString,
+                    response_serializer=chat__service__pb2.BatchResponse.SerializeToString,
+            ),
+            'GetMessages': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMessages,
+                    request_deserializer=chat__service__pb2.GetMessagesRequest.FromString,
+                    response_serializer=chat__service__pb2.ListMessagesResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'chat.ChatService', rpc_method_handlers)
@@ -542,3 +632,138 @@ class ChatService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def Subscribe(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/chat.ChatService/Subscribe',
+            chat__service__pb2.EmptyRequest.SerializeToString,
+            chat__service__pb2.ChatMessage.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SendMessages(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/chat.ChatService/SendMessages',
+            chat__service__pb2.SendMessageRequest.SerializeToString,
+            chat__service__pb2.BulkSendResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Stats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.ChatService/Stats',
+            chat__service__pb2.EmptyRequest.SerializeToString,
+            chat__service__pb2.StatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Batch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.ChatService/Batch',
+            chat__service__pb2.BatchRequest.SerializeToString,
+            chat__service__pb2.BatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetMessages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat.ChatService/GetMessages',
+            chat__service__pb2.GetMessagesRequest.SerializeToString,
+            chat__service__pb2.ListMessagesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -3,6 +3,8 @@ import streamlit as st
 from streamlit_autorefresh import st_autorefresh
 import hashlib
 import argparse
+import threading
+import time
 
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -30,6 +32,156 @@ class ChatServerClient:
         return hashlib.sha256(password.encode("utf-8")).hexdigest()
 
 
+###############################################################################
+# Request compression
+###############################################################################
+COMPRESSION = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+
+class CompressLargeRequests(grpc.UnaryUnaryClientInterceptor):
+    """
+    Compresses a request only when it serializes to at least min_bytes, such as a
+    long SendMessage. A call that passes its own compression= keeps it. The channel
+    itself is left uncompressed, because grpc lets a call turn compression on but
+    not off.
+    """
+
+    def __init__(self, algorithm, min_bytes):
+        self.algorithm = algorithm
+        self.min_bytes = min_bytes
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        if client_call_details.compression is None and request.ByteSize() >= self.min_bytes:
+            client_call_details = client_call_details._replace(compression=self.algorithm)
+        return continuation(client_call_details, request)
+
+
+###############################################################################
+# Shared channel
+###############################################################################
+# Ping an idle connection so it stays open between reruns, and notice within
+# about 40 s when the server has gone away.
+KEEPALIVE_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+# gRPC retries a failed connection by itself, backing off as it goes. A channel that
+# has not been READY for this long is replaced with a fresh one instead.
+FAILED_CHANNEL_SECS = 30.0
+# How long close() waits for gRPC's connectivity poller to stop watching the channel
+POLLER_EXIT_SECS = 1.0
+
+
+class PooledChannel:
+    """A channel and its stub, plus the connectivity state gRPC last reported for it."""
+
+    def __init__(self, target, compression="none", compression_min_bytes=1024):
+        self.target = target
+        self.state = grpc.ChannelConnectivity.IDLE
+        self.failing_since = None   # monotonic time of the first TRANSIENT_FAILURE since the last READY
+        self.closed = False
+        self.raw_channel = grpc.insecure_channel(target, options=KEEPALIVE_OPTIONS)
+        self.raw_channel.subscribe(self._on_state, try_to_connect=True)
+        channel = self.raw_channel
+        if compression != "none":
+            channel = grpc.intercept_channel(channel, CompressLargeRequests(COMPRESSION[compression], compression_min_bytes))
+        self.stub = chat_service_pb2_grpc.ChatServiceStub(channel)
+
+    def _on_state(self, state):
+        self.state = state
+        if state == grpc.ChannelConnectivity.READY:
+            self.failing_since = None
+        elif state == grpc.ChannelConnectivity.TRANSIENT_FAILURE and self.failing_since is None:
+            self.failing_since = time.monotonic()
+
+    def reachable(self):
+        return self.state != grpc.ChannelConnectivity.TRANSIENT_FAILURE
+
+    def healthy(self):
+        """
+        False once the channel has to be replaced: it was closed, gRPC shut it down, or
+        it has been failing for FAILED_CHANNEL_SECS. An unhealthy channel is closed here,
+        since the cache drops it without doing so.
+        """
+        if self.closed:
+            return False
+        failing_since = self.failing_since
+        stuck = failing_since is not None and time.monotonic() - failing_since >= FAILED_CHANNEL_SECS
+        if self.state == grpc.ChannelConnectivity.SHUTDOWN or stuck:
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.raw_channel.unsubscribe(self._on_state)
+        # let gRPC's connectivity poller see the unsubscribe before the channel goes away
+        poller = getattr(self.raw_channel, "_connectivity_state", None)
+        deadline = time.monotonic() + POLLER_EXIT_SECS
+        while poller is not None and poller.polling and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.raw_channel.close()
+
+
+@st.cache_resource(validate=lambda pooled: pooled.healthy())
+def shared_channel(target, compression="none", compression_min_bytes=1024):
+    """
+    The one channel this client process uses for target. Streamlit re-executes the
+    script on every click and autorefresh, so a channel built inline would mean a new
+    HTTP/2 connection per rerun. Cached here, every rerun and browser session shares
+    one connection, and gRPC reconnects it by itself after a failure. A channel that
+    was closed, shut down or failing for FAILED_CHANNEL_SECS fails validation and is
+    rebuilt on the next rerun.
+    """
+    return PooledChannel(target, compression, compression_min_bytes)
+
+
+###############################################################################
+# InboxSubscription
+###############################################################################
+class InboxSubscription:
+    """
+    Holds one long-lived Subscribe stream per login and drains it on a background
+    thread. The inbox page only looks at `version` on each rerun; it asks the server
+    for a page again only when a message was pushed, so an idle inbox costs no queries.
+    """
+
+    def __init__(self, stub, auth_token):
+        self.auth_token = auth_token
+        self.lock = threading.Lock()
+        self.version = 0
+        self.new_messages = []
+        self.closed = False
+        self.call = stub.Subscribe(chat_service_pb2.EmptyRequest(auth_token=auth_token))
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self):
+        try:
+            for message in self.call:
+                with self.lock:
+                    self.new_messages.append(message)
+                    self.version += 1
+        except grpc.RpcError:
+            pass  # cancelled, logged out, or the server went away
+        self.closed = True
+
+    def take_new_messages(self):
+        with self.lock:
+            messages, self.new_messages = self.new_messages, []
+        return messages
+
+    def close(self):
+        self.call.cancel()
+
+
 ###############################################################################
 # StreamlitChatApp
 ###############################################################################
@@ -203,9 +355,56 @@ class StreamlitChatApp:
         ###########################################################################
         # Inbox
         ###########################################################################
+    def _subscription(self):
+        """Returns the open inbox stream, (re)opening it after login or a dropped connection."""
+        sub = st.session_state.get("subscription")
+        if sub is None or sub.closed or sub.auth_token != st.session_state.auth_token:
+            if sub is not None:
+                sub.close()
+            sub = InboxSubscription(stub, st.session_state.auth_token)
+            st.session_state.subscription = sub
+        return sub
+
+    def _end_subscription(self):
+        sub = st.session_state.pop("subscription", None)
+        if sub is not None:
+            sub.close()
+        st.session_state.pop("inbox_cache_key", None)
+        st.session_state.pop("inbox_cursors", None)
+        st.session_state.pop("full_bodies", None)
+
+    INBOX_PAGE_SIZE = 10
+    # inbox pages carry only this much of each message; "Show full message" fetches the rest
+    INBOX_PREVIEW_CHARS = 200
+
+    def _inbox_page_request(self, page):
+        """
+        The ListMessages request for one inbox page. inbox_cursors[p] is the before_id
+        that fetches page p, learned from page p - 1, so paging forward is an index seek
+        rather than an OFFSET scan.
+        """
+        before_id = st.session_state.setdefault("inbox_cursors", {}).get(page, 0) if page > 0 else 0
+        return chat_service_pb2.ListMessagesRequest(
+            auth_token=st.session_state.auth_token,
+            start=0 if before_id else page * self.INBOX_PAGE_SIZE,
+            count=self.INBOX_PAGE_SIZE,
+            before_id=before_id,
+            preview_chars=self.INBOX_PREVIEW_CHARS
+        )
+
+    def _cache_inbox_page(self, page, version, list_resp):
+        st.session_state.inbox_cache = list_resp
+        st.session_state.inbox_cache_key = (st.session_state.auth_token, page, version)
+        if list_resp.next_before_id:
+            st.session_state.setdefault("inbox_cursors", {})[page + 1] = list_resp.next_before_id
+
     def show_inbox_page(self):
         st.header("Inbox")
-        st_autorefresh(interval=5000, key="inbox_autorefresh")
+        sub = self._subscription()
+        # Reruns only read the local stream buffer; the server is queried when it changed.
+        st_autorefresh(interval=500, key="inbox_autorefresh")
+        for message in sub.take_new_messages():
+            st.toast(f"New message from {message.sender}")
 
         # (A) Manual Fetch for Offline Messages (if you want to keep that)
         st.write("**Manually fetch offline messages**")
@@ -221,18 +420,26 @@ class StreamlitChatApp:
                 st.warning("Enter a positive number.")
                 return
 
-            # This is your existing "FetchAwayMsgs"
-            away_resp = stub.FetchAwayMsgs(
-                chat_service_pb2.FetchAwayMsgsRequest(
-                    limit=manual_fetch_count,
-                    auth_token=st.session_state.auth_token
+            # FetchAwayMsgs and the refreshed page in one round trip
+            page = st.session_state.get("inbox_page", 0)
+            batch_resp = stub.Batch(
+                chat_service_pb2.BatchRequest(
+                    auth_token=st.session_state.auth_token,
+                    calls=[
+                        chat_service_pb2.BatchCall(fetch_away_msgs=chat_service_pb2.FetchAwayMsgsRequest(limit=manual_fetch_count)),
+                        chat_service_pb2.BatchCall(list_messages=self._inbox_page_request(page)),
+                    ]
                 )
             )
-            if not away_resp:
+            if not batch_resp:
                 st.error("No response from server.")
                 return
+            if batch_resp.status != "ok":
+                st.error(f"Manual fetch failed: {batch_resp.msg}")
+                return
+            away_resp, list_resp = batch_resp.results[0].fetch_away_msgs, batch_resp.results[1].list_messages
             if away_resp.status == "ok":
-                # We'll refresh the inbox
+                self._cache_inbox_page(page, sub.version, list_resp)
                 st.rerun()
             else:
                 st.error("Manual fetch failed or returned an error.")
@@ -241,18 +448,15 @@ class StreamlitChatApp:
         if "inbox_page" not in st.session_state:
             st.session_state.inbox_page = 0
 
-        MESSAGES_PER_PAGE = 10
+        MESSAGES_PER_PAGE = self.INBOX_PAGE_SIZE
         current_page = st.session_state.inbox_page
-        start_offset = current_page * MESSAGES_PER_PAGE
 
-        # (C) Request messages from the server with the desired offset/limit
-        list_resp = stub.ListMessages(
-            chat_service_pb2.ListMessagesRequest(
-                auth_token=st.session_state.auth_token,
-                start=start_offset,
-                count=MESSAGES_PER_PAGE
-            )
-        )
+        # (C) Request messages from the server with the desired offset/limit,
+        #     unless this page is cached and nothing was pushed since.
+        cache_key = (st.session_state.auth_token, current_page, sub.version)
+        if st.session_state.get("inbox_cache_key") != cache_key:
+            self._cache_inbox_page(current_page, sub.version, stub.ListMessages(self._inbox_page_request(current_page)))
+        list_resp = st.session_state.inbox_cache
         if not list_resp:
             st.error("No response from server.")
             return
@@ -301,6 +505,8 @@ class StreamlitChatApp:
 
         selected_msg_ids = []
 
+        # bodies opened with "Show full message", kept across reruns
+        full_bodies = st.session_state.setdefault("full_bodies", {})
         for cur_msg in msgs:
             cols = st.columns([0.07, 0.93])
             with cols[0]:
@@ -313,10 +519,21 @@ class StreamlitChatApp:
                     selected_msg_ids.append(cur_msg.id)
             with cols[1]:
                 st.markdown(f"**ID:** {cur_msg.id} | **From:** {cur_msg.sender}")
+                content = full_bodies.get(cur_msg.id, cur_msg.content)
+                truncated = len(content) < cur_msg.content_length
                 st.markdown(
-                    f"<div style='padding: 0.5rem 0;'>{cur_msg.content}</div>",
+                    f"<div style='padding: 0.5rem 0;'>{content}{'…' if truncated else ''}</div>",
                     unsafe_allow_html=True
                 )
+                if truncated and st.button("Show full message", key=f"full_{cur_msg.id}"):
+                    get_resp = stub.GetMessages(
+                        chat_service_pb2.GetMessagesRequest(auth_token=st.session_state.auth_token, ids=[cur_msg.id])
+                    )
+                    if get_resp.status == "ok":
+                        full_bodies.update((m.id, m.content) for m in get_resp.messages)
+                        st.rerun()
+                    else:
+                        st.error(f"Could not load the message: {get_resp.msg}")
             st.markdown("---")
 
         # (G) Delete Selected
@@ -336,6 +553,7 @@ class StreamlitChatApp:
                 if del_resp.status == "ok":
                     st.success(f"Deleted {len(selected_msg_ids)} message(s).")
                     # reload this page
+                    st.session_state.pop("inbox_cache_key", None)
                     st.rerun()
                 else:
                     st.error("Deletion of selected messages failed.")
@@ -450,6 +668,7 @@ class StreamlitChatApp:
                 st.success("Account deleted successfully!")
                 st.session_state.logged_in = False
                 st.session_state.username = ""
+                self._end_subscription()
                 st.rerun()
             else:
                 st.error("Failed to delete the account.")
@@ -467,6 +686,7 @@ class StreamlitChatApp:
                 st.success("Logged out.")
                 st.session_state.logged_in = False
                 st.session_state.username = ""
+                self._end_subscription()
                 st.rerun()
             else:
                 st.error("Logout was refused by the server.")
@@ -505,14 +725,19 @@ class StreamlitChatApp:
 # Entry point
 # -----------------------------------------------------------------------------
 if __name__ == "__main__":
-    # Setup connection
-    channel = grpc.insecure_channel("127.0.0.1:50051")
-    stub = chat_service_pb2_grpc.ChatServiceStub(channel)
     parser = argparse.ArgumentParser(description="JoChat Client")
     parser.add_argument("--host", type=str, default="127.0.0.1", help="Server IP address")
-    parser.add_argument("--port", type=int, default=5555, help="Server port")
+    parser.add_argument("--port", type=int, default=50051, help="Server port")
+    parser.add_argument("--compression", type=str, choices=sorted(COMPRESSION), default="none", help="Compress large requests with this algorithm")
+    parser.add_argument("--compression-min-bytes", type=int, default=1024, help="Smallest request, serialized, that gets compressed")
 
     args = parser.parse_args()
 
+    # Setup connection: reuse the process-wide channel rather than dialing on every rerun
+    pooled = shared_channel(f"{args.host}:{args.port}", args.compression, args.compression_min_bytes)
+    stub = pooled.stub
+    if not pooled.reachable():
+        st.warning(f"Cannot reach the server at {pooled.target}; retrying in the background.")
+
     app = StreamlitChatApp(server_host=args.host, server_port=args.port)
     app.run_app()
\ No newline at end of file
@@ -0,0 +1,66 @@
+import sys
+import os
+import unittest
+import grpc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import client
+from client import PooledChannel, shared_channel
+
+class TestChannelCache(unittest.TestCase):
+    """The client keeps one channel per target across reruns."""
+
+    def tearDown(self):
+        shared_channel.clear()
+
+    def test_reruns_share_one_channel(self):
+        """Repeated lookups, as on every Streamlit rerun, return the same channel and stub."""
+        first = shared_channel("127.0.0.1:50051")
+        second = shared_channel("127.0.0.1:50051")
+        self.assertIs(first, second)
+        self.assertIs(first.stub, second.stub)
+        self.assertIsNot(first, shared_channel("127.0.0.1:50052"))
+
+    def test_closed_channel_is_replaced(self):
+        """A closed channel fails validation, so the next lookup builds a new one."""
+        first = shared_channel("127.0.0.1:50051")
+        first.close()
+        self.assertFalse(first.healthy())
+        self.assertIsNot(shared_channel("127.0.0.1:50051"), first)
+
+    def test_state_follows_connectivity(self):
+        pooled = PooledChannel("127.0.0.1:50051")
+        pooled._on_state(grpc.ChannelConnectivity.TRANSIENT_FAILURE)
+        self.assertFalse(pooled.reachable())
+        self.assertTrue(pooled.healthy(), "❌ gRPC reconnects by itself, so a brief failure is not replaced")
+        pooled._on_state(grpc.ChannelConnectivity.READY)
+        self.assertTrue(pooled.reachable())
+        pooled.close()
+
+    def test_stuck_or_shut_down_channel_is_replaced(self):
+        """
+        1. A channel failing for FAILED_CHANNEL_SECS fails validation and is closed
+        2. So does one gRPC reports as SHUTDOWN; the next lookup builds a new one
+        """
+        first = shared_channel("127.0.0.1:50051")
+        first._on_state(grpc.ChannelConnectivity.TRANSIENT_FAILURE)
+        first.failing_since -= client.FAILED_CHANNEL_SECS
+        self.assertFalse(first.healthy())
+        self.assertTrue(first.closed)
+        second = shared_channel("127.0.0.1:50051")
+        self.assertIsNot(second, first)
+
+        second._on_state(grpc.ChannelConnectivity.SHUTDOWN)
+        self.assertIsNot(shared_channel("127.0.0.1:50051"), second)
+
+    def test_recovered_channel_is_kept(self):
+        pooled = PooledChannel("127.0.0.1:50051")
+        pooled._on_state(grpc.ChannelConnectivity.TRANSIENT_FAILURE)
+        pooled.failing_since -= client.FAILED_CHANNEL_SECS
+        pooled._on_state(grpc.ChannelConnectivity.READY)
+        self.assertTrue(pooled.healthy())
+        pooled.close()
+
+if __name__ == "__main__":
+    unittest.main()
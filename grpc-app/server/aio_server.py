@@ -0,0 +1,169 @@
+import asyncio
+from concurrent import futures
+
+import grpc
+
+from database import Database
+from subscriptions import AsyncSubscriptionHub, AsyncTailedSubscriptionHub
+from metrics import AioMetricsInterceptor, MetricsRegistry
+from ratelimit import AioRateLimitInterceptor, RateLimiter
+from compression import DEFAULT_MIN_BYTES, AioCompressionInterceptor, CompressionPolicy
+from server import BULK_CHUNK_SIZE, KEEPALIVE_OPTIONS, ChatServiceServicer, chat_message, session_store
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import chat_service_pb2_grpc
+
+
+class _ExecutorAbort(Exception):
+    def __init__(self, code, details):
+        super().__init__(details)
+        self.code, self.details = code, details
+
+
+class _ExecutorContext:
+    """
+    The parts of a sync ServicerContext the shared handlers use, backed by an aio
+    context from an executor thread. abort() cannot be awaited there, so it raises
+    and AsyncChatServiceServicer._run aborts the call back on the loop.
+    """
+    def __init__(self, context):
+        self._context = context
+
+    def is_active(self):
+        return not (self._context.done() or self._context.cancelled())
+
+    def time_remaining(self):
+        return self._context.time_remaining()
+
+    def abort(self, code, details):
+        raise _ExecutorAbort(code, details)
+
+
+class AsyncChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
+    """
+    grpc.aio front end for ChatServiceServicer.
+
+    Every unary handler reuses the threaded implementation, run on a small dedicated
+    executor so a slow SQLite call never blocks the event loop. Subscribe streams live
+    on the loop itself as awaitable queues, so an open stream costs a coroutine instead
+    of a worker thread and thousands can be held by one process.
+    """
+
+    def __init__(self, db, logged_in_users, subscribers, db_executor, metrics=None):
+        self.logged_in_users = logged_in_users
+        self.subscribers = subscribers
+        self.db_executor = db_executor
+        self.handlers = ChatServiceServicer(db, logged_in_users, subscribers, metrics)
+
+    async def _run(self, handler, request, context):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.db_executor, handler, request, _ExecutorContext(context))
+        except _ExecutorAbort as e:
+            await context.abort(e.code, e.details)
+
+    async def Signup(self, request, context):
+        return await self._run(self.handlers.Signup, request, context)
+
+    async def Login(self, request, context):
+        return await self._run(self.handlers.Login, request, context)
+
+    async def Logout(self, request, context):
+        return await self._run(self.handlers.Logout, request, context)
+
+    async def CountUnread(self, request, context):
+        return await self._run(self.handlers.CountUnread, request, context)
+
+    async def SendMessage(self, request, context):
+        return await self._run(self.handlers.SendMessage, request, context)
+
+    async def SendMessages(self, request_iterator, context):
+        # the stream is read on the loop; only the chunk writes go to the executor
+        loop = asyncio.get_running_loop()
+        results, chunk = [], []
+        async for request in request_iterator:
+            chunk.append(request)
+            if len(chunk) == BULK_CHUNK_SIZE:
+                results.extend(await loop.run_in_executor(self.db_executor, self.handlers._send_chunk, chunk, len(results)))
+                chunk = []
+        if chunk:
+            results.extend(await loop.run_in_executor(self.db_executor, self.handlers._send_chunk, chunk, len(results)))
+        return self.handlers._bulk_response(results)
+
+    async def ListMessages(self, request, context):
+        return await self._run(self.handlers.ListMessages, request, context)
+
+    async def GetMessages(self, request, context):
+        return await self._run(self.handlers.GetMessages, request, context)
+
+    async def FetchAwayMsgs(self, request, context):
+        return await self._run(self.handlers.FetchAwayMsgs, request, context)
+
+    async def ListAccounts(self, request, context):
+        return await self._run(self.handlers.ListAccounts, request, context)
+
+    async def DeleteMessages(self, request, context):
+        return await self._run(self.handlers.DeleteMessages, request, context)
+
+    async def DeleteAccount(self, request, context):
+        return await self._run(self.handlers.DeleteAccount, request, context)
+
+    async def ResetDB(self, request, context):
+        return await self._run(self.handlers.ResetDB, request, context)
+
+    async def Stats(self, request, context):
+        return await self._run(self.handlers.Stats, request, context)
+
+    async def Batch(self, request, context):
+        return await self._run(self.handlers.Batch, request, context)
+
+    async def Subscribe(self, request, context):
+        """Streams messages sent to the caller as they arrive, until logout or cancel."""
+        username = self.logged_in_users.get(request.auth_token)
+        if username is None:
+            await context.abort(grpc.StatusCode.UNAUTHENTICATED, "Not logged in")
+
+        q = self.subscribers.subscribe(username)
+        try:
+            while True:
+                message = await q.get()
+                if message is None:
+                    return
+                yield message
+        finally:
+            # also runs when the client cancels and the await above is interrupted
+            self.subscribers.unsubscribe(username, q)
+
+
+async def serve_aio(session_ttl=None, db_workers=4, port=50051, rate_limits=None, max_concurrent=None, shared=False,
+                    tokens="session", token_key="token.key", compression="none", compression_min_bytes=DEFAULT_MIN_BYTES):
+    db = Database("chat.db", wal=shared)
+    db_executor = futures.ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix="db")
+    sessions = session_store(tokens, session_ttl, shared, token_key)
+    options = list(KEEPALIVE_OPTIONS)
+    if shared:
+        subscribers = AsyncTailedSubscriptionHub("chat.db", sessions, chat_message, loop=asyncio.get_running_loop())
+        options.append(("grpc.so_reuseport", 1))
+    else:
+        subscribers = AsyncSubscriptionHub(asyncio.get_running_loop())
+
+    metrics = MetricsRegistry()
+    interceptors = [AioMetricsInterceptor(metrics)]
+    if rate_limits or max_concurrent:
+        interceptors.append(AioRateLimitInterceptor(RateLimiter(rate_limits, max_concurrent), metrics, sessions))
+    policy = CompressionPolicy(compression, compression_min_bytes)
+    if policy.enabled:
+        interceptors.append(AioCompressionInterceptor(policy))
+    server = grpc.aio.server(interceptors=interceptors, options=options, compression=policy.algorithm if policy.enabled else None)
+    chat_service_pb2_grpc.add_ChatServiceServicer_to_server(
+        AsyncChatServiceServicer(db, sessions, subscribers, db_executor, metrics),
+        server
+    )
+    server.add_insecure_port(f"[::]:{port}")
+    print(f"Starting gRPC asyncio server on port {port} ({db_workers} database threads)...")
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        db_executor.shutdown(wait=False)
@@ -0,0 +1,132 @@
+"""
+What gRPC compression saves on the wire and what it costs in latency, per RPC and
+message size.
+
+For each algorithm (none, gzip, deflate) a server is started with
+--compression ALGORITHM --compression-min-bytes 0 and reached through a byte-counting
+proxy, over a channel that compresses requests with the same algorithm. For each
+content size, --calls calls are timed of:
+  - SendMessage carrying one message of that size;
+  - ListMessages returning a page of 10 such messages;
+  - GetMessages returning one of them.
+Message text is drawn from a small vocabulary, so it compresses about as well as
+chat text. Reported per row: bytes on the wire per call each way, the share of
+bytes saved against no compression, mean client latency and what compression added
+to it, and server CPU time per call.
+
+Usage: python bench_compression.py [--sizes 64,512,4096,32768] [--calls 50]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import grpc
+
+from bench_stacks import ByteCountingProxy, cpu_seconds, free_port, start_server
+from compression import ALGORITHMS
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+import chat_service_pb2
+import chat_service_pb2_grpc
+
+RPCS = ("SendMessage", "ListMessages", "GetMessages")
+PAGE_SIZE = 10
+WORDS = ("hey", "are", "we", "still", "on", "for", "lunch", "tomorrow", "the", "meeting", "moved", "to",
+         "three", "can", "you", "send", "me", "notes", "from", "yesterday", "thanks", "sounds", "good",
+         "see", "you", "there", "I", "will", "bring", "slides", "and", "a", "draft", "of", "report")
+
+
+def chat_text(size, rng):
+    words = []
+    length = 0
+    while length < size:
+        words.append(rng.choice(WORDS))
+        length += len(words[-1]) + 1
+    return " ".join(words)[:size]
+
+
+def run_algorithm(algorithm, sizes, calls):
+    """Returns {(size, rpc): (up bytes/call, down bytes/call, mean latency s, server CPU s/call)}."""
+    rng = random.Random(0)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        server = start_server("grpc", port, workdir, ("--compression", algorithm, "--compression-min-bytes", "0"))
+        proxy = ByteCountingProxy(port)
+        channel = grpc.insecure_channel(f"127.0.0.1:{proxy.port}", compression=ALGORITHMS[algorithm])
+        stub = chat_service_pb2_grpc.ChatServiceStub(channel)
+        try:
+            def login(username):
+                stub.Signup(chat_service_pb2.SignupRequest(username=username, password="benchpass"))
+                return stub.Login(chat_service_pb2.LoginRequest(username=username, password="benchpass")).auth_token
+
+            sender = login("sender")
+            for size in sizes:
+                reader = login(f"reader{size}")
+                content = chat_text(size, rng)
+                page = chat_service_pb2.ListMessagesRequest(auth_token=reader, count=PAGE_SIZE)
+                for _ in range(PAGE_SIZE):
+                    stub.SendMessage(chat_service_pb2.SendMessageRequest(auth_token=sender, recipient=f"reader{size}", content=content))
+                one = chat_service_pb2.GetMessagesRequest(auth_token=reader, ids=[stub.ListMessages(page).messages[0].id])
+                login(f"sink{size}")   # SendMessage target, so the reader's page stays put
+
+                calls_by_rpc = {
+                    "SendMessage": lambda: stub.SendMessage(chat_service_pb2.SendMessageRequest(auth_token=sender, recipient=f"sink{size}", content=content)),
+                    "ListMessages": lambda: stub.ListMessages(page),
+                    "GetMessages": lambda: stub.GetMessages(one),
+                }
+                for rpc in RPCS:
+                    call = calls_by_rpc[rpc]
+                    call()   # warm up
+                    proxy.reset()
+                    cpu_before = cpu_seconds(server.pid)
+                    started = time.perf_counter()
+                    for _ in range(calls):
+                        call()
+                    elapsed = time.perf_counter() - started
+                    cpu_after = cpu_seconds(server.pid)
+                    up, down = proxy.totals()
+                    cpu = (cpu_after - cpu_before) / calls if cpu_before is not None else None
+                    results[(size, rpc)] = (up / calls, down / calls, elapsed / calls, cpu)
+        finally:
+            channel.close()
+            proxy.close()
+            server.kill()
+            server.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=str, default="64,512,4096,32768", help="Comma-separated message sizes in characters")
+    parser.add_argument("--calls", type=int, default=50, help="Timed calls per RPC, size and algorithm (default: 50)")
+    parser.add_argument("--algorithms", type=str, default="none,gzip,deflate", help="Comma-separated subset of none,gzip,deflate")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    algorithms = [a.strip() for a in args.algorithms.split(",") if a.strip()]
+    for algorithm in algorithms:
+        if algorithm not in ALGORITHMS:
+            parser.error(f"unknown algorithm {algorithm!r}")
+    if "none" not in algorithms:
+        algorithms.insert(0, "none")
+
+    runs = {algorithm: run_algorithm(algorithm, sizes, args.calls) for algorithm in algorithms}
+    print(f"{args.calls} calls per row; saved and +latency are against no compression")
+    print(f"  {'rpc':<13}{'size':>7}{'algorithm':>10}{'B/call up':>11}{'B/call down':>13}{'saved':>8}"
+          f"{'ms/call':>9}{'+latency':>10}{'CPU us':>8}")
+    for rpc in RPCS:
+        for size in sizes:
+            base_up, base_down, base_latency, _ = runs["none"][(size, rpc)]
+            for algorithm in algorithms:
+                up, down, latency, cpu = runs[algorithm][(size, rpc)]
+                saved = 1 - (up + down) / (base_up + base_down)
+                cpu_text = f"{cpu * 1e6:.0f}" if cpu is not None else "n/a"
+                print(f"  {rpc:<13}{size:>7}{algorithm:>10}{up:>11.0f}{down:>13.0f}{saved:>8.0%}"
+                      f"{latency * 1000:>9.3f}{(latency - base_latency) * 1000:>+10.3f}{cpu_text:>8}")
+
+
+if __name__ == "__main__":
+    main()
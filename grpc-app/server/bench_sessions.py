@@ -0,0 +1,155 @@
+"""
+Per-RPC auth overhead: Manager().dict() (the old session table) vs SessionStore.
+
+Two measurements:
+  1. the session operations each handler performs, timed in isolation
+     with --sessions users logged in;
+  2. end-to-end latency of CountUnread and SendMessage against an in-process server
+     using each store, so the difference shows up as RPC time.
+
+Usage: python bench_sessions.py [--sessions 1000] [--iterations 2000]
+"""
+import argparse
+import os
+import secrets
+import tempfile
+import time
+from concurrent import futures
+from multiprocessing import Manager
+
+import grpc
+
+from database import Database
+from sessions import SessionStore
+from server import ChatServiceServicer
+
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import chat_service_pb2
+import chat_service_pb2_grpc
+
+
+def time_per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_operations(sessions, iterations):
+    manager = Manager()
+    old = manager.dict()
+    new = SessionStore()
+    tokens = []
+    for i in range(sessions):
+        token = new.create(f"user{i}")
+        old[token] = f"user{i}"
+        tokens.append(token)
+    token, recipient = tokens[sessions // 2], f"user{sessions - 1}"
+    old_sessions = ManagerSessions(old)
+
+    # The session work each handler does per call, before and after.
+    cases = [
+        ("token check (CountUnread, ListAccounts, ...)",
+         lambda: token in old and old[token],
+         lambda: new.get(token)),
+        ("sender + recipient online (SendMessage)",
+         lambda: (old.get(token, -1), recipient in old.values()),
+         lambda: (new.get(token, -1), new.is_online(recipient))),
+        # What Login does: end the user's earlier session, then issue a new token.
+        ("end previous session + new token (Login)",
+         lambda: (old_sessions.remove_user(recipient), old_sessions.create(recipient)),
+         lambda: (new.remove_user(recipient), new.create(recipient))),
+    ]
+    print(f"Session operations with {sessions} logged-in users (us per RPC):")
+    print(f"  {'operation':<46}{'Manager().dict()':>18}{'SessionStore':>14}")
+    for name, before, after in cases:
+        # The scans are O(sessions) IPC payloads; keep their iteration count sane.
+        n = iterations if "check" in name else max(iterations // 10, 10)
+        print(f"  {name:<46}{time_per_call(before, n):>18.1f}{time_per_call(after, n):>14.2f}")
+    manager.shutdown()
+
+
+class ManagerSessions:
+    """
+    The old session table behind the SessionStore interface: a Manager().dict()
+    accessed the way the handlers used to, one IPC round trip per access and full
+    scans for the online and previous-session checks.
+    """
+    def __init__(self, proxy):
+        self.proxy = proxy
+
+    def create(self, username):
+        token = secrets.token_hex(16)
+        self.proxy[token] = username
+        return token
+
+    def get(self, token, default=None):
+        return self.proxy.get(token, default)
+
+    def __contains__(self, token):
+        return token in self.proxy
+
+    def remove(self, token):
+        return self.proxy.pop(token, None)
+
+    def remove_user(self, username):
+        for tok, logged_in_username in self.proxy.items():
+            if logged_in_username == username:
+                del self.proxy[tok]
+                return 1
+        return 0
+
+    def is_online(self, username):
+        return username in self.proxy.values()
+
+
+def bench_rpcs(store, sessions, iterations, port):
+    tmpdir = tempfile.TemporaryDirectory()
+    db = Database(os.path.join(tmpdir.name, "chat.db"))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    chat_service_pb2_grpc.add_ChatServiceServicer_to_server(ChatServiceServicer(db=db, logged_in_users=store), server)
+    server.add_insecure_port(f"localhost:{port}")
+    server.start()
+
+    channel = grpc.insecure_channel(f"localhost:{port}")
+    stub = chat_service_pb2_grpc.ChatServiceStub(channel)
+    for name in ("alice", "bob"):
+        stub.Signup(chat_service_pb2.SignupRequest(username=name, password="pw"))
+    token = stub.Login(chat_service_pb2.LoginRequest(username="alice", password="pw")).auth_token
+    # Pad the table so scans have realistic work to do.
+    for i in range(sessions):
+        store.create(f"idle{i}")
+
+    count_req = chat_service_pb2.EmptyRequest(auth_token=token)
+    send_req = chat_service_pb2.SendMessageRequest(auth_token=token, recipient="bob", content="hi")
+    results = (
+        time_per_call(lambda: stub.CountUnread(count_req), iterations),
+        time_per_call(lambda: stub.SendMessage(send_req), iterations // 4),
+    )
+    channel.close()
+    server.stop(None)
+    tmpdir.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000, help="Logged-in sessions to simulate (default: 1000)")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per measurement (default: 2000)")
+    args = parser.parse_args()
+
+    bench_operations(args.sessions, args.iterations)
+
+    manager = Manager()
+    old = bench_rpcs(ManagerSessions(manager.dict()), args.sessions, args.iterations, 50071)
+    manager.shutdown()
+    new = bench_rpcs(SessionStore(), args.sessions, args.iterations, 50072)
+    print(f"\nEnd-to-end RPC latency with {args.sessions} other sessions (us per call):")
+    print(f"  {'rpc':<46}{'Manager().dict()':>18}{'SessionStore':>14}")
+    print(f"  {'CountUnread':<46}{old[0]:>18.1f}{new[0]:>14.1f}")
+    print(f"  {'SendMessage':<46}{old[1]:>18.1f}{new[1]:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+One scripted chat workload against all three implementations of the API:
+messaging-app with its custom binary framing, messaging-app with JSON framing,
+and this gRPC server.
+
+Each stack is started as its own server process in a scratch directory and reached
+through a byte-counting TCP proxy. --clients users sign up and log in (not measured),
+then each runs --requests calls cycling through send_message, count_unread,
+list_accounts and fetch_away_msgs. Reported per stack:
+  - throughput (requests/s over the whole run) and p50/p99 client-side latency;
+  - bytes on the wire per request, each direction, including all framing;
+  - server CPU time (user + system) per request, read from /proc.
+
+Usage: python bench_stacks.py [--clients 8] [--requests 500] [--stacks custom,json,grpc]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import grpc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MESSAGING_APP = os.path.abspath(os.path.join(HERE, "..", "..", "messaging-app"))
+sys.path.append(os.path.abspath(os.path.join(HERE, "..")))
+sys.path.append(MESSAGING_APP)
+import chat_service_pb2
+import chat_service_pb2_grpc
+from protocol.protocol import CustomProtocolHandler, JSONProtocolHandler, Message
+
+STACKS = ("custom", "json", "grpc")
+WORKLOAD = ("send_message", "count_unread", "list_accounts", "fetch_away_msgs")
+
+
+class ByteCountingProxy:
+    """Relays TCP connections to the server and counts the bytes in each direction."""
+    def __init__(self, target_port):
+        self.target_port = target_port
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        self.lock = threading.Lock()
+        self.client_to_server = 0
+        self.server_to_client = 0
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                return
+            server = socket.create_connection(("127.0.0.1", self.target_port))
+            for sock in (client, server):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._pump, args=(client, server, True), daemon=True).start()
+            threading.Thread(target=self._pump, args=(server, client, False), daemon=True).start()
+
+    def _pump(self, source, destination, upstream):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                destination.sendall(data)
+                with self.lock:
+                    if upstream:
+                        self.client_to_server += len(data)
+                    else:
+                        self.server_to_client += len(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (source, destination):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def reset(self):
+        with self.lock:
+            self.client_to_server = self.server_to_client = 0
+
+    def totals(self):
+        with self.lock:
+            return self.client_to_server, self.server_to_client
+
+    def close(self):
+        self.listener.close()
+
+
+class SocketClient:
+    """A messaging-app connection; the login is tied to the socket."""
+    def __init__(self, port, protocol_handler):
+        self.sock = socket.create_connection(("127.0.0.1", port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.protocol = protocol_handler
+        self.username = None
+
+    def _call(self, msg_type, data):
+        self.protocol.send(self.sock, Message(msg_type, data), is_response=False)
+        response = self.protocol.receive(self.sock)
+        return response is not None and response.data.get("status") == "ok"
+
+    def signup(self, username, password):
+        return self._call("signup", {"username": username, "password": password})
+
+    def login(self, username, password):
+        self.username = username
+        return self._call("login", {"username": username, "password": password})
+
+    def send_message(self, recipient, content):
+        return self._call("send_message", {"sender": self.username, "recipient": recipient, "content": content})
+
+    def count_unread(self):
+        return self._call("count_unread", {})
+
+    def list_accounts(self, pattern, start, count):
+        return self._call("list_accounts", {"pattern": pattern, "start": start, "count": count})
+
+    def fetch_away_msgs(self, limit):
+        return self._call("fetch_away_msgs", {"limit": limit})
+
+    def close(self):
+        self.sock.close()
+
+
+class GrpcClient:
+    """The same calls over a ChatService stub, one channel per simulated user."""
+    def __init__(self, port):
+        self.channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+        self.stub = chat_service_pb2_grpc.ChatServiceStub(self.channel)
+        self.token = ""
+
+    def signup(self, username, password):
+        return self.stub.Signup(chat_service_pb2.SignupRequest(username=username, password=password)).status == "ok"
+
+    def login(self, username, password):
+        resp = self.stub.Login(chat_service_pb2.LoginRequest(username=username, password=password))
+        self.token = resp.auth_token
+        return resp.status == "ok"
+
+    def send_message(self, recipient, content):
+        request = chat_service_pb2.SendMessageRequest(auth_token=self.token, recipient=recipient, content=content)
+        return self.stub.SendMessage(request).status == "ok"
+
+    def count_unread(self):
+        return self.stub.CountUnread(chat_service_pb2.CountUnreadRequest(auth_token=self.token)).status == "ok"
+
+    def list_accounts(self, pattern, start, count):
+        request = chat_service_pb2.ListAccountsRequest(auth_token=self.token, pattern=pattern, start=start, count=count)
+        return self.stub.ListAccounts(request).status == "ok"
+
+    def fetch_away_msgs(self, limit):
+        return self.stub.FetchAwayMsgs(chat_service_pb2.FetchAwayMsgsRequest(auth_token=self.token, limit=limit)).status == "ok"
+
+    def close(self):
+        self.channel.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(stack, port, workdir, extra_args=()):
+    if stack == "grpc":
+        cmd = [sys.executable, os.path.join(HERE, "server.py"), "--port", str(port), *extra_args]
+    else:
+        cmd = [sys.executable, os.path.join(MESSAGING_APP, "server", "server.py"), "--port", str(port),
+               "--protocol", stack, "--maintenance-interval", "0", "--stats-interval", "0"]
+    proc = subprocess.Popen(cmd, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{stack} server did not start on port {port}")
+
+
+def cpu_seconds(pid):
+    """User + system CPU time of a process, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_stack(stack, clients, requests):
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        server = start_server(stack, port, workdir)
+        proxy = ByteCountingProxy(port)
+        try:
+            def connect():
+                if stack == "grpc":
+                    return GrpcClient(proxy.port)
+                return SocketClient(proxy.port, CustomProtocolHandler() if stack == "custom" else JSONProtocolHandler())
+
+            users = [connect() for _ in range(clients)]
+            for i, user in enumerate(users):
+                user.signup(f"user{i}", "benchpass")
+                user.login(f"user{i}", "benchpass")
+
+            latencies = [[] for _ in users]
+            errors = [0] * len(users)
+
+            def workload(i):
+                user, recipient = users[i], f"user{(i + 1) % clients}"
+                for n in range(requests):
+                    op = WORKLOAD[n % len(WORKLOAD)]
+                    start = time.perf_counter()
+                    if op == "send_message":
+                        ok = user.send_message(recipient, f"message {n} from user{i}")
+                    elif op == "count_unread":
+                        ok = user.count_unread()
+                    elif op == "list_accounts":
+                        ok = user.list_accounts("user", 0, 10)
+                    else:
+                        ok = user.fetch_away_msgs(10)
+                    latencies[i].append(time.perf_counter() - start)
+                    errors[i] += not ok
+
+            proxy.reset()
+            cpu_before = cpu_seconds(server.pid)
+            threads = [threading.Thread(target=workload, args=(i,)) for i in range(clients)]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+            cpu_after = cpu_seconds(server.pid)
+            upstream, downstream = proxy.totals()
+
+            for user in users:
+                user.close()
+        finally:
+            proxy.close()
+            server.kill()
+            server.wait()
+
+    total = clients * requests
+    all_latencies = sorted(l for per_client in latencies for l in per_client)
+    return {
+        "requests": total,
+        "errors": sum(errors),
+        "rps": total / elapsed,
+        "p50_ms": percentile(all_latencies, 0.50) * 1000,
+        "p99_ms": percentile(all_latencies, 0.99) * 1000,
+        "up_bytes": upstream / total,
+        "down_bytes": downstream / total,
+        "cpu_us": (cpu_after - cpu_before) / total * 1e6 if cpu_before is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent users, one connection each (default: 8)")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per user (default: 500)")
+    parser.add_argument("--stacks", type=str, default=",".join(STACKS), help="Comma-separated subset of custom,json,grpc")
+    args = parser.parse_args()
+
+    stacks = [s.strip() for s in args.stacks.split(",") if s.strip()]
+    for stack in stacks:
+        if stack not in STACKS:
+            parser.error(f"unknown stack {stack!r}")
+
+    print(f"{args.clients} clients x {args.requests} requests ({', '.join(WORKLOAD)})")
+    print(f"  {'stack':<8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'B/req up':>10}{'B/req down':>12}{'CPU us/req':>12}{'errors':>8}")
+    for stack in stacks:
+        r = run_stack(stack, args.clients, args.requests)
+        cpu = f"{r['cpu_us']:.0f}" if r["cpu_us"] is not None else "n/a"
+        print(f"  {stack:<8}{r['rps']:>9.0f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+              f"{r['up_bytes']:>10.1f}{r['down_bytes']:>12.1f}{cpu:>12}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
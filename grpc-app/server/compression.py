@@ -0,0 +1,109 @@
+import grpc
+
+ALGORITHMS = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+# Messages below this many bytes are sent as they are: the framing and CPU time of
+# compressing a short status reply cost more than the few bytes it would save.
+DEFAULT_MIN_BYTES = 1024
+
+
+class CompressionPolicy:
+    """Compresses messages of at least min_bytes (serialized) with one algorithm."""
+    def __init__(self, algorithm="none", min_bytes=DEFAULT_MIN_BYTES):
+        self.algorithm = ALGORITHMS[algorithm]
+        self.min_bytes = min_bytes
+
+    @property
+    def enabled(self):
+        return self.algorithm != grpc.Compression.NoCompression
+
+    def choose(self, message):
+        if self.enabled and message.ByteSize() >= self.min_bytes:
+            return self.algorithm
+        return grpc.Compression.NoCompression
+
+
+class CompressionInterceptor(grpc.ServerInterceptor):
+    """
+    Applies a CompressionPolicy to every response of the threaded server. Unary
+    responses get the algorithm or none depending on their size. Streams are opened
+    with the algorithm, and each message under the threshold is sent uncompressed.
+    """
+    def __init__(self, policy):
+        self.policy = policy
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        policy = self.policy
+
+        if handler.unary_unary or handler.stream_unary:
+            original = handler.unary_unary or handler.stream_unary
+
+            def behavior(request, context):
+                response = original(request, context)
+                context.set_compression(policy.choose(response))
+                return response
+
+            if handler.stream_unary:
+                return grpc.stream_unary_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+            return grpc.unary_unary_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+
+        if handler.unary_stream:
+            original = handler.unary_stream
+
+            def behavior(request, context):
+                context.set_compression(policy.algorithm)
+                for response in original(request, context):
+                    if policy.choose(response) == grpc.Compression.NoCompression:
+                        context.disable_next_message_compression()
+                    yield response
+
+            return grpc.unary_stream_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+        return handler
+
+
+class AioCompressionInterceptor(grpc.aio.ServerInterceptor):
+    """
+    CompressionInterceptor for the grpc.aio server. There, set_compression() on a
+    call has no effect (grpcio 1.70), so the server is created with the policy's
+    algorithm as its default, and this sends each message under the threshold
+    uncompressed instead.
+    """
+    def __init__(self, policy):
+        self.policy = policy
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        policy = self.policy
+
+        if handler.unary_unary or handler.stream_unary:
+            original = handler.unary_unary or handler.stream_unary
+
+            async def behavior(request, context):
+                response = await original(request, context)
+                if policy.choose(response) == grpc.Compression.NoCompression:
+                    context.disable_next_message_compression()
+                return response
+
+            if handler.stream_unary:
+                return grpc.stream_unary_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+            return grpc.unary_unary_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+
+        if handler.unary_stream:
+            original = handler.unary_stream
+
+            async def behavior(request, context):
+                async for response in original(request, context):
+                    if policy.choose(response) == grpc.Compression.NoCompression:
+                        context.disable_next_message_compression()
+                    yield response
+
+            return grpc.unary_stream_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+        return handler
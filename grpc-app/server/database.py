@@ -1,8 +1,16 @@
 import sqlite3
+import threading
+from contextlib import contextmanager
 
 class Database:
-    def __init__(self, db_name="chat.db"):
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
+    def __init__(self, db_name="chat.db", wal=False):
+        self.conn = sqlite3.connect(db_name, check_same_thread=False, timeout=10)
+        # the connection is shared by every handler thread; the lock keeps a transaction() to itself
+        self.lock = threading.RLock()
+        self._in_transaction = False
+        if wal:
+            # several server processes share the file; readers then never wait on a writer
+            self.conn.execute("PRAGMA journal_mode=WAL")
         self._init_db()
 
     def _init_db(self):
@@ -23,13 +31,126 @@ class Database:
                 to_deliver INTEGER DEFAULT 0
             );
         """)
+        # inbox pages are keyset seeks on (recipient, id)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_messages_recipient_id ON messages (recipient, id)")
         self.conn.commit()
 
-    def execute(self, query, params=(), commit=False):
-        c = self.conn.cursor()
-        c.execute(query, params)
-        if commit:
+        # per-recipient message totals, kept current by triggers so ListMessages never counts rows.
+        # They are counted from the messages table only when the table is first created; after
+        # that the triggers are the only writers. BEGIN IMMEDIATE keeps other --workers processes
+        # from inserting between the check, the triggers and the backfill.
+        with self.lock:
+            c.execute("BEGIN IMMEDIATE")
+            created = not c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='message_counts'").fetchone()
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS message_counts (
+                    username TEXT PRIMARY KEY,
+                    total INTEGER NOT NULL DEFAULT 0
+                );
+            """)
+            c.execute("""
+                CREATE TRIGGER IF NOT EXISTS message_counts_insert AFTER INSERT ON messages
+                BEGIN
+                    INSERT OR IGNORE INTO message_counts (username, total) VALUES (NEW.recipient, 0);
+                    UPDATE message_counts SET total = total + 1 WHERE username = NEW.recipient;
+                END;
+            """)
+            c.execute("""
+                CREATE TRIGGER IF NOT EXISTS message_counts_delete AFTER DELETE ON messages
+                BEGIN
+                    UPDATE message_counts SET total = total - 1 WHERE username = OLD.recipient;
+                END;
+            """)
+            if created:
+                c.execute("INSERT INTO message_counts (username, total) SELECT recipient, COUNT(*) FROM messages GROUP BY recipient")
+            self.conn.commit()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs a block of calls as one transaction: its reads all see one snapshot and its
+        writes are committed together at the end, or rolled back if the block raises.
+        Other threads' statements wait for it, and commit=True inside it is deferred.
+        """
+        with self.lock:
+            if self.conn.in_transaction:
+                self.conn.commit()
+            self.conn.execute("BEGIN")
+            self._in_transaction = True
+            try:
+                yield self
+            except BaseException:
+                self.conn.rollback()
+                raise
+            else:
+                self.conn.commit()
+            finally:
+                self._in_transaction = False
+
+    def _commit(self):
+        if not self._in_transaction:
             self.conn.commit()
-        if query.strip().upper().startswith("SELECT"):
-            return c.fetchall()
-        return c.rowcount
+
+    def select_batches(self, query, params=(), size=500):
+        """Yields the rows of a SELECT size at a time, so callers can stop between batches."""
+        with self.lock:
+            c = self.conn.cursor()
+            c.execute(query, params)
+        while True:
+            with self.lock:
+                rows = c.fetchmany(size)
+            if not rows:
+                return
+            yield rows
+
+    def delete_batches(self, table, where, params=(), size=500):
+        """Deletes matching rows size at a time, committing each batch and yielding how many went."""
+        while True:
+            with self.lock:
+                c = self.conn.cursor()
+                c.execute(f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {where} LIMIT ?)", tuple(params) + (size,))
+                self._commit()
+            if c.rowcount <= 0:
+                return
+            yield c.rowcount
+            if c.rowcount < size:
+                return
+
+    def message_count(self, username):
+        """Total messages addressed to username, from the trigger-maintained counts."""
+        row = self.execute("SELECT total FROM message_counts WHERE username=?", (username,))
+        return row[0][0] if row else 0
+
+    def execute(self, query, params=(), commit=False):
+        with self.lock:
+            c = self.conn.cursor()
+            c.execute(query, params)
+            if commit:
+                self._commit()
+            if query.strip().upper().startswith("SELECT"):
+                return c.fetchall()
+            return c.rowcount
+
+    def insert(self, query, params=()):
+        """Runs an INSERT, commits, and returns the new row's id."""
+        with self.lock:
+            c = self.conn.cursor()
+            c.execute(query, params)
+            self._commit()
+            return c.lastrowid
+
+    def insert_many(self, query, rows):
+        """Runs one INSERT per row in a single transaction and returns the new ids in order."""
+        with self.lock:
+            c = self.conn.cursor()
+            ids = []
+            try:
+                for params in rows:
+                    c.execute(query, params)
+                    ids.append(c.lastrowid)
+                self._commit()
+            except sqlite3.Error:
+                if not self._in_transaction:
+                    self.conn.rollback()
+                raise
+            return ids
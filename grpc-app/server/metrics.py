@@ -0,0 +1,229 @@
+import asyncio
+import bisect
+import threading
+import time
+
+import grpc
+
+# Upper bounds of the latency histogram buckets, in milliseconds; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class MethodMetrics:
+    """Counters for a single RPC method. Only touched while holding the registry lock."""
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.status_codes = {}
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_total_ms = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.abandoned = 0
+        self.throttled = 0
+
+    def percentile_ms(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls (inf if open-ended)."""
+        finished = sum(self.latency_counts)
+        if not finished:
+            return 0.0
+        target, seen = fraction * finished, 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.latency_counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """
+    Per-method call counts, status codes, latency histograms, wire sizes and
+    in-flight gauges, fed by MetricsInterceptor and read back by the Stats RPC.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self._methods = {}
+
+    def _method(self, method):
+        metrics = self._methods.get(method)
+        if metrics is None:
+            metrics = self._methods[method] = MethodMetrics()
+        return metrics
+
+    def call_started(self, method):
+        with self.lock:
+            metrics = self._method(method)
+            metrics.calls += 1
+            metrics.in_flight += 1
+            metrics.max_in_flight = max(metrics.max_in_flight, metrics.in_flight)
+        return time.perf_counter()
+
+    def call_finished(self, method, started, code):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            metrics = self._method(method)
+            metrics.in_flight -= 1
+            metrics.status_codes[code] = metrics.status_codes.get(code, 0) + 1
+            metrics.latency_counts[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            metrics.latency_total_ms += elapsed_ms
+
+    def call_abandoned(self, method):
+        """Counts a handler that stopped early because its client cancelled or ran out of time."""
+        with self.lock:
+            self._method(method).abandoned += 1
+
+    def call_throttled(self, method):
+        """Counts a call refused by the rate limiter or the concurrency cap."""
+        with self.lock:
+            self._method(method).throttled += 1
+
+    def add_bytes(self, method, request=0, response=0):
+        with self.lock:
+            metrics = self._method(method)
+            metrics.request_bytes += request
+            metrics.response_bytes += response
+
+    def snapshot(self):
+        """Returns (uptime_secs, {method: dict of its counters}) copied under the lock."""
+        with self.lock:
+            methods = {}
+            for method, m in sorted(self._methods.items()):
+                finished = sum(m.latency_counts)
+                methods[method] = {
+                    "calls": m.calls,
+                    "in_flight": m.in_flight,
+                    "max_in_flight": m.max_in_flight,
+                    "status_codes": dict(m.status_codes),
+                    "latency_counts": list(m.latency_counts),
+                    "latency_mean_ms": m.latency_total_ms / finished if finished else 0.0,
+                    "latency_p50_ms": m.percentile_ms(0.5),
+                    "latency_p99_ms": m.percentile_ms(0.99),
+                    "request_bytes": m.request_bytes,
+                    "response_bytes": m.response_bytes,
+                    "abandoned": m.abandoned,
+                    "throttled": m.throttled,
+                }
+            return time.monotonic() - self.started, methods
+
+
+def _code_name(context, default):
+    code = context.code()
+    if code is None:
+        return default
+    return code.name if isinstance(code, grpc.StatusCode) else str(code)
+
+
+def _counted_serializers(registry, method, handler):
+    """Wraps the handler's (de)serializers so the wire size of every message is recorded."""
+    deserialize, serialize = handler.request_deserializer, handler.response_serializer
+
+    def request_deserializer(data):
+        registry.add_bytes(method, request=len(data))
+        return deserialize(data) if deserialize else data
+
+    def response_serializer(message):
+        data = serialize(message) if serialize else message
+        registry.add_bytes(method, response=len(data))
+        return data
+
+    return request_deserializer, response_serializer
+
+
+def _rebuild(handler, behavior, request_deserializer, response_serializer):
+    if handler.unary_unary:
+        return grpc.unary_unary_rpc_method_handler(behavior, request_deserializer, response_serializer)
+    if handler.unary_stream:
+        return grpc.unary_stream_rpc_method_handler(behavior, request_deserializer, response_serializer)
+    if handler.stream_unary:
+        return grpc.stream_unary_rpc_method_handler(behavior, request_deserializer, response_serializer)
+    return grpc.stream_stream_rpc_method_handler(behavior, request_deserializer, response_serializer)
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Records every RPC on the threaded server into a MetricsRegistry."""
+    def __init__(self, registry):
+        self.registry = registry
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        registry = self.registry
+        original = handler.unary_unary or handler.unary_stream or handler.stream_unary or handler.stream_stream
+
+        if handler.unary_unary or handler.stream_unary:
+            def behavior(request, context):
+                started, code = registry.call_started(method), "UNKNOWN"
+                try:
+                    response = original(request, context)
+                    code = _code_name(context, "OK")
+                    return response
+                except BaseException:
+                    code = _code_name(context, "UNKNOWN")
+                    raise
+                finally:
+                    registry.call_finished(method, started, code)
+        else:
+            def behavior(request, context):
+                started, code = registry.call_started(method), "CANCELLED"
+                try:
+                    yield from original(request, context)
+                    code = _code_name(context, "OK")
+                except GeneratorExit:
+                    raise
+                except BaseException:
+                    code = _code_name(context, "UNKNOWN")
+                    raise
+                finally:
+                    registry.call_finished(method, started, code)
+
+        return _rebuild(handler, behavior, *_counted_serializers(registry, method, handler))
+
+
+class AioMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """MetricsInterceptor for the grpc.aio server, whose handlers are coroutines."""
+    def __init__(self, registry):
+        self.registry = registry
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        registry = self.registry
+        original = handler.unary_unary or handler.unary_stream or handler.stream_unary or handler.stream_stream
+
+        if handler.unary_unary or handler.stream_unary:
+            async def behavior(request, context):
+                started, code = registry.call_started(method), "UNKNOWN"
+                try:
+                    response = await original(request, context)
+                    code = _code_name(context, "OK")
+                    return response
+                except asyncio.CancelledError:
+                    code = "CANCELLED"
+                    raise
+                except BaseException:
+                    code = _code_name(context, "UNKNOWN")
+                    raise
+                finally:
+                    registry.call_finished(method, started, code)
+        else:
+            async def behavior(request, context):
+                started, code = registry.call_started(method), "CANCELLED"
+                try:
+                    async for response in original(request, context):
+                        yield response
+                    code = _code_name(context, "OK")
+                except (GeneratorExit, asyncio.CancelledError):
+                    raise
+                except BaseException:
+                    code = _code_name(context, "UNKNOWN")
+                    raise
+                finally:
+                    registry.call_finished(method, started, code)
+
+        return _rebuild(handler, behavior, *_counted_serializers(registry, method, handler))
@@ -0,0 +1,241 @@
+import collections
+import threading
+import time
+
+import grpc
+
+# Trailing metadata key carrying how long a throttled client should wait before retrying.
+RETRY_AFTER_KEY = "retry-after-ms"
+# Retry hint for calls refused by the concurrency cap, which has no refill time to report.
+CONCURRENCY_RETRY_SECS = 0.05
+# Buckets kept at most; past this the least recently used one is dropped.
+MAX_BUCKETS = 100000
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average with bursts of up to `burst`."""
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now):
+        """Spends one token; returns 0 if there was one, else the seconds until there will be."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def idle_full(self, now):
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+def parse_limit(spec):
+    """'ListAccounts=20/40' -> ('ListAccounts', (20.0, 40.0)); the burst defaults to the rate, '*' is any method."""
+    method, _, value = spec.partition("=")
+    rate, _, burst = value.partition("/")
+    if not method or not rate:
+        raise ValueError(f"expected METHOD=RATE[/BURST], got {spec!r}")
+    rate = float(rate)
+    return method, (rate, float(burst) if burst else rate)
+
+
+class RateLimiter:
+    """
+    Token buckets per (caller, method) and a cap on each caller's calls in progress.
+
+    A caller is the user behind a valid auth token, or the peer address for calls
+    that carry none or an invalid one (see _caller). limits maps a method name, or "*"
+    for every other method, to (calls per second, burst). max_concurrent=None means no
+    cap. At most max_buckets buckets are kept, evicting the least recently used.
+    """
+    def __init__(self, limits=None, max_concurrent=None, clock=time.monotonic, max_buckets=MAX_BUCKETS):
+        self.limits = dict(limits or {})
+        self.max_concurrent = max_concurrent
+        self.clock = clock
+        self.max_buckets = max_buckets
+        self.lock = threading.Lock()
+        self._buckets = collections.OrderedDict()   # (caller, method) -> TokenBucket, least recently used first
+        self._active = {}    # caller -> calls in progress
+        self._checks = 0
+
+    def acquire(self, caller, method, concurrent=True):
+        """
+        Admits or refuses one call. Returns None when admitted (and, if concurrent,
+        release(caller) must follow), else (reason, retry_after_secs) where reason
+        is "rate" or "concurrency".
+        """
+        now = self.clock()
+        with self.lock:
+            self._checks += 1
+            if self._checks % 1000 == 0:
+                self._prune(now)
+
+            limit = self.limits.get(method, self.limits.get("*"))
+            if limit is not None:
+                key = (caller, method)
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    while len(self._buckets) >= self.max_buckets:
+                        self._buckets.popitem(last=False)
+                    bucket = self._buckets[key] = TokenBucket(limit[0], limit[1], now)
+                else:
+                    self._buckets.move_to_end(key)
+                wait = bucket.take(now)
+                if wait > 0:
+                    return "rate", wait
+
+            if concurrent:
+                active = self._active.get(caller, 0)
+                if self.max_concurrent is not None and active >= self.max_concurrent:
+                    return "concurrency", CONCURRENCY_RETRY_SECS
+                self._active[caller] = active + 1
+        return None
+
+    def release(self, caller):
+        with self.lock:
+            active = self._active.get(caller, 0) - 1
+            if active > 0:
+                self._active[caller] = active
+            else:
+                self._active.pop(caller, None)
+
+    def _prune(self, now):
+        # a bucket that has refilled is the same as a fresh one, so it can go
+        for key in [k for k, b in self._buckets.items() if b.idle_full(now)]:
+            del self._buckets[key]
+
+
+def _caller(request, context, sessions):
+    """
+    The user a valid auth token belongs to, else the peer address. Tokens are checked
+    first, so a client cannot get a fresh bucket per call by sending made-up ones.
+    """
+    token = getattr(request, "auth_token", "")
+    username = sessions.get(token) if token and sessions is not None else None
+    return ("user", username) if username is not None else context.peer()
+
+
+def _refusal(method, reason, retry_after):
+    retry_ms = max(1, int(retry_after * 1000 + 0.5))
+    if reason == "rate":
+        details = f"Rate limit exceeded for {method}, retry in {retry_ms} ms"
+    else:
+        details = f"Too many concurrent calls, retry in {retry_ms} ms"
+    return ((RETRY_AFTER_KEY, str(retry_ms)),), details
+
+
+class RateLimitInterceptor(grpc.ServerInterceptor):
+    """
+    Applies a RateLimiter to the threaded server. Refused calls end with
+    RESOURCE_EXHAUSTED and a retry-after-ms trailer, and are counted as throttled
+    in the metrics registry if one is given. Server-streaming calls (Subscribe) are
+    rate limited but not held against the concurrency cap, since they stay open.
+    Auth tokens are resolved against sessions; without it every call counts by peer.
+    """
+    def __init__(self, limiter, metrics=None, sessions=None):
+        self.limiter = limiter
+        self.metrics = metrics
+        self.sessions = sessions
+
+    def _refuse(self, method, refusal, context):
+        if self.metrics is not None:
+            self.metrics.call_throttled(method)
+        trailers, details = _refusal(method, *refusal)
+        context.set_trailing_metadata(trailers)
+        context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, details)
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        limiter = self.limiter
+
+        if handler.unary_unary or handler.stream_unary:
+            original = handler.unary_unary or handler.stream_unary
+            streaming_request = handler.stream_unary is not None
+
+            def behavior(request, context):
+                caller = context.peer() if streaming_request else _caller(request, context, self.sessions)
+                refusal = limiter.acquire(caller, method)
+                if refusal is not None:
+                    self._refuse(method, refusal, context)
+                try:
+                    return original(request, context)
+                finally:
+                    limiter.release(caller)
+
+            if streaming_request:
+                return grpc.stream_unary_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+            return grpc.unary_unary_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+
+        if handler.unary_stream:
+            original = handler.unary_stream
+
+            def behavior(request, context):
+                refusal = limiter.acquire(_caller(request, context, self.sessions), method, concurrent=False)
+                if refusal is not None:
+                    self._refuse(method, refusal, context)
+                yield from original(request, context)
+
+            return grpc.unary_stream_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+        return handler
+
+
+class AioRateLimitInterceptor(grpc.aio.ServerInterceptor):
+    """RateLimitInterceptor for the grpc.aio server."""
+    def __init__(self, limiter, metrics=None, sessions=None):
+        self.limiter = limiter
+        self.metrics = metrics
+        self.sessions = sessions
+
+    async def _refuse(self, method, refusal, context):
+        if self.metrics is not None:
+            self.metrics.call_throttled(method)
+        trailers, details = _refusal(method, *refusal)
+        context.set_trailing_metadata(trailers)
+        await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, details)
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        limiter = self.limiter
+
+        if handler.unary_unary or handler.stream_unary:
+            original = handler.unary_unary or handler.stream_unary
+            streaming_request = handler.stream_unary is not None
+
+            async def behavior(request, context):
+                caller = context.peer() if streaming_request else _caller(request, context, self.sessions)
+                refusal = limiter.acquire(caller, method)
+                if refusal is not None:
+                    await self._refuse(method, refusal, context)
+                try:
+                    return await original(request, context)
+                finally:
+                    limiter.release(caller)
+
+            if streaming_request:
+                return grpc.stream_unary_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+            return grpc.unary_unary_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+
+        if handler.unary_stream:
+            original = handler.unary_stream
+
+            async def behavior(request, context):
+                refusal = limiter.acquire(_caller(request, context, self.sessions), method, concurrent=False)
+                if refusal is not None:
+                    await self._refuse(method, refusal, context)
+                async for response in original(request, context):
+                    yield response
+
+            return grpc.unary_stream_rpc_method_handler(behavior, handler.request_deserializer, handler.response_serializer)
+        return handler
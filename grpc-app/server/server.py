@@ -1,19 +1,67 @@
 import grpc
 from concurrent import futures
-from multiprocessing import Manager
-import secrets
+import argparse
+import multiprocessing
+import signal
 
 from database import Database  # ✅ Import your database class
+from sessions import SessionStore, SignedTokenStore, SqliteSessionStore, load_or_create_secret
+from subscriptions import SubscriptionHub, TailedSubscriptionHub
+from metrics import LATENCY_BUCKETS_MS, MetricsInterceptor, MetricsRegistry
+from ratelimit import RateLimiter, RateLimitInterceptor, parse_limit
+from compression import ALGORITHMS, DEFAULT_MIN_BYTES, CompressionInterceptor, CompressionPolicy
 
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import chat_service_pb2
 import chat_service_pb2_grpc
 
+# SendMessages validates recipients and commits this many messages at a time
+BULK_CHUNK_SIZE = 500
+# long-running handlers read or delete this many rows between cancellation checks
+CANCEL_CHECK_ROWS = 500
+# Clients keep their one connection open with keepalive pings (client.py sends one
+# every 30 s, even when idle); without these the server answers them with GOAWAY.
+KEEPALIVE_OPTIONS = [
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_ping_interval_without_data_ms", 10000),
+]
+# most messages one GetMessages call returns
+MAX_GET_MESSAGES = 100
+# most sub-calls one Batch may carry; the whole batch holds the database while it runs
+MAX_BATCH_CALLS = 20
+# Batch sub-call -> (handler, response type it is returned as)
+BATCH_CALLS = {
+    "count_unread": ("CountUnread", chat_service_pb2.CountUnreadResponse),
+    "list_messages": ("ListMessages", chat_service_pb2.ListMessagesResponse),
+    "fetch_away_msgs": ("FetchAwayMsgs", chat_service_pb2.ListMessagesResponse),
+    "list_accounts": ("ListAccounts", chat_service_pb2.ListAccountsResponse),
+    "delete_messages": ("DeleteMessages", chat_service_pb2.DeleteMessagesResponse),
+    "get_messages": ("GetMessages", chat_service_pb2.ListMessagesResponse),
+}
+
+
 class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
-    def __init__(self, db, logged_in_users):
+    def __init__(self, db, logged_in_users, subscribers=None, metrics=None):
         self.db = db 
         self.logged_in_users = logged_in_users
+        self.subscribers = subscribers if subscribers is not None else SubscriptionHub()
+        self.metrics = metrics
+
+    def _abandon_if_gone(self, context, method):
+        """
+        Aborts the RPC when the client has cancelled or its deadline has passed,
+        so no further queries run for a response nobody will read.
+        """
+        remaining = context.time_remaining()
+        expired = remaining is not None and remaining <= 0
+        if context.is_active() and not expired:
+            return
+        if self.metrics is not None:
+            self.metrics.call_abandoned(method)
+        if expired:
+            context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, f"{method} abandoned: deadline exceeded")
+        context.abort(grpc.StatusCode.CANCELLED, f"{method} abandoned: client cancelled")
 
     def Signup(self, request, context):
         """Handles user signup requests."""
@@ -41,13 +89,6 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
         if not username or not password:
             return chat_service_pb2.GenericResponse(status="error", msg="Username and password are required")
         
-        # user already logged in by any client
-        # handle this by logging out the old client with their auth token and given a new one (#mog)
-        for tok, logged_in_username in self.logged_in_users.items():
-            if logged_in_username == username:
-                del self.logged_in_users[tok]
-                break
-        
         # we cant check if the client is logged in as someone else
         # the auth_token they are using deifnes who they are logged in as
         # they could use two auth tokens in two messages and act like 2 users.
@@ -64,8 +105,11 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
             return chat_service_pb2.GenericResponse(status="error", msg="Incorrect password")
         
         # get an auth token
-        auth_token = secrets.token_hex(16)
-        self.logged_in_users[auth_token] = username
+        # user already logged in by any client
+        # create() logs out the old client's auth token and gives a new one (#mog)
+        # only done once the password checks out, so a failed login changes nothing
+        auth_token = self.logged_in_users.create(username)
+        self.subscribers.close_user(username)
         
         # get the unread count
         rows = self.db.execute("""SELECT COUNT(*) FROM messages WHERE recipient=? AND to_deliver=0""", (username,), commit=True)
@@ -78,20 +122,21 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
     def Logout(self, request, context):
         """Handles user logout."""
     
-        if request.auth_token not in self.logged_in_users:
+        username = self.logged_in_users.remove(request.auth_token)
+        if username is None:
             return chat_service_pb2.GenericResponse(status="error", msg="Not logged in")
-        
-        del self.logged_in_users[request.auth_token]
+        self.subscribers.close_user(username)
 
         return chat_service_pb2.GenericResponse(status="ok", msg="You have been logged out.")
     
     def CountUnread(self, request, context):
         """Handles unread message count requests."""
 
-        if request.auth_token not in self.logged_in_users:
+        cur_user = self.logged_in_users.get(request.auth_token)
+        if cur_user is None:
             return chat_service_pb2.GenericResponse(status="error", msg="Not logged in")
 
-        result = self.db.execute(""" SELECT COUNT(*) FROM messages WHERE recipient=? AND to_deliver=0 """, (self.logged_in_users[request.auth_token],), commit=True)
+        result = self.db.execute(""" SELECT COUNT(*) FROM messages WHERE recipient=? AND to_deliver=0 """, (cur_user,), commit=True)
 
         unread_count = result[0][0] if result else 0  # Handle empty result
 
@@ -107,35 +152,115 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
         if not result:
             return chat_service_pb2.GenericResponse(status="error", msg="Recipient not found")
         recipient = result[0][0]
-        delivered_value = 1 if recipient in self.logged_in_users.values() else 0
+        delivered_value = 1 if self.logged_in_users.is_online(recipient) else 0
+        self._abandon_if_gone(context, "SendMessage")
 
-        self.db.execute(""" INSERT INTO messages (sender, recipient, content, to_deliver) VALUES (?, ?, ?, ?) """, (sender, recipient, content, delivered_value), commit=True)
+        msg_id = self.db.insert(""" INSERT INTO messages (sender, recipient, content, to_deliver) VALUES (?, ?, ?, ?) """, (sender, recipient, content, delivered_value))
+        # push it to any open Subscribe stream; it is already stored either way
+        self.subscribers.publish(recipient, chat_service_pb2.ChatMessage(id=msg_id, sender=sender, content=content))
 
         return chat_service_pb2.GenericResponse(status="ok", msg="Message sent")
+
+    def SendMessages(self, request_iterator, context):
+        """Client-streaming bulk send: many SendMessageRequests, one BulkSendResponse."""
+        results, chunk = [], []
+        for request in request_iterator:
+            chunk.append(request)
+            if len(chunk) == BULK_CHUNK_SIZE:
+                self._abandon_if_gone(context, "SendMessages")
+                results.extend(self._send_chunk(chunk, len(results)))
+                chunk = []
+        if chunk:
+            self._abandon_if_gone(context, "SendMessages")
+            results.extend(self._send_chunk(chunk, len(results)))
+        return self._bulk_response(results)
+
+    def _send_chunk(self, requests, offset):
+        """
+        Stores one chunk of a SendMessages stream: a single IN query checks every
+        recipient, and all accepted rows are inserted in one transaction. Returns one
+        SendResult per request, with indexes counted from offset.
+        """
+        senders = {}
+        for request in requests:
+            if request.auth_token not in senders:
+                senders[request.auth_token] = self.logged_in_users.get(request.auth_token)
+
+        recipients = list({r.recipient for r in requests if senders[r.auth_token] is not None})
+        existing = set()
+        if recipients:
+            rows = self.db.execute(f"SELECT username FROM users WHERE username IN ({','.join('?' * len(recipients))})", tuple(recipients))
+            existing = {row[0] for row in rows}
+        online = {recipient: self.logged_in_users.is_online(recipient) for recipient in existing}
+
+        results = [None] * len(requests)
+        accepted, rows = [], []
+        for i, request in enumerate(requests):
+            sender = senders[request.auth_token]
+            if sender is None:
+                results[i] = chat_service_pb2.SendResult(index=offset + i, status="error", msg="Not logged in")
+            elif request.recipient not in existing:
+                results[i] = chat_service_pb2.SendResult(index=offset + i, status="error", msg="Recipient not found")
+            else:
+                accepted.append(i)
+                rows.append((sender, request.recipient, request.content, 1 if online[request.recipient] else 0))
+
+        if rows:
+            ids = self.db.insert_many(""" INSERT INTO messages (sender, recipient, content, to_deliver) VALUES (?, ?, ?, ?) """, rows)
+            for i, msg_id, (sender, recipient, content, _) in zip(accepted, ids, rows):
+                results[i] = chat_service_pb2.SendResult(index=offset + i, status="ok", msg="Message sent", id=msg_id)
+                self.subscribers.publish(recipient, chat_service_pb2.ChatMessage(id=msg_id, sender=sender, content=content))
+        return results
+
+    @staticmethod
+    def _bulk_response(results):
+        sent = sum(1 for r in results if r.status == "ok")
+        failed = len(results) - sent
+        return chat_service_pb2.BulkSendResponse(
+            status="error" if failed and not sent else "ok",
+            msg=f"Sent {sent} of {len(results)} messages",
+            sent_count=sent,
+            failed_count=failed,
+            results=results
+        )
     
     def ListMessages(self, request, context):
         cur_user = self.logged_in_users.get(request.auth_token, -1)
 
-        if request.auth_token not in self.logged_in_users:
+        if cur_user == -1:
             return chat_service_pb2.GenericResponse(status="error", msg="Not logged in")
     
-        # 2) Count how many messages the user has total
-        row = self.db.execute(
-            "SELECT COUNT(*) FROM messages WHERE recipient=?",
-            (cur_user,)
-        )
-        total_count = row[0][0] if row else 0
-
-        # 3) Get just the slice of messages for this page
-        rows = self.db.execute("""SELECT id, sender, content, to_deliver FROM messages WHERE recipient=? ORDER BY id DESC LIMIT ? OFFSET ?""",(cur_user, request.count, request.start))
+        # 2) Count how many messages the user has total (kept up to date by the database)
+        total_count = self.db.message_count(cur_user)
+        self._abandon_if_gone(context, "ListMessages")
+
+        # 3) Get just the slice of messages for this page, plus one row to tell if another page follows.
+        #    With before_id this is an index seek; start is an OFFSET scan, kept for jumping to a page.
+        #    With preview_chars SQLite cuts the content down, so full bodies are never read out.
+        #    Rows are read in batches so a large page stops as soon as the caller is gone.
+        if request.preview_chars > 0:
+            columns, column_params = "id, sender, substr(content, 1, ?), length(content)", (request.preview_chars,)
+        else:
+            columns, column_params = "id, sender, content, length(content)", ()
+        if request.before_id > 0:
+            batches = self.db.select_batches(f"""SELECT {columns} FROM messages WHERE recipient=? AND id<? ORDER BY id DESC LIMIT ?""", column_params + (cur_user, request.before_id, request.count + 1), CANCEL_CHECK_ROWS)
+        else:
+            batches = self.db.select_batches(f"""SELECT {columns} FROM messages WHERE recipient=? ORDER BY id DESC LIMIT ? OFFSET ?""", column_params + (cur_user, request.count + 1, request.start), CANCEL_CHECK_ROWS)
+        rows = []
+        for batch in batches:
+            rows.extend(batch)
+            self._abandon_if_gone(context, "ListMessages")
+        has_more = len(rows) > request.count
+        rows = rows[:request.count]
 
         # 4) Build the repeated ChatMessage
         messages = []
-        for msg_id, sender, content, to_deliver in rows:
+        for msg_id, sender, content, content_length in rows:
             cm = chat_service_pb2.ChatMessage(
                 id=msg_id,
                 sender=sender,
-                content=content
+                content=content,
+                content_length=content_length
             )
             messages.append(cm)
 
@@ -143,18 +268,39 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
             status="ok",
             msg="Messages retrieved successfully",
             messages=messages,
-            total_count=total_count
+            total_count=total_count,
+            next_before_id=rows[-1][0] if has_more and rows else 0
+        )
+
+    def GetMessages(self, request, context):
+        """Full content of the requested messages from the caller's inbox, newest first; unknown ids are skipped."""
+        cur_user = self.logged_in_users.get(request.auth_token)
+        if cur_user is None:
+            return chat_service_pb2.ListMessagesResponse(status="error", msg="Not logged in")
+        if len(request.ids) > MAX_GET_MESSAGES:
+            return chat_service_pb2.ListMessagesResponse(status="error", msg=f"At most {MAX_GET_MESSAGES} messages per call")
+
+        ids = list(set(request.ids))
+        rows = []
+        if ids:
+            rows = self.db.execute(f"""SELECT id, sender, content FROM messages WHERE recipient=? AND id IN ({','.join('?' * len(ids))}) ORDER BY id DESC""", (cur_user, *ids))
+        return chat_service_pb2.ListMessagesResponse(
+            status="ok",
+            msg="Messages retrieved successfully",
+            messages=[chat_service_pb2.ChatMessage(id=msg_id, sender=sender, content=content, content_length=len(content)) for msg_id, sender, content in rows]
         )
 
     def FetchAwayMsgs(self, request, context):
         cur_user = self.logged_in_users.get(request.auth_token, -1)
-        if request.auth_token not in self.logged_in_users:
+        if cur_user == -1:
             return chat_service_pb2.GenericResponse(status="error", msg="Not logged in")
         
         # the CLIENT SIDE MUST VERIFY IF NO LIMIT SET. IM ASSUMING THIS IS SET. JOSEPH.
 
         # Find messages that have not been delivered yet
         rows = self.db.execute("""SELECT id, sender, content FROM messages WHERE recipient=? AND to_deliver=0 ORDER BY id ASC LIMIT ?""", (cur_user, request.limit), commit=True)
+        # a caller that is gone would never see them, so leave them undelivered
+        self._abandon_if_gone(context, "FetchAwayMsgs")
         if rows:
             self.db.execute("""UPDATE messages SET to_deliver=1 WHERE id IN ({})""".format(','.join('?' * len(rows))), tuple(row[0] for row in rows), commit=True)
 
@@ -171,6 +317,7 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
             return chat_service_pb2.GenericResponse(status="error", msg="Not logged in")
         
         sql_pattern = f"%{pattern}%"  # SQL pattern for LIKE queries
+        self._abandon_if_gone(context, "ListAccounts")
         rows = self.db.execute("SELECT id, username FROM users WHERE username LIKE ? LIMIT ? OFFSET ?", (sql_pattern, count, start), commit=True)
 
         # Convert rows to UserRecord messages
@@ -182,25 +329,28 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
         return chat_service_pb2.ListAccountsResponse(status="ok", msg="Accounts retrieved successfully", users=user_records)
 
     def DeleteMessages(self, request, context):
-        auth_token = request.auth_token
-        if auth_token not in self.logged_in_users:
+        cur_user = self.logged_in_users.get(request.auth_token)
+        if cur_user is None:
             return chat_service_pb2.GenericResponse(status="error", msg="Not logged in")
         
         placeholders = ','.join(['?' for _ in request.message_ids_to_delete])
         
-        self.db.execute(f"DELETE FROM messages WHERE recipient=? AND id IN ({placeholders})", [self.logged_in_users[auth_token]] + list(request.message_ids_to_delete), commit=True)
+        self.db.execute(f"DELETE FROM messages WHERE recipient=? AND id IN ({placeholders})", [cur_user] + list(request.message_ids_to_delete), commit=True)
 
         return chat_service_pb2.DeleteMessagesResponse(status="ok", msg="Messages deleted successfully", deleted_count=len(request.message_ids_to_delete))
         
     def DeleteAccount(self, request, context):
-        auth_token = request.auth_token
-        if auth_token not in self.logged_in_users:
+        username = self.logged_in_users.get(request.auth_token)
+        if username is None:
             return chat_service_pb2.GenericResponse(status="error", msg="Not logged in")
             
-        username = self.logged_in_users[auth_token]
-        self.db.execute("DELETE FROM messages WHERE sender=? OR recipient=?", (username, username), commit=True)
+        # Messages go in committed batches so a cancelled call stops part way; the account
+        # itself is only removed once they are all gone, so a retry finishes the job.
+        for _ in self.db.delete_batches("messages", "sender=? OR recipient=?", (username, username), CANCEL_CHECK_ROWS):
+            self._abandon_if_gone(context, "DeleteAccount")
         self.db.execute("DELETE FROM users WHERE username=?", (username,), commit=True)
-        del self.logged_in_users[auth_token]
+        self.logged_in_users.remove_user(username)
+        self.subscribers.close_user(username)
 
         return chat_service_pb2.GenericResponse(status="ok", msg="Account deleted successfully")
 
@@ -211,23 +361,185 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
         
         self.db.execute("DROP TABLE IF EXISTS users", commit=True)
         self.db.execute("DROP TABLE IF EXISTS messages", commit=True)
+        self.db.execute("DROP TABLE IF EXISTS message_counts", commit=True)
         self.db._init_db()  # Reuse the initialization function
 
         return chat_service_pb2.GenericResponse(status="ok", msg="Database reset successfully")
 
+    def Stats(self, request, context):
+        """Returns the metrics the interceptor has collected since startup."""
+        if request.auth_token not in self.logged_in_users:
+            return chat_service_pb2.StatsResponse(status="error", msg="Not logged in")
+        if self.metrics is None:
+            return chat_service_pb2.StatsResponse(status="error", msg="Metrics are not enabled")
 
-def serve():
-    db = Database("chat.db")
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    # we use a thread safe, but shared dictionary of auth-tokens->usernames
+        uptime, methods = self.metrics.snapshot()
+        return chat_service_pb2.StatsResponse(
+            status="ok",
+            msg="Stats retrieved successfully",
+            uptime_secs=uptime,
+            latency_buckets_ms=LATENCY_BUCKETS_MS,
+            methods=[chat_service_pb2.MethodStats(method=name, **counters) for name, counters in methods.items()]
+        )
+
+    def Batch(self, request, context):
+        """
+        Runs several calls in order inside one database transaction, so they all see
+        the same snapshot, and returns their responses together. A failed call only
+        fails its own result; a cancelled batch rolls back whatever it had changed.
+        """
+        if len(request.calls) > MAX_BATCH_CALLS:
+            return chat_service_pb2.BatchResponse(status="error", msg=f"At most {MAX_BATCH_CALLS} calls per batch")
+
+        kinds = [call.WhichOneof("call") for call in request.calls]
+        if None in kinds:
+            return chat_service_pb2.BatchResponse(status="error", msg=f"Batch call {kinds.index(None)} is empty")
+
+        results = []
+        with self.db.transaction():
+            for call, kind in zip(request.calls, kinds):
+                sub_request = getattr(call, kind)
+                if not sub_request.auth_token:
+                    sub_request.auth_token = request.auth_token
+                handler, response_type = BATCH_CALLS[kind]
+                response = getattr(self, handler)(sub_request, context)
+                if not isinstance(response, response_type):
+                    # errors come back as a GenericResponse, whose fields every response type shares
+                    response = response_type.FromString(response.SerializeToString())
+                results.append(chat_service_pb2.BatchResult(**{kind: response}))
+
+        return chat_service_pb2.BatchResponse(status="ok", msg=f"Ran {len(results)} calls", results=results)
+
+    def Subscribe(self, request, context):
+        """Streams messages sent to the caller as they arrive, until logout or cancel."""
+        username = self.logged_in_users.get(request.auth_token)
+        if username is None:
+            context.abort(grpc.StatusCode.UNAUTHENTICATED, "Not logged in")
+
+        q = self.subscribers.subscribe(username)
+        # wakes the loop below when the client goes away
+        context.add_callback(lambda: self.subscribers.unsubscribe(username, q))
+        try:
+            while True:
+                message = q.get()
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.subscribers.unsubscribe(username, q)
+
+
+def chat_message(msg_id, sender, content):
+    return chat_service_pb2.ChatMessage(id=msg_id, sender=sender, content=content)
+
+
+def session_store(tokens="session", session_ttl=None, shared=False, token_key="token.key"):
+    if tokens == "signed":
+        # HMAC-signed tokens checked locally; only revocations touch the database
+        return SignedTokenStore(load_or_create_secret(token_key), "chat.db", ttl_secs=session_ttl)
+    if shared:
+        return SqliteSessionStore("chat.db", ttl_secs=session_ttl)
+    # an in-process, lock-protected store of auth-tokens->usernames shared by the worker threads
+    return SessionStore(ttl_secs=session_ttl)
+
+
+def serve(session_ttl=None, max_workers=100, port=50051, rate_limits=None, max_concurrent=None, shared=False,
+          tokens="session", token_key="token.key", compression="none", compression_min_bytes=DEFAULT_MIN_BYTES):
+    db = Database("chat.db", wal=shared)
+    sessions = session_store(tokens, session_ttl, shared, token_key)
+    options = list(KEEPALIVE_OPTIONS)
+    if shared:
+        # one of several worker processes on the same port: each tails the messages
+        # table to feed its own Subscribe streams
+        subscribers = TailedSubscriptionHub("chat.db", sessions, chat_message)
+        options.append(("grpc.so_reuseport", 1))
+    else:
+        subscribers = SubscriptionHub()
+    metrics = MetricsRegistry()
+    interceptors = [MetricsInterceptor(metrics)]
+    if rate_limits or max_concurrent:
+        # inside the metrics interceptor, so refused calls still show up with their status
+        interceptors.append(RateLimitInterceptor(RateLimiter(rate_limits, max_concurrent), metrics, sessions))
+    policy = CompressionPolicy(compression, compression_min_bytes)
+    if policy.enabled:
+        interceptors.append(CompressionInterceptor(policy))
+    # every open Subscribe stream holds a worker thread, so leave room for them
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers), interceptors=interceptors, options=options)
     chat_service_pb2_grpc.add_ChatServiceServicer_to_server(
-        ChatServiceServicer(db=db, logged_in_users=Manager().dict()),
+        ChatServiceServicer(db=db, logged_in_users=sessions, subscribers=subscribers, metrics=metrics),
         server
     )
-    server.add_insecure_port("[::]:50051")
-    print("Starting gRPC server on port 50051...")
+    server.add_insecure_port(f"[::]:{port}")
+    print(f"Starting gRPC server on port {port}{f' (worker {os.getpid()})' if shared else ''}...")
     server.start()
     server.wait_for_termination()
 
+
+def _run_worker(server_kind, kwargs):
+    if server_kind == "aio":
+        import asyncio
+        from aio_server import serve_aio
+        asyncio.run(serve_aio(shared=True, **kwargs))
+    else:
+        serve(shared=True, **kwargs)
+
+
+def serve_workers(workers, server_kind="threaded", **kwargs):
+    """
+    Runs `workers` server processes that all bind the same port with SO_REUSEPORT,
+    so the kernel spreads connections over them and each has its own GIL.
+    """
+    # create the schema once up front rather than from every worker at the same moment
+    Database("chat.db", wal=True).conn.close()
+    session_store(kwargs.get("tokens", "session"), shared=True, token_key=kwargs.get("token_key", "token.key")).conn.close()
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_run_worker, args=(server_kind, kwargs), name=f"chat-worker-{i}") for i in range(workers)]
+    for proc in procs:
+        proc.start()
+
+    def stop(signum, frame):
+        for proc in procs:
+            proc.terminate()
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.terminate()
+
 if __name__ == "__main__":
-    serve()
+    parser = argparse.ArgumentParser(description="Start the gRPC chat server.")
+    parser.add_argument("--port", type=int, default=50051, help="Port to listen on (default: 50051)")
+    parser.add_argument("--session-ttl", type=float, default=None, help="Expire auth tokens unused for this many seconds (default: never)")
+    parser.add_argument("--server", type=str, choices=["threaded", "aio"], default="threaded", help="Thread pool server or grpc.aio event loop server (default: threaded)")
+    parser.add_argument("--max-workers", type=int, default=100, help="Threaded server: worker threads; each open Subscribe stream uses one (default: 100)")
+    parser.add_argument("--db-workers", type=int, default=4, help="aio server: threads that run database calls (default: 4)")
+    parser.add_argument("--rate-limit", type=parse_limit, action="append", default=[], metavar="METHOD=RATE[/BURST]",
+                        help="Per-caller token bucket for a method, or * for all others; repeatable (default: none)")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="Calls one caller may have in progress at once (default: no cap)")
+    parser.add_argument("--workers", type=int, default=1, help="Server processes sharing the port via SO_REUSEPORT (default: 1)")
+    parser.add_argument("--tokens", type=str, choices=["session", "signed"], default="session",
+                        help="Auth tokens kept in a session table, or stateless HMAC-signed tokens (default: session)")
+    parser.add_argument("--token-key", type=str, default="token.key", help="Signing key file for --tokens signed, created if missing (default: token.key)")
+    parser.add_argument("--compression", type=str, choices=sorted(ALGORITHMS), default="none",
+                        help="Compress responses with this algorithm (default: none)")
+    parser.add_argument("--compression-min-bytes", type=int, default=DEFAULT_MIN_BYTES,
+                        help=f"Only compress responses at least this large when serialized (default: {DEFAULT_MIN_BYTES})")
+    args = parser.parse_args()
+    kwargs = dict(session_ttl=args.session_ttl, port=args.port, rate_limits=dict(args.rate_limit), max_concurrent=args.max_concurrent,
+                  tokens=args.tokens, token_key=args.token_key, compression=args.compression, compression_min_bytes=args.compression_min_bytes)
+    if args.server == "aio":
+        kwargs["db_workers"] = args.db_workers
+    else:
+        kwargs["max_workers"] = args.max_workers
+
+    if args.workers > 1:
+        serve_workers(args.workers, args.server, **kwargs)
+    elif args.server == "aio":
+        import asyncio
+        from aio_server import serve_aio
+        asyncio.run(serve_aio(**kwargs))
+    else:
+        serve(**kwargs)
@@ -0,0 +1,482 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import struct
+import threading
+import time
+
+
+class SessionStore:
+    """
+    In-process auth token store, shared by the servicer's worker threads.
+
+    Keeps two indexes under one lock: token -> [username, expires_at] and
+    username -> {tokens}, so token checks and "is this user online" are both O(1)
+    dictionary lookups instead of scans. With ttl_secs set, a session expires after
+    that long without being used; every successful lookup pushes the expiry back.
+
+    It behaves like the dict the servicer used before (`in`, `get`, `[]`, `del`),
+    so handlers that only check a token need no changes.
+    """
+    def __init__(self, ttl_secs=None):
+        self.ttl_secs = ttl_secs
+        self.lock = threading.Lock()
+        self._tokens = {}   # token -> [username, expires_at or None]
+        self._users = {}    # username -> set of tokens
+
+    def _expiry(self):
+        return time.monotonic() + self.ttl_secs if self.ttl_secs else None
+
+    def _lookup(self, token):
+        """Returns the username for a live token, dropping it if expired. Caller holds the lock."""
+        entry = self._tokens.get(token)
+        if entry is None:
+            return None
+        if entry[1] is not None:
+            now = time.monotonic()
+            if entry[1] <= now:
+                self._drop(token)
+                return None
+            entry[1] = now + self.ttl_secs
+        return entry[0]
+
+    def _drop(self, token):
+        entry = self._tokens.pop(token, None)
+        if entry is None:
+            return None
+        tokens = self._users.get(entry[0])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._users[entry[0]]
+        return entry[0]
+
+    def create(self, username, replace_existing=True):
+        """Issues a new token for username. By default, older sessions of that user are ended."""
+        token = secrets.token_hex(16)
+        with self.lock:
+            if replace_existing:
+                for old in list(self._users.get(username, ())):
+                    self._drop(old)
+            self._tokens[token] = [username, self._expiry()]
+            self._users.setdefault(username, set()).add(token)
+        return token
+
+    def get(self, token, default=None):
+        with self.lock:
+            username = self._lookup(token)
+        return default if username is None else username
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def __getitem__(self, token):
+        username = self.get(token)
+        if username is None:
+            raise KeyError(token)
+        return username
+
+    def __delitem__(self, token):
+        with self.lock:
+            if self._drop(token) is None:
+                raise KeyError(token)
+
+    def remove(self, token):
+        """Ends one session; returns its username or None."""
+        with self.lock:
+            return self._drop(token)
+
+    def remove_user(self, username):
+        """Ends every session of username; returns how many there were."""
+        with self.lock:
+            tokens = list(self._users.get(username, ()))
+            for token in tokens:
+                self._drop(token)
+        return len(tokens)
+
+    def is_online(self, username):
+        with self.lock:
+            if not self.ttl_secs:
+                return username in self._users
+            # With expiry, only count a user whose sessions have not lapsed.
+            now = time.monotonic()
+            return any(self._tokens[t][1] > now for t in self._users.get(username, ()))
+
+    def purge_expired(self):
+        """Drops every expired session; returns how many."""
+        if not self.ttl_secs:
+            return 0
+        now = time.monotonic()
+        with self.lock:
+            expired = [t for t, (_, expires_at) in self._tokens.items() if expires_at <= now]
+            for token in expired:
+                self._drop(token)
+        return len(expired)
+
+    def __len__(self):
+        with self.lock:
+            return len(self._tokens)
+
+
+class SqliteSessionStore:
+    """
+    SessionStore kept in a `sessions` table, for a server run as several processes
+    (server.py --workers N): a token issued by one worker is honoured by all of them.
+
+    Same interface and expiry rules as SessionStore. The database is put in WAL mode so
+    the token check every RPC makes never waits on another worker's write. To avoid a
+    write per RPC, a lookup only pushes the expiry back once half the TTL has passed.
+    """
+    def __init__(self, db_name="chat.db", ttl_secs=None):
+        self.ttl_secs = ttl_secs
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_name, check_same_thread=False, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                token TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                expires_at REAL
+            );
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_username ON sessions (username)")
+        self.conn.commit()
+
+    def _expiry(self):
+        return time.time() + self.ttl_secs if self.ttl_secs else None
+
+    def _write(self, query, params=()):
+        with self.lock:
+            c = self.conn.execute(query, params)
+            self.conn.commit()
+            return c.rowcount
+
+    def create(self, username, replace_existing=True):
+        """Issues a new token for username. By default, older sessions of that user are ended."""
+        token = secrets.token_hex(16)
+        with self.lock:
+            if replace_existing:
+                self.conn.execute("DELETE FROM sessions WHERE username=?", (username,))
+            self.conn.execute("INSERT INTO sessions (token, username, expires_at) VALUES (?, ?, ?)", (token, username, self._expiry()))
+            self.conn.commit()
+        return token
+
+    def get(self, token, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT username, expires_at FROM sessions WHERE token=?", (token,)).fetchone()
+        if row is None:
+            return default
+        username, expires_at = row
+        if expires_at is not None:
+            now = time.time()
+            if expires_at <= now:
+                self._write("DELETE FROM sessions WHERE token=?", (token,))
+                return default
+            if expires_at - now < self.ttl_secs / 2:
+                self._write("UPDATE sessions SET expires_at=? WHERE token=?", (now + self.ttl_secs, token))
+        return username
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def __getitem__(self, token):
+        username = self.get(token)
+        if username is None:
+            raise KeyError(token)
+        return username
+
+    def __delitem__(self, token):
+        if self.remove(token) is None:
+            raise KeyError(token)
+
+    def remove(self, token):
+        """Ends one session; returns its username or None."""
+        with self.lock:
+            row = self.conn.execute("SELECT username FROM sessions WHERE token=?", (token,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("DELETE FROM sessions WHERE token=?", (token,))
+            self.conn.commit()
+        return row[0]
+
+    def remove_user(self, username):
+        """Ends every session of username; returns how many there were."""
+        return self._write("DELETE FROM sessions WHERE username=?", (username,))
+
+    def is_online(self, username):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM sessions WHERE username=? AND (expires_at IS NULL OR expires_at > ?) LIMIT 1",
+                (username, time.time())
+            ).fetchone()
+        return row is not None
+
+    def purge_expired(self):
+        """Drops every expired session; returns how many."""
+        if not self.ttl_secs:
+            return 0
+        return self._write("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+# Signed tokens cannot slide their expiry, so they always carry one.
+DEFAULT_SIGNED_TTL = 24 * 3600
+_SIGNED_HEADER = struct.Struct("!QQ6s")   # issued_us, expires_ms, nonce
+
+
+def load_or_create_secret(path):
+    """Reads the token signing key, creating a random one (mode 0600) the first time."""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(path, "rb") as f:
+            return f.read()
+    secret = secrets.token_bytes(32)
+    with os.fdopen(fd, "wb") as f:
+        f.write(secret)
+    return secret
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class SignedTokenStore:
+    """
+    Stateless auth tokens: Login hands out base64url(issued, expiry, nonce, username)
+    plus a truncated HMAC-SHA256 of it, and every RPC checks the signature and expiry
+    locally, with no session table. Tokens stay valid across restarts and across
+    --workers processes as long as they share the key file.
+
+    Logout and account deletion go into a small revocation list: single tokens by
+    nonce, or every token of a user issued before a cutoff (which is also how a new
+    login ends older ones). Each user keeps one cutoff, and a new one also replaces
+    the single revocations it covers, so the list holds at most a cutoff plus the
+    logouts since per user. Entries go once the tokens they revoke have expired.
+    Revocations are written to the `revoked_tokens` table and each process re-reads
+    new rows at most once a second, so a revocation reaches the other workers within
+    about a second and survives a restart.
+
+    is_online() can only know about users this process has seen: a user counts as
+    online here once one of their tokens has been verified here, until it is revoked
+    or expires.
+    """
+    SIGNATURE_BYTES = 16
+    REFRESH_SECS = 1.0
+    PURGE_SECS = 60.0   # how often revocations of expired tokens are dropped
+
+    def __init__(self, secret, db_name="chat.db", ttl_secs=None):
+        self._mac = hmac.new(secret, digestmod=hashlib.sha256)   # keyed once, copied per token
+        self.ttl_secs = ttl_secs or DEFAULT_SIGNED_TTL
+        self.lock = threading.Lock()
+        self._revoked_nonces = {}   # username -> {nonce: (issued_us, expires_ms)}
+        self._cutoffs = {}          # username -> (before_us, expires_ms): tokens issued before before_us are revoked
+        self._online = {}           # username -> (issued_us, expires_ms, nonce) of the latest token seen here
+        self._last_stamp = 0
+        self.conn = sqlite3.connect(db_name, check_same_thread=False, timeout=10)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS revoked_tokens (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                nonce BLOB,
+                issued_us INTEGER,
+                before_us INTEGER,
+                expires_ms INTEGER NOT NULL
+            );
+        """)
+        if "issued_us" not in [row[1] for row in self.conn.execute("PRAGMA table_info(revoked_tokens)")]:
+            self.conn.execute("ALTER TABLE revoked_tokens ADD COLUMN issued_us INTEGER")
+        self.conn.commit()
+        self._last_revocation = 0
+        self._next_refresh = 0.0
+        self._next_purge = 0.0
+        self._refresh(force=True)
+
+    def _stamp(self):
+        """Wall-clock microseconds, strictly increasing within this process."""
+        with self.lock:
+            self._last_stamp = max(time.time_ns() // 1000, self._last_stamp + 1)
+            return self._last_stamp
+
+    def _sign(self, payload):
+        mac = self._mac.copy()
+        mac.update(payload)
+        return mac.digest()[:self.SIGNATURE_BYTES]
+
+    def _decode(self, token):
+        """Returns (username, issued_us, expires_ms, nonce) for a well-signed token, else None."""
+        try:
+            body, _, signature = token.partition(".")
+            payload = _b64decode(body)
+            if not hmac.compare_digest(_b64decode(signature), self._sign(payload)):
+                return None
+            issued_us, expires_ms, nonce = _SIGNED_HEADER.unpack_from(payload)
+            username = payload[_SIGNED_HEADER.size:].decode("utf-8")
+        except (ValueError, struct.error, UnicodeDecodeError):
+            return None
+        return username, issued_us, expires_ms, nonce
+
+    def _refresh(self, force=False):
+        """
+        Pulls revocations other processes have written since the last look, and every
+        PURGE_SECS drops the ones whose tokens have expired.
+        """
+        now = time.monotonic()
+        if not force and now < self._next_refresh:
+            return
+        self._next_refresh = now + self.REFRESH_SECS
+        if now >= self._next_purge:
+            self._next_purge = now + self.PURGE_SECS
+            self.purge_expired()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, username, nonce, issued_us, before_us, expires_ms FROM revoked_tokens WHERE id > ? ORDER BY id",
+                (self._last_revocation,)
+            ).fetchall()
+            for row_id, username, nonce, issued_us, before_us, expires_ms in rows:
+                self._last_revocation = row_id
+                self._apply(username, nonce, issued_us, before_us, expires_ms)
+
+    def _apply(self, username, nonce, issued_us, before_us, expires_ms):
+        """Records one revocation in memory; applying it twice is harmless. Caller holds the lock."""
+        latest = self._online.get(username)
+        cutoff = self._cutoffs.get(username, (0, 0))[0]
+        if nonce is not None:
+            nonce = bytes(nonce)
+            if issued_us is None or issued_us >= cutoff:
+                self._revoked_nonces.setdefault(username, {})[nonce] = (issued_us, expires_ms)
+            if latest is not None and latest[2] == nonce:
+                del self._online[username]
+        if before_us is not None and before_us > cutoff:
+            self._cutoffs[username] = (before_us, expires_ms)
+            # single revocations of tokens the cutoff covers are redundant now
+            nonces = self._revoked_nonces.get(username, {})
+            for old in [n for n, (issued, _) in nonces.items() if issued is not None and issued < before_us]:
+                del nonces[old]
+            if not nonces:
+                self._revoked_nonces.pop(username, None)
+            if latest is not None and latest[0] < before_us:
+                self._online.pop(username, None)
+
+    def _revoke(self, username, nonce=None, issued_us=None, before_us=None, expires_ms=None):
+        if expires_ms is None:
+            expires_ms = int((time.time() + self.ttl_secs) * 1000)
+        with self.lock:
+            if before_us is not None:
+                # One cutoff row per user: the new one replaces the last, keeping the later
+                # stamp, along with the single revocations it covers. It is written as a new
+                # row so other processes pick it up.
+                row = self.conn.execute(
+                    "SELECT MAX(before_us), MAX(expires_ms) FROM revoked_tokens WHERE username=? AND nonce IS NULL", (username,)
+                ).fetchone()
+                before_us, expires_ms = max(before_us, row[0] or 0), max(expires_ms, row[1] or 0)
+                self.conn.execute(
+                    "DELETE FROM revoked_tokens WHERE username=? AND (nonce IS NULL OR issued_us < ?)", (username, before_us)
+                )
+            self.conn.execute(
+                "INSERT INTO revoked_tokens (username, nonce, issued_us, before_us, expires_ms) VALUES (?, ?, ?, ?, ?)",
+                (username, nonce, issued_us, before_us, expires_ms)
+            )
+            self.conn.commit()
+            self._apply(username, nonce, issued_us, before_us, expires_ms)
+
+    def create(self, username, replace_existing=True):
+        """Issues a signed token for username. By default, older tokens of that user are revoked."""
+        issued_us = self._stamp()
+        if replace_existing:
+            self._revoke(username, before_us=issued_us)
+        expires_ms = issued_us // 1000 + int(self.ttl_secs * 1000)
+        nonce = secrets.token_bytes(6)
+        payload = _SIGNED_HEADER.pack(issued_us, expires_ms, nonce) + username.encode("utf-8")
+        with self.lock:
+            self._online[username] = (issued_us, expires_ms, nonce)
+        return f"{_b64encode(payload)}.{_b64encode(self._sign(payload))}"
+
+    def _verify(self, token):
+        decoded = self._decode(token)
+        if decoded is None:
+            return None
+        username, issued_us, expires_ms, nonce = decoded
+        if expires_ms <= time.time() * 1000:
+            return None
+        self._refresh()
+        with self.lock:
+            if nonce in self._revoked_nonces.get(username, ()) or issued_us < self._cutoffs.get(username, (0, 0))[0]:
+                return None
+            latest = self._online.get(username)
+            if latest is None or latest[0] <= issued_us:
+                self._online[username] = (issued_us, expires_ms, nonce)
+        return decoded
+
+    def get(self, token, default=None):
+        decoded = self._verify(token)
+        return default if decoded is None else decoded[0]
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def __getitem__(self, token):
+        username = self.get(token)
+        if username is None:
+            raise KeyError(token)
+        return username
+
+    def __delitem__(self, token):
+        if self.remove(token) is None:
+            raise KeyError(token)
+
+    def remove(self, token):
+        """Revokes one token; returns its username or None."""
+        decoded = self._verify(token)
+        if decoded is None:
+            return None
+        username, issued_us, expires_ms, nonce = decoded
+        self._revoke(username, nonce=nonce, issued_us=issued_us, expires_ms=expires_ms)
+        return username
+
+    def remove_user(self, username):
+        """Revokes every token username holds; returns 1 if they were online here, else 0."""
+        with self.lock:
+            was_online = username in self._online
+        self._revoke(username, before_us=self._stamp())
+        return int(was_online)
+
+    def is_online(self, username):
+        self._refresh()
+        with self.lock:
+            latest = self._online.get(username)
+            return latest is not None and latest[1] > time.time() * 1000
+
+    def purge_expired(self):
+        """Forgets revocations of tokens that have expired anyway; returns how many."""
+        now_ms = int(time.time() * 1000)
+        expired = 0
+        with self.lock:
+            for username, nonces in list(self._revoked_nonces.items()):
+                for nonce in [n for n, (_, exp) in nonces.items() if exp <= now_ms]:
+                    del nonces[nonce]
+                    expired += 1
+                if not nonces:
+                    del self._revoked_nonces[username]
+            for username in [u for u, (_, exp) in self._cutoffs.items() if exp <= now_ms]:
+                del self._cutoffs[username]
+            for username in [u for u, (_, exp, _) in self._online.items() if exp <= now_ms]:
+                del self._online[username]
+            self.conn.execute("DELETE FROM revoked_tokens WHERE expires_ms <= ?", (now_ms,))
+            self.conn.commit()
+        return expired
+
+    def __len__(self):
+        """Users with a live token seen by this process."""
+        with self.lock:
+            return len(self._online)
@@ -0,0 +1,147 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+
+
+class SubscriptionHub:
+    """
+    Per-user queues feeding live Subscribe streams.
+
+    SendMessage publishes into every queue the recipient has open; each Subscribe
+    handler blocks on its own queue and yields what arrives. A None in a queue tells
+    the stream to finish (logout, a newer login, account deletion, or the client
+    cancelling). A subscriber that falls more than max_pending messages behind is
+    dropped; it can re-subscribe and page the rest in with ListMessages, since every
+    message is stored before it is published.
+    """
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self._queues = {}   # username -> set of queue.Queue
+
+    def _new_queue(self):
+        return queue.Queue()
+
+    def _put(self, q, item):
+        q.put(item)
+
+    def subscribe(self, username):
+        q = self._new_queue()
+        with self.lock:
+            self._queues.setdefault(username, set()).add(q)
+        return q
+
+    def unsubscribe(self, username, q):
+        """Detaches q and wakes its stream so the handler returns."""
+        with self.lock:
+            queues = self._queues.get(username)
+            if queues is not None:
+                queues.discard(q)
+                if not queues:
+                    del self._queues[username]
+        self._put(q, None)
+
+    def publish(self, username, message):
+        """Queues message for every open stream of username; returns how many it reached."""
+        with self.lock:
+            queues = list(self._queues.get(username, ()))
+        delivered = 0
+        for q in queues:
+            if q.qsize() >= self.max_pending:
+                self.unsubscribe(username, q)
+                continue
+            self._put(q, message)
+            delivered += 1
+        return delivered
+
+    def close_user(self, username):
+        """Ends every stream username has open."""
+        with self.lock:
+            queues = self._queues.pop(username, set())
+        for q in queues:
+            self._put(q, None)
+
+    def is_subscribed(self, username):
+        with self.lock:
+            return username in self._queues
+
+
+class AsyncSubscriptionHub(SubscriptionHub):
+    """
+    SubscriptionHub for the grpc.aio server: streams await an asyncio.Queue, while
+    publish() and close_user() may still be called from the database executor threads.
+    """
+    def __init__(self, loop, max_pending=1000):
+        super().__init__(max_pending=max_pending)
+        self.loop = loop
+
+    def _new_queue(self):
+        return asyncio.Queue()
+
+    def _put(self, q, item):
+        self.loop.call_soon_threadsafe(q.put_nowait, item)
+
+
+class TailedSubscriptionHub(SubscriptionHub):
+    """
+    SubscriptionHub for a server run as several processes (server.py --workers N).
+
+    The worker that stores a message is usually not the one holding the recipient's
+    stream, so publish() from a handler does nothing here. Instead, each worker tails
+    the messages table every `interval` seconds and publishes the new rows to its own
+    streams. Roughly once a second it also ends the streams of users who no longer have
+    a live session, such as users who logged out through another worker.
+    """
+    def __init__(self, db_name, sessions, make_message, interval=0.1, **kwargs):
+        super().__init__(**kwargs)
+        self.sessions = sessions
+        self.make_message = make_message
+        self.interval = interval
+        self.conn = sqlite3.connect(db_name, check_same_thread=False, timeout=10)
+        self.last_id = self._max_id()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._tail, name="message-tail", daemon=True)
+        self._thread.start()
+
+    def _max_id(self):
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0]
+
+    def publish(self, username, message):
+        # delivered by the tail instead, whichever worker stored it
+        return 0
+
+    def _tail(self):
+        next_session_check = time.monotonic() + 1
+        while not self._stop.wait(self.interval):
+            try:
+                rows = self.conn.execute(
+                    "SELECT id, sender, recipient, content FROM messages WHERE id > ? ORDER BY id LIMIT 1000",
+                    (self.last_id,)
+                ).fetchall()
+                if not rows and self._max_id() < self.last_id:
+                    # the table was reset and ids started over
+                    self.last_id = self._max_id()
+            except sqlite3.Error:
+                continue
+            for msg_id, sender, recipient, content in rows:
+                self.last_id = msg_id
+                if self.is_subscribed(recipient):
+                    SubscriptionHub.publish(self, recipient, self.make_message(msg_id, sender, content))
+
+            if time.monotonic() >= next_session_check:
+                next_session_check = time.monotonic() + 1
+                with self.lock:
+                    users = list(self._queues)
+                for username in users:
+                    if not self.sessions.is_online(username):
+                        self.close_user(username)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class AsyncTailedSubscriptionHub(TailedSubscriptionHub, AsyncSubscriptionHub):
+    """TailedSubscriptionHub feeding grpc.aio streams."""
@@ -122,7 +122,7 @@ class SizeMeasuringInterceptor(grpc.UnaryUnaryClientInterceptor):
         return outcome
 
 ###############################################################################
-# Integration test suite covering all 11 RPC methods
+# Integration test suite covering the unary RPC methods
 ###############################################################################
 class TestGrpcMessageSizes(unittest.TestCase):
     @classmethod
@@ -235,9 +235,19 @@ class TestGrpcMessageSizes(unittest.TestCase):
         response = self.measure_integration_bytes("ResetDB", lambda: self.stub.ResetDB(request))
         self.assertIn(response.status, ["ok", "error"])
 
+    def test_12_batch(self):
+        # the three calls of the inbox screen in one round trip, to compare with tests 04, 06 and 07
+        request = chat_service_pb2.BatchRequest(auth_token="FAKE_TOKEN_123", calls=[
+            chat_service_pb2.BatchCall(fetch_away_msgs=chat_service_pb2.FetchAwayMsgsRequest(limit=5)),
+            chat_service_pb2.BatchCall(list_messages=chat_service_pb2.ListMessagesRequest(start=0, count=5)),
+            chat_service_pb2.BatchCall(count_unread=chat_service_pb2.CountUnreadRequest()),
+        ])
+        response = self.measure_integration_bytes("Batch", lambda: self.stub.Batch(request))
+        self.assertEqual(len(response.results), 3)
+
     @classmethod
     def tearDownClass(cls):
-        print("\n=== gRPC Protobuf Payload Measurements (All 11 Methods) ===")
+        print("\n=== gRPC Protobuf Payload Measurements ===")
         for record in cls.size_interceptor.measurements:
             print(
                 f"Method: {record['method']:<20} "
@@ -24,13 +24,15 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12\x63hat_service.proto\x12\x04\x63hat\".\n\x0fGenericResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\"V\n\rLoginResponse\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x0b\n\x03msg\x18\x03 \x01(\t\x12\x14\n\x0cunread_count\x18\x04 \x01(\x05\"H\n\x13\x43ountUnreadResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x14\n\x0cunread_count\x18\x03 \x01(\x05\":\n\x0b\x43hatMessage\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0e\n\x06sender\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\"m\n\x14ListMessagesResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12#\n\x08messages\x18\x03 \x03(\x0b\x32\x11.chat.ChatMessage\x12\x13\n\x0btotal_count\x18\x04 \x01(\x05\"*\n\nUserRecord\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x10\n\x08username\x18\x02 \x01(\t\"T\n\x14ListAccountsResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x1f\n\x05users\x18\x03 \x03(\x0b\x32\x10.chat.UserRecord\"L\n\x16\x44\x65leteMessagesResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x15\n\rdeleted_count\x18\x03 \x01(\x05\"3\n\rSignupRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"2\n\x0cLoginRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"\"\n\x0c\x45mptyRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\"(\n\x12\x43ountUnreadRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\"L\n\x12SendMessageRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\x11\n\trecipient\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\"G\n\x13ListMessagesRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\r\n\x05start\x18\x02 \x01(\x05\x12\r\n\x05\x63ount\x18\x03 \x01(\x05\"9\n\x14\x46\x65tchAwayMsgsRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\"X\n\x13ListAccountsRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\x0f\n\x07pattern\x18\x02 \x01(\t\x12\r\n\x05start\x18\x03 \x01(\x05\x12\r\n\x05\x63ount\x18\x04 \x01(\x05\"J\n\x15\x44\x65leteMessagesRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\x1d\n\x15message_ids_to_delete\x18\x02 \x03(\x05\x32\xbf\x05\n\x0b\x43hatService\x12\x34\n\x06Signup\x12\x13.chat.SignupRequest\x1a\x15.chat.GenericResponse\x12\x30\n\x05Login\x12\x12.chat.LoginRequest\x1a\x13.chat.LoginResponse\x12\x33\n\x06Logout\x12\x12.chat.EmptyRequest\x1a\x15.chat.GenericResponse\x12\x42\n\x0b\x43ountUnread\x12\x18.chat.CountUnreadRequest\x1a\x19.chat.CountUnreadResponse\x12>\n\x0bSendMessage\x12\x18.chat.SendMessageRequest\x1a\x15.chat.GenericResponse\x12\x45\n\x0cListMessages\x12\x19.chat.ListMessagesRequest\x1a\x1a.chat.ListMessagesResponse\x12\x42\n\rFetchAwayMsgs\x12\x1a.chat.FetchAwayMsgsRequest\x1a\x15.chat.GenericResponse\x12\x45\n\x0cListAccounts\x12\x19.chat.ListAccountsRequest\x1a\x1a.chat.ListAccountsResponse\x12K\n\x0e\x44\x65leteMessages\x12\x1b.chat.DeleteMessagesRequest\x1a\x1c.chat.DeleteMessagesResponse\x12:\n\rDeleteAccount\x12\x12.chat.EmptyRequest\x1a\x15.chat.GenericResponse\x12\x34\n\x07ResetDB\x12\x12.chat.EmptyRequest\x1a\x15.chat.GenericResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12\x63hat_service.proto\x12\x04\x63hat\".\n\x0fGenericResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\"V\n\rLoginResponse\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x0b\n\x03msg\x18\x03 \x01(\t\x12\x14\n\x0cunread_count\x18\x04 \x01(\x05\"H\n\x13\x43ountUnreadResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x14\n\x0cunread_count\x18\x03 \x01(\x05\"R\n\x0b\x43hatMessage\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0e\n\x06sender\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12\x16\n\x0e\x63ontent_length\x18\x04 \x01(\x05\"\x85\x01\n\x14ListMessagesResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12#\n\x08messages\x18\x03 \x03(\x0b\x32\x11.chat.ChatMessage\x12\x13\n\x0btotal_count\x18\x04 \x01(\x05\x12\x16\n\x0enext_before_id\x18\x05 \x01(\x05\"*\n\nUserRecord\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x10\n\x08username\x18\x02 \x01(\t\"T\n\x14ListAccountsResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x1f\n\x05users\x18\x03 \x03(\x0b\x32\x10.chat.UserRecord\"L\n\x16\x44\x65leteMessagesResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x15\n\rdeleted_count\x18\x03 \x01(\x05\"D\n\nSendResult\x12\r\n\x05index\x18\x01 \x01(\x05\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x0b\n\x03msg\x18\x03 \x01(\t\x12\n\n\x02id\x18\x04 \x01(\x05\"|\n\x10\x42ulkSendResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x12\n\nsent_count\x18\x03 \x01(\x05\x12\x14\n\x0c\x66\x61iled_count\x18\x04 \x01(\x05\x12!\n\x07results\x18\x05 \x03(\x0b\x32\x10.chat.SendResult\"\xfa\x02\n\x0bMethodStats\x12\x0e\n\x06method\x18\x01 \x01(\t\x12\r\n\x05\x63\x61lls\x18\x02 \x01(\x03\x12\x11\n\tin_flight\x18\x03 \x01(\x05\x12\x15\n\rmax_in_flight\x18\x04 \x01(\x05\x12\x38\n\x0cstatus_codes\x18\x05 \x03(\x0b\x32\".chat.MethodStats.StatusCodesEntry\x12\x16\n\x0elatency_counts\x18\x06 \x03(\x03\x12\x17\n\x0flatency_mean_ms\x18\x07 \x01(\x01\x12\x16\n\x0elatency_p50_ms\x18\x08 \x01(\x01\x12\x16\n\x0elatency_p99_ms\x18\t \x01(\x01\x12\x15\n\rrequest_bytes\x18\n \x01(\x03\x12\x16\n\x0eresponse_bytes\x18\x0b \x01(\x03\x12\x11\n\tabandoned\x18\x0c \x01(\x03\x12\x11\n\tthrottled\x18\r \x01(\x03\x1a\x32\n\x10StatusCodesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x03:\x02\x38\x01\"\x81\x01\n\rStatsResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x13\n\x0buptime_secs\x18\x03 \x01(\x01\x12\x1a\n\x12latency_buckets_ms\x18\x04 \x03(\x01\x12\"\n\x07methods\x18\x05 \x03(\x0b\x32\x11.chat.MethodStats\"\xd8\x02\n\x0b\x42\x61tchResult\x12\x31\n\x0c\x63ount_unread\x18\x01 \x01(\x0b\x32\x19.chat.CountUnreadResponseH\x00\x12\x33\n\rlist_messages\x18\x02 \x01(\x0b\x32\x1a.chat.ListMessagesResponseH\x00\x12\x35\n\x0f\x66\x65tch_away_msgs\x18\x03 \x01(\x0b\x32\x1a.chat.ListMessagesResponseH\x00\x12\x33\n\rlist_accounts\x18\x04 \x01(\x0b\x32\x1a.chat.ListAccountsResponseH\x00\x12\x37\n\x0f\x64\x65lete_messages\x18\x05 \x01(\x0b\x32\x1c.chat.DeleteMessagesResponseH\x00\x12\x32\n\x0cget_messages\x18\x06 \x01(\x0b\x32\x1a.chat.ListMessagesResponseH\x00\x42\x08\n\x06result\"P\n\rBatchResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\"\n\x07results\x18\x03 \x03(\x0b\x32\x11.chat.BatchResult\"3\n\rSignupRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"2\n\x0cLoginRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"\"\n\x0c\x45mptyRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\"(\n\x12\x43ountUnreadRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\"L\n\x12SendMessageRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\x11\n\trecipient\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\"q\n\x13ListMessagesRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\r\n\x05start\x18\x02 \x01(\x05\x12\r\n\x05\x63ount\x18\x03 \x01(\x05\x12\x11\n\tbefore_id\x18\x04 \x01(\x05\x12\x15\n\rpreview_chars\x18\x05 \x01(\x05\"5\n\x12GetMessagesRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\x0b\n\x03ids\x18\x02 \x03(\x05\"9\n\x14\x46\x65tchAwayMsgsRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\"X\n\x13ListAccountsRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\x0f\n\x07pattern\x18\x02 \x01(\t\x12\r\n\x05start\x18\x03 \x01(\x05\x12\r\n\x05\x63ount\x18\x04 \x01(\x05\"J\n\x15\x44\x65leteMessagesRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\x1d\n\x15message_ids_to_delete\x18\x02 \x03(\x05\"\xce\x02\n\tBatchCall\x12\x30\n\x0c\x63ount_unread\x18\x01 \x01(\x0b\x32\x18.chat.CountUnreadRequestH\x00\x12\x32\n\rlist_messages\x18\x02 \x01(\x0b\x32\x19.chat.ListMessagesRequestH\x00\x12\x35\n\x0f\x66\x65tch_away_msgs\x18\x03 \x01(\x0b\x32\x1a.chat.FetchAwayMsgsRequestH\x00\x12\x32\n\rlist_accounts\x18\x04 \x01(\x0b\x32\x19.chat.ListAccountsRequestH\x00\x12\x36\n\x0f\x64\x65lete_messages\x18\x05 \x01(\x0b\x32\x1b.chat.DeleteMessagesRequestH\x00\x12\x30\n\x0cget_messages\x18\x06 \x01(\x0b\x32\x18.chat.GetMessagesRequestH\x00\x42\x06\n\x04\x63\x61ll\"B\n\x0c\x42\x61tchRequest\x12\x12\n\nauth_token\x18\x01 \x01(\t\x12\x1e\n\x05\x63\x61lls\x18\x02 \x03(\x0b\x32\x0f.chat.BatchCall2\xe2\x07\n\x0b\x43hatService\x12\x34\n\x06Signup\x12\x13.chat.SignupRequest\x1a\x15.chat.GenericResponse\x12\x30\n\x05Login\x12\x12.chat.LoginRequest\x1a\x13.chat.LoginResponse\x12\x33\n\x06Logout\x12\x12.chat.EmptyRequest\x1a\x15.chat.GenericResponse\x12\x42\n\x0b\x43ountUnread\x12\x18.chat.CountUnreadRequest\x1a\x19.chat.CountUnreadResponse\x12>\n\x0bSendMessage\x12\x18.chat.SendMessageRequest\x1a\x15.chat.GenericResponse\x12\x45\n\x0cListMessages\x12\x19.chat.ListMessagesRequest\x1a\x1a.chat.ListMessagesResponse\x12\x42\n\rFetchAwayMsgs\x12\x1a.chat.FetchAwayMsgsRequest\x1a\x15.chat.GenericResponse\x12\x45\n\x0cListAccounts\x12\x19.chat.ListAccountsRequest\x1a\x1a.chat.ListAccountsResponse\x12K\n\x0e\x44\x65leteMessages\x12\x1b.chat.DeleteMessagesRequest\x1a\x1c.chat.DeleteMessagesResponse\x12:\n\rDeleteAccount\x12\x12.chat.EmptyRequest\x1a\x15.chat.GenericResponse\x12\x34\n\x07ResetDB\x12\x12.chat.EmptyRequest\x1a\x15.chat.GenericResponse\x12\x34\n\tSubscribe\x12\x12.chat.EmptyRequest\x1a\x11.chat.ChatMessage0\x01\x12\x42\n\x0cSendMessages\x12\x18.chat.SendMessageRequest\x1a\x16.chat.BulkSendResponse(\x01\x12\x30\n\x05Stats\x12\x12.chat.EmptyRequest\x1a\x13.chat.StatsResponse\x12\x30\n\x05\x42\x61tch\x12\x12.chat.BatchRequest\x1a\x13.chat.BatchResponse\x12\x43\n\x0bGetMessages\x12\x18.chat.GetMessagesRequest\x1a\x1a.chat.ListMessagesResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'chat_service_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_METHODSTATS_STATUSCODESENTRY']._loaded_options = None
+  _globals['_METHODSTATS_STATUSCODESENTRY']._serialized_options = b'8\001'
   _globals['_GENERICRESPONSE']._serialized_start=28
   _globals['_GENERICRESPONSE']._serialized_end=74
   _globals['_LOGINRESPONSE']._serialized_start=76
@@ -38,33 +40,53 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_COUNTUNREADRESPONSE']._serialized_start=164
   _globals['_COUNTUNREADRESPONSE']._serialized_end=236
   _globals['_CHATMESSAGE']._serialized_start=238
-  _globals['_CHATMESSAGE']._serialized_end=296
-  _globals['_LISTMESSAGESRESPONSE']._serialized_start=298
-  _globals['_LISTMESSAGESRESPONSE']._serialized_end=407
-  _globals['_USERRECORD']._serialized_start=409
-  _globals['_USERRECORD']._serialized_end=451
-  _globals['_LISTACCOUNTSRESPONSE']._serialized_start=453
-  _globals['_LISTACCOUNTSRESPONSE']._serialized_end=537
-  _globals['_DELETEMESSAGESRESPONSE']._serialized_start=539
-  _globals['_DELETEMESSAGESRESPONSE']._serialized_end=615
-  _globals['_SIGNUPREQUEST']._serialized_start=617
-  _globals['_SIGNUPREQUEST']._serialized_end=668
-  _globals['_LOGINREQUEST']._serialized_start=670
-  _globals['_LOGINREQUEST']._serialized_end=720
-  _globals['_EMPTYREQUEST']._serialized_start=722
-  _globals['_EMPTYREQUEST']._serialized_end=756
-  _globals['_COUNTUNREADREQUEST']._serialized_start=758
-  _globals['_COUNTUNREADREQUEST']._serialized_end=798
-  _globals['_SENDMESSAGEREQUEST']._serialized_start=800
-  _globals['_SENDMESSAGEREQUEST']._serialized_end=876
-  _globals['_LISTMESSAGESREQUEST']._serialized_start=878
-  _globals['_LISTMESSAGESREQUEST']._serialized_end=949
-  _globals['_FETCHAWAYMSGSREQUEST']._serialized_start=951
-  _globals['_FETCHAWAYMSGSREQUEST']._serialized_end=1008
-  _globals['_LISTACCOUNTSREQUEST']._serialized_start=1010
-  _globals['_LISTACCOUNTSREQUEST']._serialized_end=1098
-  _globals['_DELETEMESSAGESREQUEST']._serialized_start=1100
-  _globals['_DELETEMESSAGESREQUEST']._serialized_end=1174
-  _globals['_CHATSERVICE']._serialized_start=1177
-  _globals['_CHATSERVICE']._serialized_end=1880
+  _globals['_CHATMESSAGE']._serialized_end=320
+  _globals['_LISTMESSAGESRESPONSE']._serialized_start=323
+  _globals['_LISTMESSAGESRESPONSE']._serialized_end=456
+  _globals['_USERRECORD']._serialized_start=458
+  _globals['_USERRECORD']._serialized_end=500
+  _globals['_LISTACCOUNTSRESPONSE']._serialized_start=502
+  _globals['_LISTACCOUNTSRESPONSE']._serialized_end=586
+  _globals['_DELETEMESSAGESRESPONSE']._serialized_start=588
+  _globals['_DELETEMESSAGESRESPONSE']._serialized_end=664
+  _globals['_SENDRESULT']._serialized_start=666
+  _globals['_SENDRESULT']._serialized_end=734
+  _globals['_BULKSENDRESPONSE']._serialized_start=736
+  _globals['_BULKSENDRESPONSE']._serialized_end=860
+  _globals['_METHODSTATS']._serialized_start=863
+  _globals['_METHODSTATS']._serialized_end=1241
+  _globals['_METHODSTATS_STATUSCODESENTRY']._serialized_start=1191
+  _globals['_METHODSTATS_STATUSCODESENTRY']._serialized_end=1241
+  _globals['_STATSRESPONSE']._serialized_start=1244
+  _globals['_STATSRESPONSE']._serialized_end=1373
+  _globals['_BATCHRESULT']._serialized_start=1376
+  _globals['_BATCHRESULT']._serialized_end=1720
+  _globals['_BATCHRESPONSE']._serialized_start=1722
+  _globals['_BATCHRESPONSE']._serialized_end=1802
+  _globals['_SIGNUPREQUEST']._serialized_start=1804
+  _globals['_SIGNUPREQUEST']._serialized_end=1855
+  _globals['_LOGINREQUEST']._serialized_start=1857
+  _globals['_LOGINREQUEST']._serialized_end=1907
+  _globals['_EMPTYREQUEST']._serialized_start=1909
+  _globals['_EMPTYREQUEST']._serialized_end=1943
+  _globals['_COUNTUNREADREQUEST']._serialized_start=1945
+  _globals['_COUNTUNREADREQUEST']._serialized_end=1985
+  _globals['_SENDMESSAGEREQUEST']._serialized_start=1987
+  _globals['_SENDMESSAGEREQUEST']._serialized_end=2063
+  _globals['_LISTMESSAGESREQUEST']._serialized_start=2065
+  _globals['_LISTMESSAGESREQUEST']._serialized_end=2178
+  _globals['_GETMESSAGESREQUEST']._serialized_start=2180
+  _globals['_GETMESSAGESREQUEST']._serialized_end=2233
+  _globals['_FETCHAWAYMSGSREQUEST']._serialized_start=2235
+  _globals['_FETCHAWAYMSGSREQUEST']._serialized_end=2292
+  _globals['_LISTACCOUNTSREQUEST']._serialized_start=2294
+  _globals['_LISTACCOUNTSREQUEST']._serialized_end=2382
+  _globals['_DELETEMESSAGESREQUEST']._serialized_start=2384
+  _globals['_DELETEMESSAGESREQUEST']._serialized_end=2458
+  _globals['_BATCHCALL']._serialized_start=2461
+  _globals['_BATCHCALL']._serialized_end=2795
+  _globals['_BATCHREQUEST']._serialized_start=2797
+  _globals['_BATCHREQUEST']._serialized_end=2863
+  _globals['_CHATSERVICE']._serialized_start=2866
+  _globals['_CHATSERVICE']._serialized_end=3860
 # @@protoc_insertion_point(module_scope)
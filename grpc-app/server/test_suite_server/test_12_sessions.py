@@ -0,0 +1,208 @@
+import os
+import tempfile
+import time
+import unittest
+
+import sys
+# The session stores are tested directly, and Login through the servicer without a server.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import chat_service_pb2
+from database import Database
+from server import ChatServiceServicer
+from sessions import SessionStore, SignedTokenStore, SqliteSessionStore, load_or_create_secret
+
+class TestSessionStore(unittest.TestCase):
+    def test_token_and_user_indexes(self):
+        """A token resolves to its user and the user shows as online until logged out."""
+        store = SessionStore()
+        token = store.create("alice")
+        self.assertIn(token, store)
+        self.assertEqual(store[token], "alice")
+        self.assertTrue(store.is_online("alice"))
+        self.assertFalse(store.is_online("bob"))
+
+        self.assertEqual(store.remove(token), "alice")
+        self.assertNotIn(token, store)
+        self.assertFalse(store.is_online("alice"))
+        self.assertEqual(store.get(token, -1), -1)
+
+    def test_new_login_replaces_old_session(self):
+        """Logging in again ends the user's previous session."""
+        store = SessionStore()
+        first = store.create("alice")
+        second = store.create("alice")
+        self.assertNotIn(first, store)
+        self.assertIn(second, store)
+        self.assertEqual(len(store), 1)
+
+    def test_remove_user_ends_all_sessions(self):
+        store = SessionStore()
+        tokens = [store.create("alice", replace_existing=False) for _ in range(3)]
+        other = store.create("bob")
+        self.assertEqual(store.remove_user("alice"), 3)
+        self.assertTrue(all(t not in store for t in tokens))
+        self.assertIn(other, store)
+
+    def test_ttl_expiry(self):
+        """Unused sessions lapse after the TTL; each use pushes the expiry back."""
+        store = SessionStore(ttl_secs=0.2)
+        kept = store.create("alice")
+        dropped = store.create("bob")
+        for _ in range(3):
+            time.sleep(0.1)
+            self.assertEqual(store.get(kept), "alice")
+        self.assertFalse(store.is_online("bob"))
+        self.assertEqual(store.purge_expired(), 1)
+        self.assertNotIn(dropped, store)
+        self.assertTrue(store.is_online("alice"))
+
+class TestSqliteSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "chat.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_sessions_are_shared_between_stores(self):
+        """Two stores on one file stand in for two worker processes."""
+        worker_a, worker_b = SqliteSessionStore(self.path), SqliteSessionStore(self.path)
+        token = worker_a.create("alice")
+        self.assertEqual(worker_b.get(token), "alice")
+        self.assertTrue(worker_b.is_online("alice"))
+
+        second = worker_b.create("alice")
+        self.assertNotIn(token, worker_a, "❌ A login through another worker should end the old session")
+        self.assertEqual(worker_a.remove(second), "alice")
+        self.assertFalse(worker_b.is_online("alice"))
+        self.assertEqual(len(worker_b), 0)
+
+    def test_ttl_expiry(self):
+        store = SqliteSessionStore(self.path, ttl_secs=0.2)
+        kept = store.create("alice")
+        store.create("bob")
+        for _ in range(3):
+            time.sleep(0.1)
+            self.assertEqual(store.get(kept), "alice")
+        self.assertFalse(store.is_online("bob"))
+        self.assertEqual(store.purge_expired(), 1)
+        self.assertTrue(store.is_online("alice"))
+
+
+class TestSignedTokenStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "chat.db")
+        self.secret = load_or_create_secret(os.path.join(self.tmpdir.name, "token.key"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_key_file_is_reused(self):
+        key_path = os.path.join(self.tmpdir.name, "token.key")
+        self.assertEqual(load_or_create_secret(key_path), self.secret)
+        self.assertEqual(os.stat(key_path).st_mode & 0o777, 0o600)
+
+    def test_token_verifies_without_shared_state(self):
+        token = SignedTokenStore(self.secret, self.path).create("alice")
+        other = SignedTokenStore(self.secret, self.path)
+        self.assertEqual(other.get(token), "alice")
+        self.assertTrue(other.is_online("alice"))
+
+    def test_tampered_or_foreign_tokens_are_rejected(self):
+        store = SignedTokenStore(self.secret, self.path)
+        token = store.create("alice")
+        body, _, signature = token.partition(".")
+        forged = store.create("bob").partition(".")[0] + "." + signature
+        self.assertIsNone(store.get(forged), "❌ A signature must not carry over to another payload")
+        self.assertIsNone(store.get(body), "❌ An unsigned token must be rejected")
+        self.assertIsNone(store.get("not a token"))
+        self.assertIsNone(SignedTokenStore(b"another key", self.path).get(token))
+
+    def test_revocations_reach_other_stores(self):
+        worker_a, worker_b = SignedTokenStore(self.secret, self.path), SignedTokenStore(self.secret, self.path)
+        first = worker_a.create("alice")
+        second = worker_a.create("alice")
+        self.assertIsNone(worker_a.get(first), "❌ A new login should end the old token")
+        self.assertEqual(worker_b.get(second), "alice")
+
+        self.assertEqual(worker_a.remove(second), "alice")
+        self.assertIsNone(worker_a.get(second))
+        worker_b._refresh(force=True)
+        self.assertIsNone(worker_b.get(second), "❌ A logout should reach the other worker")
+        self.assertFalse(worker_b.is_online("alice"))
+
+    def test_remove_user_then_login_again(self):
+        store = SignedTokenStore(self.secret, self.path)
+        old = store.create("alice", replace_existing=False)
+        self.assertEqual(store.remove_user("alice"), 1)
+        self.assertIsNone(store.get(old))
+        # a login straight after must not fall under the cutoff, even within the same millisecond
+        self.assertEqual(store.get(store.create("alice")), "alice")
+
+    def test_ttl_expiry(self):
+        store = SignedTokenStore(self.secret, self.path, ttl_secs=0.1)
+        token = store.create("alice")
+        store.remove(store.create("bob", replace_existing=False))
+        time.sleep(0.2)
+        self.assertIsNone(store.get(token))
+        self.assertFalse(store.is_online("alice"))
+        self.assertEqual(store.purge_expired(), 1)
+
+    def test_revocation_list_stays_small(self):
+        """
+        1. Alice logs in and out 100 times, the way Login and Logout call the store
+        2. The list holds her latest cutoff and logout only, and no old token comes back
+        """
+        store = SignedTokenStore(self.secret, self.path)
+        other_worker = SignedTokenStore(self.secret, self.path)
+        tokens = []
+        for _ in range(100):
+            tokens.append(store.create("alice"))
+            self.assertEqual(store.remove(tokens[-1]), "alice")
+
+        self.assertLessEqual(store.conn.execute("SELECT COUNT(*) FROM revoked_tokens").fetchone()[0], 2)
+        self.assertLessEqual(len(store._revoked_nonces.get("alice", {})), 1)
+        other_worker._refresh(force=True)
+        restarted = SignedTokenStore(self.secret, self.path)
+        for worker in (store, other_worker, restarted):
+            self.assertTrue(all(worker.get(t) is None for t in tokens), "❌ Compacting must not bring a revoked token back")
+        self.assertEqual(restarted.get(restarted.create("alice")), "alice")
+
+    def test_failed_login_writes_no_revocation(self):
+        """
+        1. Logins with a wrong password or an unknown username go through the Login handler
+        2. Neither touches revoked_tokens or ends Alice's session; a good login writes one cutoff
+        """
+        store = SignedTokenStore(self.secret, self.path)
+        servicer = ChatServiceServicer(Database(self.path), store)
+        servicer.Signup(chat_service_pb2.SignupRequest(username="alice", password="secret"), None)
+        token = servicer.Login(chat_service_pb2.LoginRequest(username="alice", password="secret"), None).auth_token
+        count = lambda: store.conn.execute("SELECT COUNT(*) FROM revoked_tokens").fetchone()[0]
+        before = count()
+
+        for username, password in (("alice", "wrong"), ("mallory", "anything")):
+            resp = servicer.Login(chat_service_pb2.LoginRequest(username=username, password=password), None)
+            self.assertEqual(resp.status, "error")
+        self.assertEqual(count(), before, "❌ A failed login must not write to the revocation list")
+        self.assertEqual(store.get(token), "alice", "❌ A failed login must not end the existing session")
+
+        servicer.Login(chat_service_pb2.LoginRequest(username="alice", password="secret"), None)
+        self.assertIsNone(store.get(token))
+        self.assertEqual(count(), 1)
+
+    def test_expired_revocations_are_purged_on_refresh(self):
+        store = SignedTokenStore(self.secret, self.path, ttl_secs=0.1)
+        store.create("alice")
+        store.remove(store.create("bob", replace_existing=False))
+        time.sleep(0.2)
+        store._next_purge = 0  # due now rather than PURGE_SECS after start
+        store._refresh(force=True)
+        self.assertEqual(store.conn.execute("SELECT COUNT(*) FROM revoked_tokens").fetchone()[0], 0)
+        self.assertEqual((store._revoked_nonces, store._cutoffs), ({}, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import time
+import unittest
+import grpc
+import chat_service_pb2
+from test_base import BaseTest
+
+class TestSubscribe(BaseTest):
+    def _login(self, username, password):
+        self.stub.Signup(chat_service_pb2.SignupRequest(username=username, password=password))
+        resp = self.stub.Login(chat_service_pb2.LoginRequest(username=username, password=password))
+        self.assertEqual(resp.status, "ok")
+        return resp.auth_token
+
+    def test_message_is_pushed_to_subscriber(self):
+        """
+        1. Bob opens a Subscribe stream
+        2. Alice sends Bob two messages
+        3. Both arrive on Bob's stream, in order, without Bob polling
+        """
+        alice_token = self._login("Alice", "secret")
+        bob_token = self._login("Bob", "bobpass")
+
+        stream = self.stub.Subscribe(chat_service_pb2.EmptyRequest(auth_token=bob_token), timeout=5)
+        time.sleep(0.3)  # let the server register the stream before anything is sent
+
+        for text in ("first", "second"):
+            resp = self.stub.SendMessage(
+                chat_service_pb2.SendMessageRequest(auth_token=alice_token, recipient="Bob", content=text)
+            )
+            self.assertEqual(resp.status, "ok")
+
+        pushed = [next(stream), next(stream)]
+        self.assertEqual([m.content for m in pushed], ["first", "second"], "❌ Messages should be pushed in order")
+        self.assertEqual(pushed[0].sender, "Alice")
+        self.assertLess(pushed[0].id, pushed[1].id, "❌ Pushed messages should carry their stored ids")
+        stream.cancel()
+
+    def test_logout_ends_stream(self):
+        """Logging out finishes the open stream instead of leaving it hanging."""
+        bob_token = self._login("Bob", "bobpass")
+        stream = self.stub.Subscribe(chat_service_pb2.EmptyRequest(auth_token=bob_token), timeout=5)
+        time.sleep(0.3)
+
+        self.stub.Logout(chat_service_pb2.EmptyRequest(auth_token=bob_token))
+        self.assertEqual(list(stream), [], "❌ The stream should end cleanly on logout")
+
+    def test_subscribe_requires_login(self):
+        stream = self.stub.Subscribe(chat_service_pb2.EmptyRequest(auth_token="not-a-token"), timeout=5)
+        with self.assertRaises(grpc.RpcError) as ctx:
+            next(stream)
+        self.assertEqual(ctx.exception.code(), grpc.StatusCode.UNAUTHENTICATED)
+
+
+if __name__ == "__main__":
+    unittest.main()
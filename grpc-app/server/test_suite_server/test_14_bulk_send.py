@@ -0,0 +1,65 @@
+import unittest
+import chat_service_pb2
+from test_base import BaseTest
+
+class TestBulkSend(BaseTest):
+    def _login(self, username, password):
+        self.stub.Signup(chat_service_pb2.SignupRequest(username=username, password=password))
+        resp = self.stub.Login(chat_service_pb2.LoginRequest(username=username, password=password))
+        self.assertEqual(resp.status, "ok")
+        return resp.auth_token
+
+    def test_bulk_send_reports_each_message(self):
+        """
+        1. Alice streams three messages: two to Bob and one to a user that does not exist
+        2. The response counts 2 sent and 1 failed, with a result per message in order
+        3. Bob's inbox holds exactly the two good messages
+        """
+        alice_token = self._login("Alice", "secret")
+        bob_token = self._login("Bob", "bobpass")
+
+        requests = [
+            chat_service_pb2.SendMessageRequest(auth_token=alice_token, recipient="Bob", content="one"),
+            chat_service_pb2.SendMessageRequest(auth_token=alice_token, recipient="Nobody", content="lost"),
+            chat_service_pb2.SendMessageRequest(auth_token=alice_token, recipient="Bob", content="two"),
+        ]
+        resp = self.stub.SendMessages(iter(requests))
+        self.assertEqual(resp.status, "ok")
+        self.assertEqual((resp.sent_count, resp.failed_count), (2, 1))
+        self.assertEqual([r.index for r in resp.results], [0, 1, 2])
+        self.assertEqual([r.status for r in resp.results], ["ok", "error", "ok"])
+        self.assertEqual(resp.results[1].msg, "Recipient not found")
+        self.assertLess(resp.results[0].id, resp.results[2].id)
+
+        inbox = self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=bob_token, start=0, count=10))
+        self.assertEqual([m.content for m in inbox.messages], ["two", "one"])
+
+    def test_bulk_send_spans_chunks(self):
+        """A stream longer than one server chunk is stored completely and in order."""
+        alice_token = self._login("Alice", "secret")
+        bob_token = self._login("Bob", "bobpass")
+
+        n = 1200
+        resp = self.stub.SendMessages(
+            chat_service_pb2.SendMessageRequest(auth_token=alice_token, recipient="Bob", content=f"m{i}") for i in range(n)
+        )
+        self.assertEqual(resp.sent_count, n)
+        self.assertEqual(resp.results[-1].index, n - 1)
+        ids = [r.id for r in resp.results]
+        self.assertEqual(ids, sorted(ids), "❌ Ids should follow stream order")
+
+        inbox = self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=bob_token, start=0, count=1))
+        self.assertEqual(inbox.total_count, n)
+        self.assertEqual(inbox.messages[0].content, f"m{n - 1}")
+
+    def test_bulk_send_requires_login(self):
+        resp = self.stub.SendMessages(iter([
+            chat_service_pb2.SendMessageRequest(auth_token="not-a-token", recipient="admin", content="hi"),
+        ]))
+        self.assertEqual(resp.status, "error")
+        self.assertEqual(resp.failed_count, 1)
+        self.assertEqual(resp.results[0].msg, "Not logged in")
+
+
+if __name__ == "__main__":
+    unittest.main()
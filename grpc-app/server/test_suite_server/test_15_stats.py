@@ -0,0 +1,55 @@
+import unittest
+import grpc
+import chat_service_pb2
+from test_base import BaseTest
+
+class TestStats(BaseTest):
+    def _login(self, username, password):
+        self.stub.Signup(chat_service_pb2.SignupRequest(username=username, password=password))
+        resp = self.stub.Login(chat_service_pb2.LoginRequest(username=username, password=password))
+        self.assertEqual(resp.status, "ok")
+        return resp.auth_token
+
+    def _method(self, token, name):
+        resp = self.stub.Stats(chat_service_pb2.EmptyRequest(auth_token=token))
+        self.assertEqual(resp.status, "ok")
+        return {m.method: m for m in resp.methods}.get(name)
+
+    def test_calls_are_counted(self):
+        """
+        1. Read the ListMessages counters
+        2. Make three ListMessages calls
+        3. The counters, histogram and byte totals all moved by those three calls
+        """
+        token = self._login("Alice", "secret")
+        before = self._method(token, "ListMessages")
+        before_calls = before.calls if before else 0
+        before_bytes = before.response_bytes if before else 0
+
+        request = chat_service_pb2.ListMessagesRequest(auth_token=token, start=0, count=10)
+        for _ in range(3):
+            self.stub.ListMessages(request)
+
+        after = self._method(token, "ListMessages")
+        self.assertEqual(after.calls - before_calls, 3)
+        self.assertGreaterEqual(after.status_codes["OK"], 3)
+        self.assertEqual(sum(after.latency_counts), after.calls, "❌ Every finished call lands in one bucket")
+        self.assertGreater(after.response_bytes, before_bytes)
+        self.assertGreater(after.request_bytes, 0)
+        self.assertEqual(after.in_flight, 0)
+
+    def test_error_status_is_recorded(self):
+        """A rejected Subscribe shows up under its status code."""
+        token = self._login("Alice", "secret")
+        with self.assertRaises(grpc.RpcError):
+            next(self.stub.Subscribe(chat_service_pb2.EmptyRequest(auth_token="not-a-token"), timeout=5))
+        subscribe = self._method(token, "Subscribe")
+        self.assertGreaterEqual(subscribe.status_codes["UNAUTHENTICATED"], 1)
+
+    def test_stats_requires_login(self):
+        resp = self.stub.Stats(chat_service_pb2.EmptyRequest(auth_token="not-a-token"))
+        self.assertEqual(resp.status, "error")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import chat_service_pb2
+from test_base import BaseTest
+
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import Database
+
+class TestKeysetPaging(BaseTest):
+    def _login(self, username, password):
+        self.stub.Signup(chat_service_pb2.SignupRequest(username=username, password=password))
+        resp = self.stub.Login(chat_service_pb2.LoginRequest(username=username, password=password))
+        self.assertEqual(resp.status, "ok")
+        return resp.auth_token
+
+    def _inbox_of_25(self):
+        alice_token = self._login("Alice", "secret")
+        bob_token = self._login("Bob", "bobpass")
+        self.stub.SendMessages(
+            chat_service_pb2.SendMessageRequest(auth_token=alice_token, recipient="Bob", content=f"m{i}") for i in range(25)
+        )
+        return bob_token
+
+    def test_before_id_walks_the_inbox(self):
+        """
+        1. Bob has 25 messages
+        2. Paging with next_before_id returns 10, 10 and 5 messages, newest first
+        3. The pages match the offset pages and the last one has no cursor
+        """
+        bob_token = self._inbox_of_25()
+
+        pages, before_id = [], 0
+        while True:
+            resp = self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=bob_token, count=10, before_id=before_id))
+            self.assertEqual(resp.total_count, 25)
+            pages.append([m.content for m in resp.messages])
+            before_id = resp.next_before_id
+            if not before_id:
+                break
+
+        self.assertEqual([len(p) for p in pages], [10, 10, 5])
+        self.assertEqual(pages[0][0], "m24")
+        self.assertEqual(pages[-1][-1], "m0")
+        for n, page in enumerate(pages):
+            by_offset = self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=bob_token, start=n * 10, count=10))
+            self.assertEqual([m.content for m in by_offset.messages], page, "❌ Keyset and offset pages should agree")
+
+    def test_total_follows_inserts_and_deletes(self):
+        """The cached total moves with sends and deletions instead of being recounted."""
+        bob_token = self._inbox_of_25()
+        resp = self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=bob_token, count=2))
+        self.stub.DeleteMessages(chat_service_pb2.DeleteMessagesRequest(
+            auth_token=bob_token, message_ids_to_delete=[m.id for m in resp.messages]
+        ))
+        resp = self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=bob_token, count=10))
+        self.assertEqual(resp.total_count, 23)
+        self.assertEqual(resp.messages[0].content, "m22")
+
+
+class TestMessageCounts(unittest.TestCase):
+    """The totals are counted once, when their table is created, and left to the triggers after."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "chat.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_backfilled_when_the_table_is_created(self):
+        legacy = sqlite3.connect(self.path)
+        legacy.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, sender TEXT, recipient TEXT, content TEXT, to_deliver INTEGER DEFAULT 0)")
+        legacy.executemany("INSERT INTO messages (sender, recipient, content) VALUES ('alice', ?, 'hi')", [("bob",)] * 3 + [("carol",)])
+        legacy.commit()
+        legacy.close()
+
+        db = Database(self.path)
+        self.assertEqual((db.message_count("bob"), db.message_count("carol")), (3, 1))
+        db.conn.close()
+
+    def test_not_recounted_on_restart(self):
+        """A second worker opening the file must leave the running totals alone."""
+        db = Database(self.path)
+        db.execute("INSERT INTO messages (sender, recipient, content) VALUES ('alice', 'bob', 'hi')", commit=True)
+        db.execute("UPDATE message_counts SET total = 42 WHERE username = 'bob'", commit=True)  # marks the live total
+
+        other_worker = Database(self.path)
+        self.assertEqual(other_worker.message_count("bob"), 42, "❌ Opening the database should not rebuild the totals")
+        other_worker.execute("INSERT INTO messages (sender, recipient, content) VALUES ('alice', 'bob', 'again')", commit=True)
+        self.assertEqual(db.message_count("bob"), 43)
+        other_worker.conn.close()
+        db.conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+import grpc
+import sys
+# The servicer is called directly with a controllable context, no server needed.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import chat_service_pb2
+from database import Database
+from metrics import MetricsRegistry
+from sessions import SessionStore
+import server as chat_server
+
+class Aborted(Exception):
+    pass
+
+class ControlledContext:
+    """A ServicerContext whose client goes away after a given number of liveness checks."""
+    def __init__(self, checks_until_gone=None, time_remaining=None):
+        self.checks_until_gone = checks_until_gone
+        self.remaining = time_remaining
+        self.code = None
+
+    def is_active(self):
+        if self.checks_until_gone is None:
+            return True
+        self.checks_until_gone -= 1
+        return self.checks_until_gone >= 0
+
+    def time_remaining(self):
+        return self.remaining
+
+    def abort(self, code, details):
+        self.code = code
+        raise Aborted(details)
+
+class TestCancellation(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmpdir.name, "chat.db"))
+        self.metrics = MetricsRegistry()
+        self.servicer = chat_server.ChatServiceServicer(self.db, SessionStore(), metrics=self.metrics)
+        for name in ("alice", "bob"):
+            self.servicer.Signup(chat_service_pb2.SignupRequest(username=name, password="pw"), ControlledContext())
+        self.alice = self.servicer.Login(chat_service_pb2.LoginRequest(username="alice", password="pw"), ControlledContext()).auth_token
+        self.bob = self.servicer.Login(chat_service_pb2.LoginRequest(username="bob", password="pw"), ControlledContext()).auth_token
+
+    def tearDown(self):
+        self.db.conn.close()
+        self.tmpdir.cleanup()
+
+    def _fill_bob_inbox(self, n):
+        self.servicer.SendMessages(
+            (chat_service_pb2.SendMessageRequest(auth_token=self.alice, recipient="bob", content=f"m{i}") for i in range(n)),
+            ControlledContext()
+        )
+
+    def _abandoned(self, method):
+        return self.metrics.snapshot()[1][method]["abandoned"]
+
+    def test_large_page_stops_when_client_cancels(self):
+        """A big ListMessages gives up between row batches once the client is gone."""
+        self._fill_bob_inbox(3 * chat_server.CANCEL_CHECK_ROWS)
+        context = ControlledContext(checks_until_gone=2)
+        with self.assertRaises(Aborted):
+            self.servicer.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=self.bob, count=10000), context)
+        self.assertEqual(context.code, grpc.StatusCode.CANCELLED)
+        self.assertEqual(self._abandoned("ListMessages"), 1)
+
+    def test_expired_deadline_is_reported(self):
+        context = ControlledContext(time_remaining=0)
+        with self.assertRaises(Aborted):
+            self.servicer.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=self.bob, count=10), context)
+        self.assertEqual(context.code, grpc.StatusCode.DEADLINE_EXCEEDED)
+
+    def test_fetch_leaves_messages_undelivered_when_cancelled(self):
+        """Messages are only marked delivered if the caller is still there to receive them."""
+        self.servicer.Logout(chat_service_pb2.EmptyRequest(auth_token=self.bob), ControlledContext())
+        self._fill_bob_inbox(3)
+        bob = self.servicer.Login(chat_service_pb2.LoginRequest(username="bob", password="pw"), ControlledContext())
+        self.assertEqual(bob.unread_count, 3)
+
+        with self.assertRaises(Aborted):
+            self.servicer.FetchAwayMsgs(chat_service_pb2.FetchAwayMsgsRequest(auth_token=bob.auth_token, limit=5), ControlledContext(checks_until_gone=0))
+        unread = self.servicer.CountUnread(chat_service_pb2.CountUnreadRequest(auth_token=bob.auth_token), ControlledContext())
+        self.assertEqual(unread.unread_count, 3)
+
+    def test_delete_account_resumes_after_cancel(self):
+        """
+        1. A cancelled DeleteAccount stops after one batch, leaving the account in place
+        2. Calling it again removes the rest and the account
+        """
+        self._fill_bob_inbox(3 * chat_server.CANCEL_CHECK_ROWS)
+        with self.assertRaises(Aborted):
+            self.servicer.DeleteAccount(chat_service_pb2.EmptyRequest(auth_token=self.bob), ControlledContext(checks_until_gone=0))
+        self.assertEqual(self.db.message_count("bob"), 2 * chat_server.CANCEL_CHECK_ROWS)
+        self.assertTrue(self.db.execute("SELECT 1 FROM users WHERE username='bob'"))
+
+        resp = self.servicer.DeleteAccount(chat_service_pb2.EmptyRequest(auth_token=self.bob), ControlledContext())
+        self.assertEqual(resp.status, "ok")
+        self.assertEqual(self.db.message_count("bob"), 0)
+        self.assertFalse(self.db.execute("SELECT 1 FROM users WHERE username='bob'"))
+        self.assertEqual(self._abandoned("DeleteAccount"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from concurrent import futures
+
+import grpc
+import sys
+# Runs its own in-process server with limits switched on.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import chat_service_pb2
+import chat_service_pb2_grpc
+from database import Database
+from metrics import MetricsInterceptor, MetricsRegistry
+from ratelimit import RETRY_AFTER_KEY, RateLimiter, RateLimitInterceptor, parse_limit
+from sessions import SessionStore
+from server import ChatServiceServicer
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestRateLimiter(unittest.TestCase):
+    def test_bucket_allows_burst_then_refills(self):
+        clock = FakeClock()
+        limiter = RateLimiter({"ListAccounts": (2, 3)}, clock=clock)
+        for _ in range(3):
+            self.assertIsNone(limiter.acquire("tok", "ListAccounts"))
+            limiter.release("tok")
+        reason, retry_after = limiter.acquire("tok", "ListAccounts")
+        self.assertEqual(reason, "rate")
+        self.assertAlmostEqual(retry_after, 0.5)
+
+        clock.now += 0.5
+        self.assertIsNone(limiter.acquire("tok", "ListAccounts"))
+        # other callers and unlisted methods are unaffected
+        self.assertIsNone(limiter.acquire("other", "ListAccounts"))
+        self.assertIsNone(limiter.acquire("tok", "SendMessage"))
+
+    def test_concurrency_cap(self):
+        limiter = RateLimiter(max_concurrent=2)
+        self.assertIsNone(limiter.acquire("tok", "ListMessages"))
+        self.assertIsNone(limiter.acquire("tok", "ListMessages"))
+        self.assertEqual(limiter.acquire("tok", "ListMessages")[0], "concurrency")
+        limiter.release("tok")
+        self.assertIsNone(limiter.acquire("tok", "ListMessages"))
+
+    def test_buckets_are_bounded(self):
+        """Past max_buckets the least recently used bucket goes, not the busy ones."""
+        limiter = RateLimiter({"*": (1, 1)}, max_buckets=3)
+        for caller in ("a", "b", "c"):
+            limiter.acquire(caller, "ListAccounts", concurrent=False)
+        limiter.acquire("a", "ListAccounts", concurrent=False)
+        limiter.acquire("d", "ListAccounts", concurrent=False)
+        self.assertEqual([caller for caller, _ in limiter._buckets], ["c", "a", "d"])
+        self.assertEqual(limiter.acquire("a", "ListAccounts", concurrent=False)[0], "rate")
+
+    def test_parse_limit(self):
+        self.assertEqual(parse_limit("SendMessage=5/10"), ("SendMessage", (5.0, 10.0)))
+        self.assertEqual(parse_limit("*=20"), ("*", (20.0, 20.0)))
+        with self.assertRaises(ValueError):
+            parse_limit("SendMessage")
+
+class TestRateLimitInterceptor(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.metrics = MetricsRegistry()
+        limiter = RateLimiter({"ListAccounts": (1, 2)})
+        sessions = SessionStore()
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4), interceptors=[
+            MetricsInterceptor(self.metrics), RateLimitInterceptor(limiter, self.metrics, sessions)
+        ])
+        servicer = ChatServiceServicer(Database(os.path.join(self.tmpdir.name, "chat.db")), sessions, metrics=self.metrics)
+        chat_service_pb2_grpc.add_ChatServiceServicer_to_server(servicer, self.server)
+        port = self.server.add_insecure_port("127.0.0.1:0")
+        self.server.start()
+        self.channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+        self.stub = chat_service_pb2_grpc.ChatServiceStub(self.channel)
+
+    def tearDown(self):
+        self.channel.close()
+        self.server.stop(None)
+        self.tmpdir.cleanup()
+
+    def test_throttled_call_gets_retry_hint(self):
+        """
+        1. Alice spends her burst of 2 ListAccounts calls
+        2. The third is refused with RESOURCE_EXHAUSTED and a retry-after-ms trailer
+        3. Stats counts it as throttled, and other methods still work
+        """
+        self.stub.Signup(chat_service_pb2.SignupRequest(username="alice", password="pw"))
+        token = self.stub.Login(chat_service_pb2.LoginRequest(username="alice", password="pw")).auth_token
+        request = chat_service_pb2.ListAccountsRequest(auth_token=token, pattern="", start=0, count=10)
+        for _ in range(2):
+            self.assertEqual(self.stub.ListAccounts(request).status, "ok")
+
+        with self.assertRaises(grpc.RpcError) as ctx:
+            self.stub.ListAccounts(request)
+        self.assertEqual(ctx.exception.code(), grpc.StatusCode.RESOURCE_EXHAUSTED)
+        trailers = dict(ctx.exception.trailing_metadata())
+        self.assertGreater(int(trailers[RETRY_AFTER_KEY]), 0)
+
+        stats = {m.method: m for m in self.stub.Stats(chat_service_pb2.EmptyRequest(auth_token=token)).methods}
+        self.assertEqual(stats["ListAccounts"].throttled, 1)
+        self.assertEqual(stats["ListAccounts"].status_codes["RESOURCE_EXHAUSTED"], 1)
+
+    def test_made_up_tokens_share_the_peer_bucket(self):
+        """
+        1. A client sends a new garbage token on every ListAccounts call
+        2. They all count against its peer address, so the third is refused like any other
+        """
+        for i in range(2):
+            request = chat_service_pb2.ListAccountsRequest(auth_token=f"garbage-{i}", pattern="", start=0, count=10)
+            self.assertEqual(self.stub.ListAccounts(request).status, "error")
+        with self.assertRaises(grpc.RpcError) as ctx:
+            self.stub.ListAccounts(chat_service_pb2.ListAccountsRequest(auth_token="garbage-2", pattern="", start=0, count=10))
+        self.assertEqual(ctx.exception.code(), grpc.StatusCode.RESOURCE_EXHAUSTED)
+
+
+if __name__ == "__main__":
+    unittest.main()
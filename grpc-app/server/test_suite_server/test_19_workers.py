@@ -0,0 +1,84 @@
+import os
+import socket
+import subprocess
+import tempfile
+import time
+import unittest
+
+import grpc
+import sys
+# Starts its own multi-process server on a spare port.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import chat_service_pb2
+import chat_service_pb2_grpc
+
+SERVER_SCRIPT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "server.py"))
+WORKERS = 3
+
+class TestWorkers(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            cls.port = s.getsockname()[1]
+        cls.proc = subprocess.Popen(
+            [sys.executable, SERVER_SCRIPT, "--port", str(cls.port), "--workers", str(WORKERS)],
+            cwd=cls.tmpdir.name, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        channel = grpc.insecure_channel(f"127.0.0.1:{cls.port}")
+        grpc.channel_ready_future(channel).result(timeout=20)
+        channel.close()
+        time.sleep(1)  # let the remaining workers bind
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.proc.terminate()
+        cls.proc.wait(timeout=10)
+        cls.tmpdir.cleanup()
+
+    def setUp(self):
+        # separate connections, which the kernel spreads over the workers
+        self.channels = [grpc.insecure_channel(f"127.0.0.1:{self.port}", options=[("grpc.use_local_subchannel_pool", 1)]) for _ in range(2 * WORKERS)]
+        self.stubs = [chat_service_pb2_grpc.ChatServiceStub(c) for c in self.channels]
+
+    def tearDown(self):
+        for channel in self.channels:
+            channel.close()
+
+    def _login(self, stub, username):
+        stub.Signup(chat_service_pb2.SignupRequest(username=username, password="pw"))
+        resp = stub.Login(chat_service_pb2.LoginRequest(username=username, password="pw"))
+        self.assertEqual(resp.status, "ok")
+        return resp.auth_token
+
+    def test_token_works_on_every_connection(self):
+        """A login made through one connection is honoured on all the others."""
+        token = self._login(self.stubs[0], "alice")
+        for stub in self.stubs:
+            resp = stub.CountUnread(chat_service_pb2.CountUnreadRequest(auth_token=token))
+            self.assertEqual(resp.status, "ok", "❌ Every worker should accept the token")
+
+    def test_subscribe_sees_messages_from_other_connections(self):
+        """
+        1. Bob subscribes on one connection
+        2. Alice sends from each of the others
+        3. Every message reaches Bob's stream, whichever worker stored it
+        """
+        alice = self._login(self.stubs[0], "alice2")
+        bob = self._login(self.stubs[0], "bob2")
+        stream = self.stubs[0].Subscribe(chat_service_pb2.EmptyRequest(auth_token=bob), timeout=10)
+        time.sleep(0.5)
+
+        for i, stub in enumerate(self.stubs[1:]):
+            resp = stub.SendMessage(chat_service_pb2.SendMessageRequest(auth_token=alice, recipient="bob2", content=f"m{i}"))
+            self.assertEqual(resp.status, "ok")
+
+        received = sorted(next(stream).content for _ in self.stubs[1:])
+        self.assertEqual(received, sorted(f"m{i}" for i in range(len(self.stubs) - 1)))
+        stream.cancel()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+import chat_service_pb2
+from test_base import BaseTest
+from test_17_cancellation import Aborted, ControlledContext
+from database import Database
+from sessions import SessionStore
+import server as chat_server
+
+class TestBatch(BaseTest):
+    def _login(self, username, password):
+        self.stub.Signup(chat_service_pb2.SignupRequest(username=username, password=password))
+        resp = self.stub.Login(chat_service_pb2.LoginRequest(username=username, password=password))
+        self.assertEqual(resp.status, "ok")
+        return resp.auth_token
+
+    def test_inbox_screen_in_one_call(self):
+        """
+        1. Alice sends Bob three messages while he is logged out
+        2. Bob fetches two, lists his inbox and counts what is unread, all in one Batch
+        3. The results come back in order, and the later calls see the fetch
+        """
+        self.stub.Logout(chat_service_pb2.EmptyRequest(auth_token=self._login("Bob", "bobpass")))
+        alice = self._login("Alice", "secret")
+        for i in range(3):
+            self.stub.SendMessage(chat_service_pb2.SendMessageRequest(auth_token=alice, recipient="Bob", content=f"m{i}"))
+
+        bob = self._login("Bob", "bobpass")
+        resp = self.stub.Batch(chat_service_pb2.BatchRequest(auth_token=bob, calls=[
+            chat_service_pb2.BatchCall(fetch_away_msgs=chat_service_pb2.FetchAwayMsgsRequest(limit=2)),
+            chat_service_pb2.BatchCall(list_messages=chat_service_pb2.ListMessagesRequest(start=0, count=10)),
+            chat_service_pb2.BatchCall(count_unread=chat_service_pb2.CountUnreadRequest()),
+        ]))
+        self.assertEqual(resp.status, "ok")
+        self.assertEqual([r.WhichOneof("result") for r in resp.results], ["fetch_away_msgs", "list_messages", "count_unread"])
+
+        fetched, page, unread = resp.results[0].fetch_away_msgs, resp.results[1].list_messages, resp.results[2].count_unread
+        self.assertEqual([m.content for m in fetched.messages], ["m0", "m1"], "❌ The fetched messages should be returned")
+        self.assertEqual(page.total_count, 3)
+        self.assertEqual(len(page.messages), 3)
+        self.assertEqual(unread.unread_count, 1, "❌ CountUnread should see the fetch that ran before it")
+
+    def test_failed_call_only_fails_its_own_result(self):
+        token = self._login("Alice", "secret")
+        resp = self.stub.Batch(chat_service_pb2.BatchRequest(auth_token=token, calls=[
+            chat_service_pb2.BatchCall(count_unread=chat_service_pb2.CountUnreadRequest(auth_token="invalid_token")),
+            chat_service_pb2.BatchCall(list_accounts=chat_service_pb2.ListAccountsRequest(pattern="Ali", count=10)),
+        ]))
+        self.assertEqual(resp.status, "ok")
+        self.assertEqual(resp.results[0].count_unread.status, "error")
+        self.assertIn("not logged in", resp.results[0].count_unread.msg.lower())
+        self.assertEqual(resp.results[1].list_accounts.status, "ok")
+        self.assertEqual([u.username for u in resp.results[1].list_accounts.users], ["Alice"])
+
+    def test_malformed_batches_are_refused(self):
+        token = self._login("Alice", "secret")
+        empty_call = self.stub.Batch(chat_service_pb2.BatchRequest(auth_token=token, calls=[chat_service_pb2.BatchCall()]))
+        self.assertEqual(empty_call.status, "error")
+
+        too_many = [chat_service_pb2.BatchCall(count_unread=chat_service_pb2.CountUnreadRequest())] * (chat_server.MAX_BATCH_CALLS + 1)
+        resp = self.stub.Batch(chat_service_pb2.BatchRequest(auth_token=token, calls=too_many))
+        self.assertEqual(resp.status, "error")
+        self.assertEqual(len(resp.results), 0)
+
+class TestBatchTransaction(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmpdir.name, "chat.db"))
+        self.servicer = chat_server.ChatServiceServicer(self.db, SessionStore())
+        for name in ("alice", "bob"):
+            self.servicer.Signup(chat_service_pb2.SignupRequest(username=name, password="pw"), ControlledContext())
+        alice = self.servicer.Login(chat_service_pb2.LoginRequest(username="alice", password="pw"), ControlledContext()).auth_token
+        self.bob = self.servicer.Login(chat_service_pb2.LoginRequest(username="bob", password="pw"), ControlledContext()).auth_token
+        for i in range(3):
+            self.servicer.SendMessage(chat_service_pb2.SendMessageRequest(auth_token=alice, recipient="bob", content=f"m{i}"), ControlledContext())
+
+    def tearDown(self):
+        self.db.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_cancelled_batch_rolls_back(self):
+        """A delete earlier in a batch is undone when a later call finds the client gone."""
+        ids = [row[0] for row in self.db.execute("SELECT id FROM messages WHERE recipient='bob'")]
+        request = chat_service_pb2.BatchRequest(auth_token=self.bob, calls=[
+            chat_service_pb2.BatchCall(delete_messages=chat_service_pb2.DeleteMessagesRequest(message_ids_to_delete=ids[:2])),
+            chat_service_pb2.BatchCall(list_messages=chat_service_pb2.ListMessagesRequest(count=10)),
+        ])
+        with self.assertRaises(Aborted):
+            self.servicer.Batch(request, ControlledContext(checks_until_gone=0))
+        self.assertEqual(self.db.message_count("bob"), 3)
+        self.assertEqual(len(self.db.execute("SELECT id FROM messages WHERE recipient='bob'")), 3)
+
+        resp = self.servicer.Batch(request, ControlledContext())
+        self.assertEqual(resp.results[1].list_messages.total_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
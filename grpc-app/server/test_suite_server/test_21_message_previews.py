@@ -0,0 +1,63 @@
+import unittest
+import chat_service_pb2
+from test_base import BaseTest
+
+LONG = "x" * 5000
+
+class TestMessagePreviews(BaseTest):
+    def _login(self, username, password):
+        self.stub.Signup(chat_service_pb2.SignupRequest(username=username, password=password))
+        resp = self.stub.Login(chat_service_pb2.LoginRequest(username=username, password=password))
+        self.assertEqual(resp.status, "ok")
+        return resp.auth_token
+
+    def _send(self, token, recipient, content):
+        resp = self.stub.SendMessage(chat_service_pb2.SendMessageRequest(auth_token=token, recipient=recipient, content=content))
+        self.assertEqual(resp.status, "ok")
+
+    def test_preview_page_then_full_body(self):
+        """
+        1. Alice sends Bob a long message and a short one
+        2. A preview page cuts the long one down and reports its real length
+        3. GetMessages returns the long one in full
+        """
+        alice, bob = self._login("Alice", "secret"), self._login("Bob", "bobpass")
+        self._send(alice, "Bob", LONG)
+        self._send(alice, "Bob", "short")
+
+        page = self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=bob, count=10, preview_chars=50))
+        self.assertEqual(page.status, "ok")
+        short_msg, long_msg = page.messages
+        self.assertEqual((short_msg.content, short_msg.content_length), ("short", 5))
+        self.assertEqual(long_msg.content, LONG[:50])
+        self.assertEqual(long_msg.content_length, len(LONG))
+
+        full = self.stub.GetMessages(chat_service_pb2.GetMessagesRequest(auth_token=bob, ids=[long_msg.id]))
+        self.assertEqual(full.status, "ok")
+        self.assertEqual([m.content for m in full.messages], [LONG])
+
+    def test_preview_page_is_much_smaller(self):
+        alice, bob = self._login("Alice", "secret"), self._login("Bob", "bobpass")
+        for _ in range(10):
+            self._send(alice, "Bob", LONG)
+        full = self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=bob, count=10))
+        preview = self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=bob, count=10, preview_chars=100))
+        self.assertEqual(len(preview.messages), 10)
+        self.assertLess(preview.ByteSize() * 10, full.ByteSize(), "❌ A preview page should be an order of magnitude smaller")
+
+    def test_get_messages_only_reads_own_inbox(self):
+        alice, bob = self._login("Alice", "secret"), self._login("Bob", "bobpass")
+        self._send(alice, "Bob", "for Bob")
+        self._send(bob, "Alice", "for Alice")
+        ids = [m.id for m in self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=alice, count=10)).messages]
+
+        resp = self.stub.GetMessages(chat_service_pb2.GetMessagesRequest(auth_token=bob, ids=ids + [999999]))
+        self.assertEqual(resp.status, "ok")
+        self.assertEqual(len(resp.messages), 0, "❌ Bob must not read Alice's inbox")
+
+        not_logged_in = self.stub.GetMessages(chat_service_pb2.GetMessagesRequest(auth_token="invalid_token", ids=ids))
+        self.assertEqual(not_logged_in.status, "error")
+
+
+if __name__ == "__main__":
+    unittest.main()
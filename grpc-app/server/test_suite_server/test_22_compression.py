@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+import unittest
+from concurrent import futures
+
+import grpc
+import sys
+# Runs its own in-process server with compression switched on, behind a byte-counting proxy.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import chat_service_pb2
+import chat_service_pb2_grpc
+from compression import CompressionInterceptor, CompressionPolicy
+from database import Database
+from sessions import SessionStore
+from server import ChatServiceServicer
+from test_int_grpc_sizes import TCPProxy
+
+class TestCompressionPolicy(unittest.TestCase):
+    def test_threshold(self):
+        policy = CompressionPolicy("gzip", min_bytes=100)
+        self.assertEqual(policy.choose(chat_service_pb2.ChatMessage(content="x" * 200)), grpc.Compression.Gzip)
+        self.assertEqual(policy.choose(chat_service_pb2.ChatMessage(content="x" * 10)), grpc.Compression.NoCompression)
+        self.assertEqual(CompressionPolicy("none", 0).choose(chat_service_pb2.ChatMessage(content="x" * 200)), grpc.Compression.NoCompression)
+
+class TestCompressionInterceptor(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4), interceptors=[
+            CompressionInterceptor(CompressionPolicy("gzip", min_bytes=1024))
+        ])
+        servicer = ChatServiceServicer(Database(os.path.join(self.tmpdir.name, "chat.db")), SessionStore())
+        chat_service_pb2_grpc.add_ChatServiceServicer_to_server(servicer, self.server)
+        port = self.server.add_insecure_port("127.0.0.1:0")
+        self.server.start()
+        self.proxy = TCPProxy("127.0.0.1", 0, "127.0.0.1", port)
+        self.proxy.start()
+        self.channel = grpc.insecure_channel(f"127.0.0.1:{self.proxy.server.server_address[1]}")
+        self.stub = chat_service_pb2_grpc.ChatServiceStub(self.channel)
+
+    def tearDown(self):
+        self.channel.close()
+        self.proxy.stop()
+        self.server.stop(None)
+        self.tmpdir.cleanup()
+
+    def _bytes_down(self, call):
+        self.proxy.reset_totals()
+        response = call()
+        time.sleep(0.1)  # let the proxy finish relaying
+        return response, self.proxy.get_totals()[1]
+
+    def test_only_large_responses_are_compressed(self):
+        """
+        1. Bob's inbox holds five 2000-character messages
+        2. A full page comes back compressed, well under its protobuf size
+        3. A preview page just under the threshold goes out as it is
+        """
+        for name in ("alice", "bob"):
+            self.stub.Signup(chat_service_pb2.SignupRequest(username=name, password="pw"))
+        alice = self.stub.Login(chat_service_pb2.LoginRequest(username="alice", password="pw")).auth_token
+        bob = self.stub.Login(chat_service_pb2.LoginRequest(username="bob", password="pw")).auth_token
+        for _ in range(5):
+            self.stub.SendMessage(chat_service_pb2.SendMessageRequest(auth_token=alice, recipient="bob", content="see you at lunch " * 125))
+
+        page, wire = self._bytes_down(lambda: self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=bob, count=5)))
+        self.assertEqual(len(page.messages), 5)
+        self.assertLess(wire, page.ByteSize() / 4, "❌ A 10 KB page of chat text should be compressed")
+
+        preview, wire = self._bytes_down(lambda: self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=bob, count=5, preview_chars=150)))
+        self.assertLess(preview.ByteSize(), 1024)
+        self.assertGreater(wire, preview.ByteSize(), "❌ A response under the threshold should not be compressed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent import futures
+
+import grpc
+import sys
+# Runs its own in-process grpc.aio server, the way serve_aio builds it.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import chat_service_pb2
+import chat_service_pb2_grpc
+from aio_server import AsyncChatServiceServicer
+from database import Database
+from metrics import MetricsRegistry
+from sessions import SessionStore
+from subscriptions import AsyncSubscriptionHub
+
+class TestAioServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmpdir.name, "chat.db"))
+        self.db_executor = futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+        self.metrics = MetricsRegistry()
+        self.servicer = AsyncChatServiceServicer(
+            self.db, SessionStore(), AsyncSubscriptionHub(asyncio.get_running_loop()), self.db_executor, self.metrics
+        )
+        self.server = grpc.aio.server()
+        chat_service_pb2_grpc.add_ChatServiceServicer_to_server(self.servicer, self.server)
+        port = self.server.add_insecure_port("127.0.0.1:0")
+        await self.server.start()
+        self.channel = grpc.aio.insecure_channel(f"127.0.0.1:{port}")
+        self.stub = chat_service_pb2_grpc.ChatServiceStub(self.channel)
+
+    async def asyncTearDown(self):
+        await self.channel.close()
+        await self.server.stop(None)
+        self.db_executor.shutdown(wait=True)
+        self.db.conn.close()
+        self.tmpdir.cleanup()
+
+    async def _login(self, username, password):
+        await self.stub.Signup(chat_service_pb2.SignupRequest(username=username, password=password))
+        resp = await self.stub.Login(chat_service_pb2.LoginRequest(username=username, password=password))
+        self.assertEqual(resp.status, "ok")
+        return resp.auth_token
+
+    async def test_unary_calls_run_on_the_executor(self):
+        """Handlers run on the database thread, not the event loop's."""
+        ran_on = []
+        count_unread = self.servicer.handlers.CountUnread
+        def recording(request, context):
+            ran_on.append(threading.current_thread().name)
+            return count_unread(request, context)
+        self.servicer.handlers.CountUnread = recording
+
+        token = await self._login("Alice", "secret")
+        resp = await self.stub.CountUnread(chat_service_pb2.CountUnreadRequest(auth_token=token))
+        self.assertEqual((resp.status, resp.unread_count), ("ok", 0))
+        self.assertTrue(ran_on[0].startswith("db"), f"❌ CountUnread ran on {ran_on[0]}")
+
+    async def test_abort_from_executor_reaches_client(self):
+        """context.abort() in a handler thread ends the call with that code and details."""
+        def refusing(request, context):
+            context.abort(grpc.StatusCode.PERMISSION_DENIED, "no unread counts today")
+        self.servicer.handlers.CountUnread = refusing
+
+        with self.assertRaises(grpc.aio.AioRpcError) as ctx:
+            await self.stub.CountUnread(chat_service_pb2.CountUnreadRequest(auth_token="x"))
+        self.assertEqual(ctx.exception.code(), grpc.StatusCode.PERMISSION_DENIED)
+        self.assertEqual(ctx.exception.details(), "no unread counts today")
+
+    async def test_expired_deadline_is_abandoned_on_the_executor(self):
+        """
+        1. ListMessages is already running on the database thread when the caller's deadline passes
+        2. It sees that through the executor context and gives up instead of querying
+        """
+        token = await self._login("Bob", "bobpass")
+        list_messages = self.servicer.handlers.ListMessages
+        def slow_start(request, context):
+            time.sleep(0.4)
+            return list_messages(request, context)
+        self.servicer.handlers.ListMessages = slow_start
+
+        with self.assertRaises(grpc.aio.AioRpcError) as ctx:
+            await self.stub.ListMessages(chat_service_pb2.ListMessagesRequest(auth_token=token, count=10), timeout=0.2)
+        self.assertEqual(ctx.exception.code(), grpc.StatusCode.DEADLINE_EXCEEDED)
+        await asyncio.sleep(0.5)
+        self.assertEqual(self.metrics.snapshot()[1]["ListMessages"]["abandoned"], 1)
+
+    async def test_subscribe_stream(self):
+        """
+        1. Bob subscribes; Alice's sends are published from the database thread
+        2. Both arrive on Bob's stream in order, and logging out ends it
+        """
+        alice = await self._login("Alice", "secret")
+        bob = await self._login("Bob", "bobpass")
+        stream = self.stub.Subscribe(chat_service_pb2.EmptyRequest(auth_token=bob), timeout=5)
+        await asyncio.sleep(0.2)  # let the server register the stream before anything is sent
+
+        for text in ("first", "second"):
+            resp = await self.stub.SendMessage(chat_service_pb2.SendMessageRequest(auth_token=alice, recipient="Bob", content=text))
+            self.assertEqual(resp.status, "ok")
+        pushed = [await stream.read(), await stream.read()]
+        self.assertEqual([m.content for m in pushed], ["first", "second"])
+
+        await self.stub.Logout(chat_service_pb2.EmptyRequest(auth_token=bob))
+        self.assertIs(await stream.read(), grpc.aio.EOF, "❌ The stream should end cleanly on logout")
+
+    async def test_subscribe_requires_login(self):
+        stream = self.stub.Subscribe(chat_service_pb2.EmptyRequest(auth_token="not-a-token"), timeout=5)
+        with self.assertRaises(grpc.aio.AioRpcError) as ctx:
+            await stream.read()
+        self.assertEqual(ctx.exception.code(), grpc.StatusCode.UNAUTHENTICATED)
+
+
+if __name__ == "__main__":
+    unittest.main()
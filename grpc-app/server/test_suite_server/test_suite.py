@@ -9,8 +9,20 @@ from test_6_test_invalid_login import TestInvalidLogin
 from test_7_auth_required import TestAuthenticationRequired
 from test_8_logout_login import TestLogoutLogin
 from test_9_send_messsages_to_client import TestSendMessagesToClient
-from server.test_suite_server.test_10_delete_account import TestDeleteAccount
-from server.test_suite_server.test_11_list_accounts import TestListAccounts
+from test_10_delete_account import TestDeleteAccount
+from test_11_list_accounts import TestListAccounts
+from test_12_sessions import TestSessionStore, TestSignedTokenStore, TestSqliteSessionStore
+from test_13_subscribe import TestSubscribe
+from test_14_bulk_send import TestBulkSend
+from test_15_stats import TestStats
+from test_16_keyset_paging import TestKeysetPaging, TestMessageCounts
+from test_17_cancellation import TestCancellation
+from test_18_rate_limit import TestRateLimiter, TestRateLimitInterceptor
+from test_19_workers import TestWorkers
+from test_20_batch import TestBatch, TestBatchTransaction
+from test_21_message_previews import TestMessagePreviews
+from test_22_compression import TestCompressionPolicy, TestCompressionInterceptor
+from test_23_aio_server import TestAioServer
 
 if __name__ == "__main__":
     unittest.TextTestRunner(verbosity=2).run(
@@ -25,6 +37,24 @@ if __name__ == "__main__":
             unittest.defaultTestLoader.loadTestsFromTestCase(TestLogoutLogin),
             unittest.defaultTestLoader.loadTestsFromTestCase(TestSendMessagesToClient),
             unittest.defaultTestLoader.loadTestsFromTestCase(TestDeleteAccount),
-            unittest.defaultTestLoader.loadTestsFromTestCase(TestListAccounts)
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestListAccounts),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestSessionStore),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestSqliteSessionStore),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestSignedTokenStore),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestSubscribe),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestBulkSend),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestStats),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestKeysetPaging),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestMessageCounts),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestCancellation),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestRateLimiter),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestRateLimitInterceptor),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestWorkers),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestBatch),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestBatchTransaction),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestMessagePreviews),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestCompressionPolicy),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestCompressionInterceptor),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestAioServer)
         ])
     )
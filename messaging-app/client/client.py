@@ -14,6 +14,9 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from protocol.protocol import Message, JSONProtocolHandler, CustomProtocolHandler
 
+# Well inside the server's default 300 s idle timeout.
+KEEPALIVE_SECS = 60
+
 
 class ChatServerClient:
     """
@@ -55,12 +58,23 @@ class ChatServerClient:
             message = Message(msg_type, data or {})
             self.protocol_handler.send(sock, message, is_response=False) # all client→server messages are requests
             response = self.protocol_handler.receive(sock)
+            st.session_state["last_request"] = time.time()
             return response.data if response else None
 
         except Exception as e:
             st.error(f"Error communicating with server: {e}")
+            # The server may have dropped us (e.g. idle timeout); reconnect on the next request.
+            sock.close()
+            del st.session_state["socket"]
             return None
 
+    def keepalive(self):
+        """Pings the server if nothing has been sent for KEEPALIVE_SECS."""
+        if "socket" not in st.session_state:
+            return
+        if time.time() - st.session_state.get("last_request", 0) >= KEEPALIVE_SECS:
+            self.send_request("ping", {})
+
     @staticmethod
     def hash_password(password):
         return hashlib.sha256(password.encode("utf-8")).hexdigest()
@@ -260,6 +274,49 @@ class StreamlitChatApp:
                 # Update unread count if needed
                 self._update_unread_count()
 
+    def show_group_message_page(self):
+        """
+        Page to create a group and to send one message to a whole group.
+        (The group name '*' broadcasts to every account.)
+        """
+        st.header("Group Messages")
+
+        st.subheader("Create a Group")
+        group_name = st.text_input("Group Name", key="new_group_name")
+        members_text = st.text_input("Members (comma-separated usernames)", key="new_group_members")
+        if st.button("Create Group"):
+            members = [m.strip() for m in members_text.split(",") if m.strip()]
+            if not group_name:
+                st.error("Please enter a group name.")
+                return
+            resp = self.client.send_request("create_group", {"group": group_name, "members": members})
+            if resp is None:
+                st.error("No response from server. Check that the server is running.")
+            elif resp.get("status") != "ok":
+                st.error(resp.get("msg", "Failed to create group."))
+            else:
+                st.success(resp.get("msg", "Group created!"))
+
+        st.subheader("Send to a Group")
+        target = st.text_input("Group Name (or * for everyone)", key="group_target")
+        group_text = st.text_area("Message", key="group_message_text")
+        if st.button("Send to Group"):
+            if not target or not group_text:
+                st.error("Please fill in all fields.")
+                return
+            data = {
+                "sender": st.session_state.username,
+                "group": target,
+                "content": group_text
+            }
+            resp = self.client.send_request("send_group_message", data)
+            if resp is None:
+                st.error("No response from server. Check that the server is running.")
+            elif resp.get("status") != "ok":
+                st.error(resp.get("msg", "Failed to send group message."))
+            else:
+                st.success(f"Message sent to {resp.get('recipient_count', 0)} recipient(s)!")
+
     def _auto_fetch_inbox(self):
         """
         Called every 5 seconds to fetch messages that arrived while the user was logged in.
@@ -567,17 +624,22 @@ class StreamlitChatApp:
         st.title("JoChat")
 
         if st.session_state.logged_in:
+            # Rerun at least once per keepalive period so an idle tab still pings.
+            st_autorefresh(interval=KEEPALIVE_SECS * 1000, key="keepalive_autorefresh")
+            self.client.keepalive()
             st.sidebar.markdown(f"**User: {st.session_state.username}**")
 
             menu = st.sidebar.radio(
                 "Navigation",
-                ["Home", "Send Message", "Inbox", "List Accounts", "Delete Account", "Logout"]
+                ["Home", "Send Message", "Group Messages", "Inbox", "List Accounts", "Delete Account", "Logout"]
             )
 
             if menu == "Home":
                 self.show_home_page()
             elif menu == "Send Message":
                 self.show_send_message_page()
+            elif menu == "Group Messages":
+                self.show_group_message_page()
             elif menu == "Inbox":
                 self.show_inbox_page()
             elif menu == "List Accounts":
@@ -51,7 +51,7 @@ class CustomProtocolHandler:
     
       [op_id:1 byte][is_response:1 byte] + [payload...]
     
-    Where op_id is the operation code (1=signup, 2=login, ... 11=reset_db),
+    Where op_id is the operation code (1=signup, 2=login, ... 14=ping),
     and is_response is (0=request, 1=response).
     
     For requests, parse the relevant fields. For responses, we typically parse:
@@ -72,6 +72,9 @@ class CustomProtocolHandler:
             9:  "delete_messages",
             10: "delete_account",
             11: "reset_db",
+            12: "create_group",
+            13: "send_group_message",
+            14: "ping",
             255:"failure"  # fallback
         }
         self.name_to_op = {v:k for k,v in self.op_to_name.items()}
@@ -212,6 +215,28 @@ class CustomProtocolHandler:
             elif msg_type == "reset_db":
                 pass
 
+            elif msg_type == "create_group":
+                # [group_len:1][group][member_count:2][each: [uname_len:1][uname]]
+                g_bytes = data.get("group", "").encode("utf-8")[:255]
+                members = data.get("members", [])[:65535]
+                packet += struct.pack("!B", len(g_bytes)) + g_bytes
+                packet += struct.pack("!H", len(members))
+                for member in members:
+                    m_bytes = member.encode("utf-8")[:255]
+                    packet += struct.pack("!B", len(m_bytes)) + m_bytes
+
+            elif msg_type == "send_group_message":
+                # [sender_len:1][sender][group_len:1][group][msg_len:2][message]
+                s_bytes = data.get("sender", "").encode("utf-8")
+                g_bytes = data.get("group", "").encode("utf-8")
+                c_bytes = data.get("content", "").encode("utf-8")
+                packet += struct.pack("!B", len(s_bytes)) + s_bytes
+                packet += struct.pack("!B", len(g_bytes)) + g_bytes
+                packet += struct.pack("!H", len(c_bytes)) + c_bytes
+
+            elif msg_type == "ping":
+                pass
+
             else:
                 # fallback/failure?
                 pass
@@ -411,6 +436,21 @@ class CustomProtocolHandler:
                 packet += struct.pack("!B", success_byte)
                 packet += encode_string_field(data.get("msg", ""))
 
+            elif msg_type == "create_group":
+                # [success:1][msg]
+                packet += struct.pack("!B", success_byte)
+                packet += encode_string_field(data.get("msg", ""))
+
+            elif msg_type == "send_group_message":
+                # [success:1][recipient_count:4][msg]
+                packet += struct.pack("!B", success_byte)
+                packet += struct.pack("!I", data.get("recipient_count", 0))
+                packet += encode_string_field(data.get("msg", ""))
+
+            elif msg_type == "ping":
+                # [success:1]
+                packet += struct.pack("!B", success_byte)
+
             elif msg_type == "failure":
                 # [error_len:2][error_message]
                 err_b = data.get("error_message", "unknown failure").encode("utf-8")
@@ -569,6 +609,61 @@ class CustomProtocolHandler:
             elif msg_type == "reset_db":
                 pass
 
+            elif msg_type == "create_group":
+                glen_b = self._recv_exact(conn, 1)
+                if not glen_b:
+                    return None
+                g_bytes = self._recv_exact(conn, glen_b[0])
+                if not g_bytes:
+                    return None
+
+                mcount_b = self._recv_exact(conn, 2)
+                if not mcount_b:
+                    return None
+                (mcount,) = struct.unpack("!H", mcount_b)
+                members = []
+                for _ in range(mcount):
+                    mlen_b = self._recv_exact(conn, 1)
+                    if not mlen_b:
+                        return None
+                    m_bytes = self._recv_exact(conn, mlen_b[0])
+                    if not m_bytes:
+                        return None
+                    members.append(m_bytes.decode("utf-8"))
+
+                data["group"] = g_bytes.decode("utf-8")
+                data["members"] = members
+
+            elif msg_type == "send_group_message":
+                slen_b = self._recv_exact(conn, 1)
+                if not slen_b:
+                    return None
+                s_bytes = self._recv_exact(conn, slen_b[0])
+                if not s_bytes:
+                    return None
+
+                glen_b = self._recv_exact(conn, 1)
+                if not glen_b:
+                    return None
+                g_bytes = self._recv_exact(conn, glen_b[0])
+                if not g_bytes:
+                    return None
+
+                msg_len_b = self._recv_exact(conn, 2)
+                if not msg_len_b:
+                    return None
+                (msg_len,) = struct.unpack("!H", msg_len_b)
+                content_bytes = self._recv_exact(conn, msg_len)
+                if not content_bytes:
+                    return None
+
+                data["sender"] = s_bytes.decode("utf-8")
+                data["group"] = g_bytes.decode("utf-8")
+                data["content"] = content_bytes.decode("utf-8")
+
+            elif msg_type == "ping":
+                pass
+
             elif msg_type == "failure":
                 # fallback
                 elen_b = self._recv_exact(conn, 2)
@@ -892,6 +987,36 @@ class CustomProtocolHandler:
                     return None
                 data["msg"] = msg_str
 
+            elif msg_type == "create_group":
+                success_b = self._recv_exact(conn, 1)
+                if not success_b:
+                    return None
+                data["status"] = "ok" if success_b[0] == 1 else "error"
+                msg_str = read_string_field()
+                if msg_str is None:
+                    return None
+                data["msg"] = msg_str
+
+            elif msg_type == "send_group_message":
+                success_b = self._recv_exact(conn, 1)
+                if not success_b:
+                    return None
+                data["status"] = "ok" if success_b[0] == 1 else "error"
+                count_b = self._recv_exact(conn, 4)
+                if not count_b:
+                    return None
+                (data["recipient_count"],) = struct.unpack("!I", count_b)
+                msg_str = read_string_field()
+                if msg_str is None:
+                    return None
+                data["msg"] = msg_str
+
+            elif msg_type == "ping":
+                success_b = self._recv_exact(conn, 1)
+                if not success_b:
+                    return None
+                data["status"] = "ok" if success_b[0] == 1 else "error"
+
             elif msg_type == "failure":
                 # [error_len:2][error_bytes]
                 elen_b = self._recv_exact(conn, 2)
@@ -2,6 +2,8 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from protocol.protocol import Message
 
+# Sending to this group name fans a message out to every registered user.
+BROADCAST_GROUP = "*"
 
 #############################
 # ACTION METHODS (ORDERED)
@@ -25,7 +27,10 @@ class ActionHandler:
             "list_accounts": self._action_list_accounts,
             "delete_messages": self._action_delete_messages,
             "delete_account": self._action_delete_account,
-            "reset_db": self._action_reset_db
+            "reset_db": self._action_reset_db,
+            "create_group": self._action_create_group,
+            "send_group_message": self._action_send_group_message,
+            "ping": self._action_ping
         }
         action = action_map.get(message.msg_type)
         if action:
@@ -40,12 +45,11 @@ class ActionHandler:
             self.protocol_handler.send(conn, Message("signup", {"status": "error", "msg": "Invalid data"}), is_response=1)
             return
         
-        result = self.db.execute("SELECT id FROM users WHERE username=?", (username,))
-        if result:
+        if self.db.user_exists(username):
             self.protocol_handler.send(conn, Message("signup", {"status": "error", "msg": "Username taken"}), is_response=1)
             return
 
-        self.db.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", (username, password), commit=True)
+        self.db.create_user(username, password)
         self.protocol_handler.send(conn, Message("signup", {"status": "ok", "msg": "Signup successful"}), is_response=1)
 
 
@@ -72,13 +76,12 @@ class ActionHandler:
                 self.protocol_handler.send(conn, Message("login", resp), is_response=1)
                 return
 
-        row = self.db.execute("SELECT password_hash FROM users WHERE username=?", (username,))
-        if not row:
+        stored_hash = self.db.get_password_hash(username)
+        if stored_hash is None:
             resp = {"status": "error", "msg": "Username not found."}
             self.protocol_handler.send(conn, Message("login", resp), is_response=1)
             return
 
-        stored_hash = row[0][0]
         if stored_hash != password_hash:
             resp = {"status": "error", "msg": "Wrong password."}
             self.protocol_handler.send(conn, Message("login", resp), is_response=1)
@@ -87,16 +90,12 @@ class ActionHandler:
         # Login success
         self.logged_in_users[client_id] = username
         # im not going to use the count action here because i dont want too many dependencies of actions on other actions.
-        unread_count = self.db.execute("""
-            SELECT COUNT(*) 
-            FROM messages 
-            WHERE recipient=? AND to_deliver=0
-        """, (username,))
+        unread_count = self.db.count_unread(username)
 
         resp = {
             "status": "ok",
             "msg": "Login successful.",
-            "unread_count": unread_count[0][0]
+            "unread_count": unread_count
         }
         self.protocol_handler.send(conn, Message("login", resp), is_response=1)
 
@@ -119,13 +118,7 @@ class ActionHandler:
             self.protocol_handler.send(conn, Message("count_unread", resp), is_response=1)
             return
 
-        result = self.db.execute("""
-            SELECT COUNT(*) 
-            FROM messages
-            WHERE recipient=? AND to_deliver=0
-        """, (current_user,))
-        
-        unread_count = result[0][0] if result else 0  # Handle empty result
+        unread_count = self.db.count_unread(current_user)
 
         resp = {
             "status": "ok",
@@ -152,8 +145,7 @@ class ActionHandler:
             self.protocol_handler.send(conn, Message("send_message", resp), is_response=1)
             return
 
-        row = self.db.execute("SELECT id FROM users WHERE username=?", (recipient,))
-        if not row:
+        if not self.db.user_exists(recipient):
             resp = {"status": "error", "msg": "Recipient does not exist."}
             self.protocol_handler.send(conn, Message("send_message", resp), is_response=1)
             return
@@ -163,10 +155,7 @@ class ActionHandler:
         delivered_value = 1 if recipient_is_logged_in else 0
 
         # Insert into messages with to_deliver=(0 or 1)
-        self.db.execute("""
-            INSERT INTO messages (sender, recipient, content, to_deliver)
-            VALUES (?, ?, ?, ?)
-        """, (sender, recipient, content, delivered_value))
+        self.db.store_message(sender, recipient, content, delivered_value)
 
         resp = {"status": "ok", "msg": "Message stored."}
         self.protocol_handler.send(conn, Message("send_message", resp), is_response=1)
@@ -181,12 +170,7 @@ class ActionHandler:
             self.protocol_handler.send(conn, Message("send_messages_to_client", resp), is_response=1)
             return
 
-        rows = self.db.execute("""
-            SELECT id, sender, content, to_deliver
-            FROM messages
-            WHERE recipient=? AND to_deliver=1
-            ORDER BY id ASC
-        """, (current_user,))
+        rows = self.db.delivered_messages(current_user)
 
         results = []
         for (msg_id, snd, content, to_deliver) in rows:
@@ -217,21 +201,8 @@ class ActionHandler:
             self.protocol_handler.send(conn, Message("fetch_away_msgs", resp), is_response=1)
 
 
-        # Find messages that have not been delivered yet
-        rows = self.db.execute("""
-            SELECT id, sender, content
-            FROM messages
-            WHERE recipient=? AND to_deliver=0
-            ORDER BY id ASC
-            LIMIT ?
-        """, (current_user, limit))
-
-        # Mark them delivered
-        message_ids = [str(r[0]) for r in rows]
-        if message_ids:
-            placeholders = ",".join(["?"] * len(message_ids))
-            query = f"UPDATE messages SET to_deliver=1 WHERE id IN ({placeholders})"
-            self.db.execute(query, message_ids)
+        # Find messages that have not been delivered yet and mark them delivered
+        rows = self.db.take_away_messages(current_user, limit)
 
         # Build the list to send back
         fetched_messages = []
@@ -256,8 +227,6 @@ class ActionHandler:
             self.protocol_handler.send(conn, Message("list_accounts", resp), is_response=1)
             return
 
-        # Build the SQL search pattern.
-        sql_pattern = f"%{pattern}%"
         try:
             start = int(data.get("start", 0))
             count = int(data.get("count", 10))
@@ -266,15 +235,7 @@ class ActionHandler:
             self.protocol_handler.send(conn, Message("list_accounts", resp), is_response=1)
             return
 
-        # Inline the LIMIT and OFFSET values into the query string.
-        query = f"""
-            SELECT id, username 
-            FROM users 
-            WHERE username LIKE ?
-            ORDER BY username 
-            LIMIT {count} OFFSET {start}
-        """
-        rows = self.db.execute(query, (sql_pattern,)) or []
+        rows = self.db.list_users(pattern, start, count)
 
         # Build a list of (id, username) tuples.
         matched = [(row[0], row[1]) for row in rows]
@@ -297,11 +258,7 @@ class ActionHandler:
             self.protocol_handler.send(conn, Message("delete_messages", resp), is_response=1)
             return
 
-        placeholders = ",".join(["?"] * len(message_ids))
-        query = f"DELETE FROM messages WHERE id IN ({placeholders}) AND recipient=?"
-        params = message_ids + [current_user]
-
-        deleted_count = self.db.execute(query, params, commit=True)
+        deleted_count = self.db.delete_messages(current_user, message_ids)
 
         resp = {
             "status": "ok",
@@ -319,10 +276,8 @@ class ActionHandler:
             self.protocol_handler.send(conn, Message("delete_account", resp), is_response=1)
             return
 
-        # Delete all messages from AND to this user
-        self.db.execute("DELETE FROM messages WHERE sender=? OR recipient=?", (current_user, current_user))
-        # Delete the user record
-        self.db.execute("DELETE FROM users WHERE username=?", (current_user,))
+        # Delete the user record and all messages from AND to this user
+        self.db.delete_user(current_user)
 
         del self.logged_in_users[client_id]
         resp = {
@@ -334,26 +289,94 @@ class ActionHandler:
     # 11) reset_db
     def _action_reset_db(self, client_id, data, conn):
         # print("Resetting database upon client request...")
-        self.db.execute("DROP TABLE IF EXISTS users;")
-        self.db.execute("DROP TABLE IF EXISTS messages;")
-
-        self.db.execute("""
-            CREATE TABLE users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL
-            );
-        """)
-
-        self.db.execute("""
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sender TEXT,
-                recipient TEXT,
-                content TEXT,
-                to_deliver INTEGER DEFAULT 0
-            );
-        """)
+        self.db.reset()
 
         resp = {"status": "ok", "msg": "Database reset."}
-        self.protocol_handler.send(conn, Message("reset_db", resp), is_response=1)
\ No newline at end of file
+        self.protocol_handler.send(conn, Message("reset_db", resp), is_response=1)
+
+    # 12) create_group
+    def _action_create_group(self, client_id, data, conn):
+        current_user = self.logged_in_users.get(client_id)
+        if not current_user:
+            resp = {"status": "error", "msg": "You are not currently logged in."}
+            self.protocol_handler.send(conn, Message("create_group", resp), is_response=1)
+            return
+
+        name = data.get("group")
+        members = data.get("members", [])
+        if not name or name == BROADCAST_GROUP or not isinstance(members, list):
+            resp = {"status": "error", "msg": "Invalid group data."}
+            self.protocol_handler.send(conn, Message("create_group", resp), is_response=1)
+            return
+
+        if self.db.group_id(name) is not None:
+            resp = {"status": "error", "msg": "Group name taken."}
+            self.protocol_handler.send(conn, Message("create_group", resp), is_response=1)
+            return
+
+        # The creator is always a member.
+        members = sorted(set(members) | {current_user})
+        unknown = set(members) - self.db.existing_users(members)
+        if unknown:
+            resp = {"status": "error", "msg": f"Unknown members: {', '.join(sorted(unknown))}"}
+            self.protocol_handler.send(conn, Message("create_group", resp), is_response=1)
+            return
+
+        self.db.create_group(name, current_user, members)
+        resp = {"status": "ok", "msg": f"Group created with {len(members)} members."}
+        self.protocol_handler.send(conn, Message("create_group", resp), is_response=1)
+
+    # 13) send_group_message
+    #    - one body row in group_messages, one small pointer row in messages per recipient.
+    def _action_send_group_message(self, client_id, data, conn):
+        sender = data.get("sender")
+        group_name = data.get("group")
+        content = data.get("content")
+
+        if not sender or not group_name or not content:
+            resp = {"status": "error", "msg": "Sender, group, and content required."}
+            self.protocol_handler.send(conn, Message("send_group_message", resp), is_response=1)
+            return
+
+        current_user = self.logged_in_users.get(client_id)
+        if current_user != sender:
+            resp = {"status": "error", "msg": "You are not logged in as this sender."}
+            self.protocol_handler.send(conn, Message("send_group_message", resp), is_response=1)
+            return
+
+        if group_name == BROADCAST_GROUP:
+            group_id = None
+            recipients = self.db.all_usernames(exclude=sender)
+        else:
+            group_id = self.db.group_id(group_name)
+            if group_id is None:
+                resp = {"status": "error", "msg": "Group does not exist."}
+                self.protocol_handler.send(conn, Message("send_group_message", resp), is_response=1)
+                return
+            if not self.db.is_group_member(group_id, sender):
+                resp = {"status": "error", "msg": "You are not a member of this group."}
+                self.protocol_handler.send(conn, Message("send_group_message", resp), is_response=1)
+                return
+            recipients = self.db.group_recipients(group_id, exclude=sender)
+
+        if not recipients:
+            resp = {"status": "error", "msg": "No recipients in group."}
+            self.protocol_handler.send(conn, Message("send_group_message", resp), is_response=1)
+            return
+
+        # Same delivery rule as send_message, decided per recipient.
+        online = set(self.logged_in_users.values())
+        deliveries = [(r, 1 if r in online else 0) for r in recipients]
+        self.db.store_group_message(group_id, sender, content, deliveries)
+
+        resp = {
+            "status": "ok",
+            "msg": f"Message stored for {len(recipients)} recipients.",
+            "recipient_count": len(recipients)
+        }
+        self.protocol_handler.send(conn, Message("send_group_message", resp), is_response=1)
+
+    # 14) ping
+    #    - keepalive; receiving the frame is what resets the connection's idle timer.
+    def _action_ping(self, client_id, data, conn):
+        self.protocol_handler.send(conn, Message("ping", {"status": "ok"}), is_response=1)
@@ -0,0 +1,147 @@
+import struct
+import threading
+import time
+
+# Capture file layout (all integers big-endian):
+#   header: [magic:4 "MCAP"][version:1][protocol:1 (0=custom, 1=json)]
+#   record: [conn_id:4][recv_us:8][service_us:4][in_len:4][out_len:4][in bytes][out bytes]
+# recv_us is when the request frame finished arriving, relative to the start of the
+# capture; service_us is how long the server took until it started sending the response.
+# out bytes hold everything the server wrote back for that request (may be empty).
+MAGIC = b"MCAP"
+VERSION = 1
+HEADER = struct.Struct("!4sBB")
+RECORD = struct.Struct("!IQIII")
+PROTOCOL_IDS = {"custom": 0, "json": 1}
+
+
+class CaptureRecord:
+    def __init__(self, conn_id, recv_us, service_us, request, response):
+        self.conn_id = conn_id
+        self.recv_us = recv_us
+        self.service_us = service_us
+        self.request = request
+        self.response = response
+
+    def __repr__(self):
+        return f"<CaptureRecord conn={self.conn_id} t={self.recv_us}us in={len(self.request)}B out={len(self.response)}B>"
+
+
+class CaptureConnection:
+    """
+    Wraps a client socket and keeps the bytes read and written since the last take(),
+    so a request frame and its response can be logged without the protocol handlers
+    knowing. Anything else is passed through to the socket.
+
+    The response time is taken before the first write, not after: the client may
+    already have sent its next request by the time sendall returns, and replay relies
+    on a response never looking later than a request that depended on it.
+    """
+    def __init__(self, conn, clock):
+        self._conn = conn
+        self._clock = clock
+        self._inbound = bytearray()
+        self._outbound = bytearray()
+        self._sent_us = None
+
+    def recv(self, nbytes):
+        chunk = self._conn.recv(nbytes)
+        self._inbound.extend(chunk)
+        return chunk
+
+    def sendall(self, data):
+        if self._sent_us is None:
+            self._sent_us = self._clock()
+        self._outbound.extend(data)
+        return self._conn.sendall(data)
+
+    def take(self):
+        """Returns (inbound, outbound, first send time) since the last call and clears them."""
+        inbound, outbound, sent_us = bytes(self._inbound), bytes(self._outbound), self._sent_us
+        self._inbound.clear()
+        self._outbound.clear()
+        self._sent_us = None
+        return inbound, outbound, sent_us
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class BufferConnection:
+    """A socket stand-in over an in-memory buffer, for encoding and decoding frames offline."""
+    def __init__(self, data=b""):
+        self.data = bytearray(data)
+        self.written = bytearray()
+
+    def recv(self, nbytes):
+        chunk = bytes(self.data[:nbytes])
+        del self.data[:nbytes]
+        return chunk
+
+    def sendall(self, data):
+        self.written.extend(data)
+
+
+class TrafficCapture:
+    """Appends request/response records to a capture file; safe to share between client threads."""
+    def __init__(self, path, protocol="custom"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.conn_ids = {}
+        self.next_conn_id = 0
+        self.records = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, PROTOCOL_IDS[protocol]))
+
+    def now_us(self):
+        return int((time.perf_counter() - self.start) * 1_000_000)
+
+    def record(self, client_id, recv_us, request, response, sent_us=None):
+        # Requests that got no response count as served once the handler returned.
+        service_us = (self.now_us() if sent_us is None else sent_us) - recv_us
+        with self.lock:
+            # Addresses are reused over a long capture; number connections in arrival order.
+            conn_id = self.conn_ids.get(client_id)
+            if conn_id is None:
+                conn_id = self.conn_ids[client_id] = self.next_conn_id
+                self.next_conn_id += 1
+            self.file.write(RECORD.pack(conn_id, recv_us, service_us, len(request), len(response)))
+            self.file.write(request)
+            self.file.write(response)
+            # Flush per record so a killed server still leaves a replayable file.
+            self.file.flush()
+            self.records += 1
+
+    def forget(self, client_id):
+        """Called when a client disconnects, so a new connection from the same address gets a new id."""
+        with self.lock:
+            self.conn_ids.pop(client_id, None)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_capture(path):
+    """Returns (protocol, [CaptureRecord, ...]) sorted by arrival time."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    magic, version, protocol_id = HEADER.unpack_from(raw, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} capture file")
+    protocol = {v: k for k, v in PROTOCOL_IDS.items()}[protocol_id]
+
+    records = []
+    offset = HEADER.size
+    while offset + RECORD.size <= len(raw):
+        conn_id, recv_us, service_us, in_len, out_len = RECORD.unpack_from(raw, offset)
+        offset += RECORD.size
+        request = raw[offset:offset + in_len]
+        response = raw[offset + in_len:offset + in_len + out_len]
+        offset += in_len + out_len
+        if len(request) + len(response) < in_len + out_len:
+            break  # the server was killed mid-record
+        records.append(CaptureRecord(conn_id, recv_us, service_us, request, response))
+    records.sort(key=lambda r: r.recv_us)
+    return protocol, records
@@ -1,10 +1,39 @@
 import sqlite3
+import heapq
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 class Database:
     def __init__(self, db_name="chat.db"):
+        self.db_name = db_name
         self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        self._enable_incremental_vacuum()
         self._init_db()
 
+    def _enable_incremental_vacuum(self):
+        """
+        Lets the maintenance task hand free pages back to the OS in small slices.
+        The pragma only takes on a file with no tables yet; an older chat.db keeps its
+        mode until convert_to_incremental_vacuum() is run on it once.
+        """
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:  # 2 = INCREMENTAL
+            print(f"[database] {self.db_name} was created without incremental vacuum, so free pages stay in the file. "
+                  f"Convert it once with `python server.py --convert-vacuum` while the server is stopped.")
+
+    def convert_to_incremental_vacuum(self):
+        """
+        One-off migration for a file created without incremental vacuum. It is a full
+        VACUUM: the whole file is rewritten, writers are blocked until it finishes and
+        it needs up to the file's size again in free disk space. Returns the seconds taken.
+        """
+        started = time.monotonic()
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.execute("VACUUM")
+        return time.monotonic() - started
+
     def _init_db(self):
         c = self.conn.cursor()
         c.execute("""
@@ -14,17 +43,66 @@ class Database:
                 password_hash TEXT NOT NULL
             );
         """)
+        # group_message_id points at the shared body in group_messages;
+        # content is NULL on those rows so a fan-out stores the text only once.
         c.execute("""
             CREATE TABLE IF NOT EXISTS messages (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 sender TEXT,
                 recipient TEXT,
                 content TEXT,
-                to_deliver INTEGER DEFAULT 0
+                to_deliver INTEGER DEFAULT 0,
+                group_message_id INTEGER DEFAULT NULL,
+                created_at INTEGER DEFAULT (strftime('%s', 'now'))
+            );
+        """)
+        self._ensure_column("messages", "group_message_id", "INTEGER DEFAULT NULL")
+        if self._ensure_column("messages", "created_at", "INTEGER DEFAULT NULL"):
+            # Rows from before the column have no recorded age; count it from now rather
+            # than letting the archiver treat them as old.
+            c.execute("UPDATE messages SET created_at = strftime('%s', 'now') WHERE created_at IS NULL")
+            # ALTER TABLE cannot add a non-constant default, so stamp new rows instead.
+            c.execute("""
+                CREATE TRIGGER IF NOT EXISTS messages_created_at AFTER INSERT ON messages
+                WHEN NEW.created_at IS NULL
+                BEGIN
+                    UPDATE messages SET created_at = strftime('%s', 'now') WHERE id = NEW.id;
+                END;
+            """)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS groups (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                owner TEXT NOT NULL
+            );
+        """)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS group_members (
+                group_id INTEGER NOT NULL,
+                username TEXT NOT NULL,
+                PRIMARY KEY (group_id, username)
             );
         """)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS group_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                group_id INTEGER,
+                sender TEXT,
+                content TEXT
+            );
+        """)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_messages_group ON messages (group_message_id);")
         self.conn.commit()
 
+    def _ensure_column(self, table, column, decl):
+        """Adds a column to a table created by an older version of this schema."""
+        c = self.conn.cursor()
+        existing = [row[1] for row in c.execute(f"PRAGMA table_info({table})")]
+        if column in existing:
+            return False
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+        return True
+
     def execute(self, query, params=(), commit=False):
         c = self.conn.cursor()
         c.execute(query, params)
@@ -33,3 +111,273 @@ class Database:
         if query.strip().upper().startswith("SELECT"):
             return c.fetchall()
         return c.rowcount
+
+    # Queries used by ActionHandler. ShardedDatabase offers the same methods,
+    # so the handler never needs to know where a row lives.
+
+    def get_password_hash(self, username):
+        rows = self.execute("SELECT password_hash FROM users WHERE username=?", (username,))
+        return rows[0][0] if rows else None
+
+    def user_exists(self, username):
+        return bool(self.execute("SELECT id FROM users WHERE username=?", (username,)))
+
+    def existing_users(self, usernames):
+        if not usernames:
+            return set()
+        placeholders = ",".join(["?"] * len(usernames))
+        rows = self.execute(f"SELECT username FROM users WHERE username IN ({placeholders})", list(usernames))
+        return {r[0] for r in rows}
+
+    def all_usernames(self, exclude=None):
+        return [r[0] for r in self.execute("SELECT username FROM users WHERE username IS NOT ?", (exclude,))]
+
+    def create_user(self, username, password_hash):
+        self.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", (username, password_hash), commit=True)
+
+    def list_users(self, pattern, start, count):
+        # Inline the LIMIT and OFFSET values into the query string.
+        return self.execute(f"""
+            SELECT id, username
+            FROM users
+            WHERE username LIKE ?
+            ORDER BY username
+            LIMIT {int(count)} OFFSET {int(start)}
+        """, (f"%{pattern}%",)) or []
+
+    def count_unread(self, username):
+        result = self.execute("""
+            SELECT COUNT(*)
+            FROM messages
+            WHERE recipient=? AND to_deliver=0
+        """, (username,))
+        return result[0][0] if result else 0
+
+    def store_message(self, sender, recipient, content, to_deliver):
+        self.execute("""
+            INSERT INTO messages (sender, recipient, content, to_deliver)
+            VALUES (?, ?, ?, ?)
+        """, (sender, recipient, content, to_deliver), commit=True)
+
+    def delivered_messages(self, username):
+        # Group messages keep their text in group_messages; follow the pointer.
+        return self.execute("""
+            SELECT m.id, m.sender, COALESCE(m.content, g.content), m.to_deliver
+            FROM messages m
+            LEFT JOIN group_messages g ON g.id = m.group_message_id
+            WHERE m.recipient=? AND m.to_deliver=1
+            ORDER BY m.id ASC
+        """, (username,))
+
+    def take_away_messages(self, username, limit):
+        """Returns up to `limit` undelivered messages and marks them delivered."""
+        rows = self.execute("""
+            SELECT m.id, m.sender, COALESCE(m.content, g.content)
+            FROM messages m
+            LEFT JOIN group_messages g ON g.id = m.group_message_id
+            WHERE m.recipient=? AND m.to_deliver=0
+            ORDER BY m.id ASC
+            LIMIT ?
+        """, (username, limit))
+
+        message_ids = [r[0] for r in rows]
+        if message_ids:
+            placeholders = ",".join(["?"] * len(message_ids))
+            self.execute(f"UPDATE messages SET to_deliver=1 WHERE id IN ({placeholders})", message_ids, commit=True)
+        return rows
+
+    def delete_messages(self, username, message_ids):
+        """Deletes the given messages if they were sent to `username`; returns how many went."""
+        placeholders = ",".join(["?"] * len(message_ids))
+        params = list(message_ids) + [username]
+        body_rows = self.execute(f"""
+            SELECT DISTINCT group_message_id
+            FROM messages
+            WHERE id IN ({placeholders}) AND recipient=? AND group_message_id IS NOT NULL
+        """, params)
+
+        deleted_count = self.execute(f"DELETE FROM messages WHERE id IN ({placeholders}) AND recipient=?", params, commit=True)
+        self.prune_group_bodies([r[0] for r in body_rows])
+        return deleted_count
+
+    def delete_user(self, username):
+        """Removes the user and every message from or to them."""
+        self.execute("DELETE FROM messages WHERE sender=? OR recipient=?", (username, username))
+        self.execute("DELETE FROM group_messages WHERE sender=?", (username,))
+        self.execute("DELETE FROM group_members WHERE username=?", (username,))
+        self.prune_group_bodies()
+        self.execute("DELETE FROM users WHERE username=?", (username,), commit=True)
+
+    def reset(self):
+        for table in ("users", "messages", "groups", "group_members", "group_messages"):
+            self.execute(f"DROP TABLE IF EXISTS {table};")
+        self._init_db()
+
+    def group_id(self, name):
+        rows = self.execute("SELECT id FROM groups WHERE name=?", (name,))
+        return rows[0][0] if rows else None
+
+    def is_group_member(self, group_id, username):
+        return bool(self.execute("SELECT 1 FROM group_members WHERE group_id=? AND username=?", (group_id, username)))
+
+    def group_recipients(self, group_id, exclude=None):
+        rows = self.execute("SELECT username FROM group_members WHERE group_id=? AND username IS NOT ?", (group_id, exclude))
+        return [r[0] for r in rows]
+
+    def prune_group_bodies(self, body_ids=None):
+        """Drops group message bodies that no recipient points at anymore."""
+        if body_ids is not None and not body_ids:
+            return
+        query = """
+            DELETE FROM group_messages
+            WHERE NOT EXISTS (SELECT 1 FROM messages WHERE group_message_id = group_messages.id)
+        """
+        params = ()
+        if body_ids:
+            query += f" AND id IN ({','.join(['?'] * len(body_ids))})"
+            params = tuple(body_ids)
+        self.execute(query, params, commit=True)
+
+    def create_group(self, name, owner, members):
+        with self.conn:
+            c = self.conn.cursor()
+            c.execute("INSERT INTO groups (name, owner) VALUES (?, ?)", (name, owner))
+            group_id = c.lastrowid
+            c.executemany(
+                "INSERT OR IGNORE INTO group_members (group_id, username) VALUES (?, ?)",
+                [(group_id, m) for m in members]
+            )
+        return group_id
+
+    def store_group_message(self, group_id, sender, content, deliveries):
+        """
+        Stores the content once and a pointer row per (recipient, to_deliver) pair,
+        all in one transaction.
+        """
+        with self.conn:
+            c = self.conn.cursor()
+            c.execute(
+                "INSERT INTO group_messages (group_id, sender, content) VALUES (?, ?, ?)",
+                (group_id, sender, content)
+            )
+            body_id = c.lastrowid
+            c.executemany(
+                "INSERT INTO messages (sender, recipient, content, to_deliver, group_message_id) VALUES (?, ?, NULL, ?, ?)",
+                [(sender, recipient, to_deliver, body_id) for recipient, to_deliver in deliveries]
+            )
+        return body_id
+
+
+class ShardedDatabase:
+    """
+    Spreads users and messages over several SQLite files so inserts for different
+    recipients do not queue behind one writer lock.
+
+    A user's row and every message addressed to them live on shard
+    crc32(username) % num_shards, so login, unread counts and fetches touch one file.
+    Queries that cannot be routed (list_users, delete_user, broadcast recipients)
+    run on every shard in parallel and the results are merged. Group definitions
+    are small and live on shard 0; group bodies are stored once per shard that
+    holds a recipient.
+    """
+    def __init__(self, db_name="chat.db", num_shards=4):
+        stem, ext = os.path.splitext(db_name)
+        self.shards = [Database(f"{stem}_shard{i}{ext or '.db'}") for i in range(num_shards)]
+        self.pool = ThreadPoolExecutor(max_workers=num_shards)
+
+    def shard_index(self, username):
+        # crc32 rather than hash(), which is salted per process.
+        return zlib.crc32(username.encode("utf-8")) % len(self.shards)
+
+    def shard_for(self, username):
+        return self.shards[self.shard_index(username)]
+
+    @property
+    def catalog(self):
+        return self.shards[0]
+
+    def _scatter(self, fn):
+        """Runs fn(shard) on every shard concurrently and returns results in shard order."""
+        return list(self.pool.map(fn, self.shards))
+
+    def _by_shard(self, usernames):
+        buckets = {}
+        for username in usernames:
+            buckets.setdefault(self.shard_index(username), []).append(username)
+        return buckets
+
+    def get_password_hash(self, username):
+        return self.shard_for(username).get_password_hash(username)
+
+    def user_exists(self, username):
+        return self.shard_for(username).user_exists(username)
+
+    def existing_users(self, usernames):
+        found = set()
+        for index, names in self._by_shard(usernames).items():
+            found |= self.shards[index].existing_users(names)
+        return found
+
+    def all_usernames(self, exclude=None):
+        return [u for names in self._scatter(lambda s: s.all_usernames(exclude)) for u in names]
+
+    def create_user(self, username, password_hash):
+        self.shard_for(username).create_user(username, password_hash)
+
+    def list_users(self, pattern, start, count):
+        start, count = max(int(start), 0), int(count)
+        # Each shard returns its first start+count matches; the global page is in their union.
+        per_shard = -1 if count < 0 else start + count
+        results = self._scatter(lambda s: s.list_users(pattern, 0, per_shard))
+
+        # Shard-local ids collide, so interleave them into one id space.
+        n = len(self.shards)
+        tagged = [[(username, local_id * n + i) for local_id, username in rows] for i, rows in enumerate(results)]
+        merged = list(heapq.merge(*tagged))
+        page = merged[start:] if count < 0 else merged[start:start + count]
+        return [(global_id, username) for username, global_id in page]
+
+    def count_unread(self, username):
+        return self.shard_for(username).count_unread(username)
+
+    def store_message(self, sender, recipient, content, to_deliver):
+        self.shard_for(recipient).store_message(sender, recipient, content, to_deliver)
+
+    def delivered_messages(self, username):
+        return self.shard_for(username).delivered_messages(username)
+
+    def take_away_messages(self, username, limit):
+        return self.shard_for(username).take_away_messages(username, limit)
+
+    def delete_messages(self, username, message_ids):
+        return self.shard_for(username).delete_messages(username, message_ids)
+
+    def delete_user(self, username):
+        # Messages the user sent sit on their recipients' shards.
+        self._scatter(lambda s: s.delete_user(username))
+
+    def reset(self):
+        self._scatter(lambda s: s.reset())
+
+    def group_id(self, name):
+        return self.catalog.group_id(name)
+
+    def is_group_member(self, group_id, username):
+        return self.catalog.is_group_member(group_id, username)
+
+    def group_recipients(self, group_id, exclude=None):
+        return self.catalog.group_recipients(group_id, exclude)
+
+    def create_group(self, name, owner, members):
+        return self.catalog.create_group(name, owner, members)
+
+    def store_group_message(self, group_id, sender, content, deliveries):
+        buckets = {}
+        for recipient, to_deliver in deliveries:
+            buckets.setdefault(self.shard_index(recipient), []).append((recipient, to_deliver))
+        futures = [
+            self.pool.submit(self.shards[index].store_group_message, group_id, sender, content, part)
+            for index, part in buckets.items()
+        ]
+        for f in futures:
+            f.result()
@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import threading
+import time
+
+# How long the maintenance connection waits for a lock before giving the slice up.
+LOCK_TIMEOUT_SECS = 0.05
+
+
+class MaintenanceTask:
+    """
+    Background housekeeping for the messages table, on its own thread and connection:
+      - moves delivered messages (to_deliver=1) older than archive_after_secs into
+        messages_archive in a separate archive file, so the hot table and its
+        indexes only hold recent history (rows of unknown age are left alone),
+      - runs PRAGMA incremental_vacuum a few pages at a time, up to max_vacuum_pages
+        per run, so chat.db shrinks after archiving and delete_messages.
+
+    Every step is a small slice followed by a pause, and the connection gives up
+    on a busy lock almost immediately, so foreground requests never wait on it.
+    """
+    def __init__(self, db_name, archive_name=None, archive_after_secs=30 * 24 * 3600,
+                 interval_secs=300, batch_size=500, vacuum_pages=64, max_vacuum_pages=4096, pause_secs=0.05):
+        self.db_name = db_name
+        self.archive_name = archive_name or f"{os.path.splitext(db_name)[0]}_archive.db"
+        self.archive_after_secs = archive_after_secs
+        self.interval_secs = interval_secs
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.max_vacuum_pages = max_vacuum_pages   # per run, so a large backlog is spread over runs
+        self.pause_secs = pause_secs
+
+        self.stats = {"runs": 0, "archived": 0, "reclaimed_pages": 0, "skipped_slices": 0}
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+
+        self.conn = sqlite3.connect(db_name, timeout=LOCK_TIMEOUT_SECS, check_same_thread=False)
+        self.conn.execute("ATTACH DATABASE ? AS archive", (self.archive_name,))
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive.messages_archive (
+                id INTEGER PRIMARY KEY,
+                sender TEXT,
+                recipient TEXT,
+                content TEXT,
+                created_at INTEGER,
+                archived_at INTEGER
+            );
+        """)
+        self.conn.commit()
+        # Without incremental auto_vacuum the pragma frees nothing (see Database.convert_to_incremental_vacuum).
+        self.incremental = self.conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] == 2
+        if not self.incremental:
+            print(f"[maintenance] {db_name} is not in incremental vacuum mode; archiving only")
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_secs):
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                print(f"[maintenance] run failed: {e}")
+
+    def run_once(self):
+        """Archives, then vacuums up to max_vacuum_pages; either stops early when a slice is refused."""
+        archived = self._archive_old_messages()
+        reclaimed = self._incremental_vacuum()
+        self.stats["runs"] += 1
+        self.stats["archived"] += archived
+        self.stats["reclaimed_pages"] += reclaimed
+
+        page_size = self.conn.execute("PRAGMA main.page_size").fetchone()[0]
+        print(f"[maintenance] archived {archived} message(s), reclaimed {reclaimed} page(s) "
+              f"({reclaimed * page_size} bytes), {self._freelist_count()} free page(s) left")
+        return archived, reclaimed
+
+    def _archive_old_messages(self):
+        cutoff = int(time.time() - self.archive_after_secs)
+        total = 0
+        while not self._stop.is_set():
+            try:
+                # Take the write lock up front so nothing changes between SELECT and DELETE.
+                self.conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError:
+                self.stats["skipped_slices"] += 1
+                break
+            try:
+                rows = self.conn.execute("""
+                    SELECT m.id, m.sender, m.recipient, COALESCE(m.content, g.content),
+                           m.created_at, m.group_message_id
+                    FROM main.messages m
+                    LEFT JOIN main.group_messages g ON g.id = m.group_message_id
+                    WHERE m.to_deliver=1 AND m.created_at < ?
+                    ORDER BY m.id ASC
+                    LIMIT ?
+                """, (cutoff, self.batch_size)).fetchall()
+                if rows:
+                    now = int(time.time())
+                    self.conn.executemany("""
+                        INSERT OR REPLACE INTO archive.messages_archive
+                            (id, sender, recipient, content, created_at, archived_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, [(r[0], r[1], r[2], r[3], r[4], now) for r in rows])
+
+                    ids = [r[0] for r in rows]
+                    self.conn.execute(
+                        f"DELETE FROM main.messages WHERE id IN ({','.join(['?'] * len(ids))})", ids
+                    )
+                    body_ids = sorted({r[5] for r in rows if r[5] is not None})
+                    if body_ids:
+                        self.conn.execute(f"""
+                            DELETE FROM main.group_messages
+                            WHERE id IN ({','.join(['?'] * len(body_ids))})
+                              AND NOT EXISTS (SELECT 1 FROM main.messages WHERE group_message_id = group_messages.id)
+                        """, body_ids)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+            total += len(rows)
+            if len(rows) < self.batch_size:
+                break
+            time.sleep(self.pause_secs)
+        return total
+
+    def _incremental_vacuum(self):
+        """Hands back at most max_vacuum_pages free pages, stopping early once a slice frees nothing."""
+        if not self.incremental:
+            return 0
+        before = left = self._freelist_count()
+        while not self._stop.is_set() and left > 0 and before - left < self.max_vacuum_pages:
+            pages = min(self.vacuum_pages, self.max_vacuum_pages - (before - left))
+            try:
+                # Each step of the pragma frees one page, so the rows must be drained.
+                self.conn.execute(f"PRAGMA main.incremental_vacuum({int(pages)})").fetchall()
+            except sqlite3.OperationalError:
+                self.stats["skipped_slices"] += 1
+                break
+            remaining = self._freelist_count()
+            if remaining >= left:
+                break
+            left = remaining
+            time.sleep(self.pause_secs)
+        return before - left
+
+    def _freelist_count(self):
+        return self.conn.execute("PRAGMA main.freelist_count").fetchone()[0]
@@ -0,0 +1,189 @@
+import argparse
+import queue
+import socket
+import threading
+import time
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from protocol.protocol import JSONProtocolHandler, CustomProtocolHandler
+
+from capture import read_capture, BufferConnection
+
+# How long replay waits on a connection, or for a response, before counting the request as failed.
+DEFAULT_TIMEOUT_SECS = 5.0
+
+
+def decode_response(handler, raw):
+    """Decodes a captured response frame; returns None when nothing was sent."""
+    if not raw:
+        return None
+    return handler.receive(BufferConnection(raw))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class ReplayReport:
+    def __init__(self, records):
+        self.requests = len(records)
+        self.mismatches = []        # [(record index, expected Message, actual Message)]
+        self.errors = []            # [(record index, error text)]
+        self.latencies_ms = [None] * len(records)
+        self.captured_ms = [r.service_us / 1000 for r in records]
+        span = (records[-1].recv_us - records[0].recv_us) / 1_000_000 if records else 0
+        self.captured_secs = span
+        self.replay_secs = 0.0
+
+    @property
+    def captured_rps(self):
+        return self.requests / self.captured_secs if self.captured_secs else float("inf")
+
+    @property
+    def replay_rps(self):
+        return self.requests / self.replay_secs if self.replay_secs else float("inf")
+
+    def summary(self):
+        replayed = [l for l in self.latencies_ms if l is not None]
+        lines = [
+            f"requests:   {self.requests} replayed, {len(self.mismatches)} mismatched, {len(self.errors)} failed",
+            f"throughput: captured {self.captured_rps:.1f} req/s, replay {self.replay_rps:.1f} req/s "
+            f"({self.replay_secs:.3f}s wall clock)",
+        ]
+        for pct in (50, 95, 99):
+            captured, replay = percentile(self.captured_ms, pct), percentile(replayed, pct)
+            lines.append(f"p{pct} latency: captured {captured:.3f} ms, replay {replay:.3f} ms "
+                         f"(delta {replay - captured:+.3f} ms)")
+        for index, expected, actual in self.mismatches[:10]:
+            lines.append(f"  mismatch at #{index}: expected {expected}, got {actual}")
+        for index, err in self.errors[:10]:
+            lines.append(f"  error at #{index}: {err}")
+        return "\n".join(lines)
+
+
+def replay(path, host="127.0.0.1", port=5555, speed=None, timeout=DEFAULT_TIMEOUT_SECS):
+    """
+    Re-issues a capture against a server and compares every response.
+
+    speed=None replays as fast as possible; otherwise arrival times are scaled by 1/speed.
+    Each captured connection gets its own socket. Request order is kept, and a request
+    is only sent once every request that had been answered before it was captured has
+    been answered again, so cross-connection effects (a send followed by the recipient's
+    fetch) replay deterministically at any speed.
+    Latencies are measured client-side, so they include loopback time that the
+    server-side capture numbers do not.
+
+    A request that gets no response within timeout seconds, or one the handler cannot
+    decode, is reported as an error. Its connection is dropped, since later responses
+    on it can no longer be matched up, and the rest of that connection's requests are
+    reported as errors too.
+    """
+    protocol, records = read_capture(path)
+    handler = JSONProtocolHandler() if protocol == "json" else CustomProtocolHandler()
+    report = ReplayReport(records)
+    if not records:
+        return report
+
+    done = [threading.Event() for _ in records]
+    by_conn = {}
+    for index, record in enumerate(records):
+        by_conn.setdefault(record.conn_id, []).append(index)
+    inboxes = {conn_id: queue.Queue() for conn_id in by_conn}
+
+    def connection_worker(conn_id):
+        sock, broken = None, None
+        try:
+            sock = socket.create_connection((host, port), timeout=timeout)
+        except OSError as e:
+            broken = f"connect failed: {e}"
+        try:
+            for _ in by_conn[conn_id]:
+                index = inboxes[conn_id].get()
+                record = records[index]
+                try:
+                    if broken:
+                        report.errors.append((index, broken))
+                        continue
+                    started = time.perf_counter()
+                    sock.sendall(record.request)
+                    actual = None
+                    if record.response:
+                        actual = handler.receive(sock)
+                    report.latencies_ms[index] = (time.perf_counter() - started) * 1000
+
+                    expected = decode_response(handler, record.response)
+                    if repr(expected) != repr(actual):
+                        report.mismatches.append((index, expected, actual))
+                except Exception as e:
+                    # a timeout, a dropped connection, or a response the protocol cannot decode
+                    report.errors.append((index, f"{type(e).__name__}: {e}"))
+                    broken = f"connection dropped after the error at #{index}"
+                    sock.close()
+                finally:
+                    done[index].set()
+        finally:
+            if sock is not None:
+                sock.close()
+
+    workers = [threading.Thread(target=connection_worker, args=(c,), daemon=True) for c in by_conn]
+    for w in workers:
+        w.start()
+
+    # Requests in the order their responses were captured; a prefix of this list
+    # must be complete before the next request is dispatched.
+    answered = sorted(range(len(records)), key=lambda i: records[i].recv_us + records[i].service_us)
+    answered_pos = 0
+
+    started = time.perf_counter()
+    base_us = records[0].recv_us
+    for index, record in enumerate(records):
+        if speed:
+            due = (record.recv_us - base_us) / 1_000_000 / speed
+            delay = due - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        while answered_pos < len(answered):
+            prior = answered[answered_pos]
+            if records[prior].recv_us + records[prior].service_us > record.recv_us:
+                break
+            done[prior].wait()
+            answered_pos += 1
+        inboxes[record.conn_id].put(index)
+
+    for w in workers:
+        w.join()
+    report.replay_secs = time.perf_counter() - started
+    return report
+
+
+def parse_speed(text):
+    """'max' -> None (as fast as possible); '2' or '2x' -> 2.0."""
+    if text.lower() == "max":
+        return None
+    try:
+        speed = float(text[:-1] if text.lower().endswith("x") else text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected N, Nx or 'max', got {text!r}")
+    if not 0 < speed < float("inf"):
+        raise argparse.ArgumentTypeError(f"speed must be a positive number, got {text!r}")
+    return speed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a capture recorded with server.py --capture.")
+    parser.add_argument("capture", type=str, help="Capture file to replay")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Server address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=5555, help="Server port (default: 5555)")
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="Replay speed: 1x for real time, Nx (or N) for N times faster, or 'max' (default: 1x)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECS,
+                        help=f"Seconds to wait for a response before counting it as failed (default: {DEFAULT_TIMEOUT_SECS:g})")
+    args = parser.parse_args()
+
+    result = replay(args.capture, host=args.host, port=args.port, speed=args.speed, timeout=args.timeout)
+    print(result.summary())
+    sys.exit(1 if result.mismatches or result.errors else 0)
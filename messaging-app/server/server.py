@@ -1,5 +1,6 @@
 import socket
 import threading
+import time
 from queue import Queue
 import argparse
 
@@ -8,8 +9,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from protocol.protocol import Message, JSONProtocolHandler, CustomProtocolHandler
 
 
-from database import Database
+from database import Database, ShardedDatabase
 from actions import ActionHandler
+from maintenance import MaintenanceTask
+from capture import TrafficCapture, CaptureConnection
+from timeouts import ConnectionMonitor
 
 
 #############################
@@ -17,7 +21,8 @@ from actions import ActionHandler
 #############################
 
 class Server:
-    def __init__(self, host, port, protocol, db_name="chat.db"):
+    def __init__(self, host, port, protocol, db_name="chat.db", archive_after_days=30, maintenance_interval=300, shards=1, capture_path=None,
+                 idle_timeout=300, read_timeout=10, stats_interval=60):
         self.host = host
         self.port = port
         self.protocol = protocol.lower()
@@ -29,14 +34,44 @@ class Server:
         self.logged_in_users = {}   # {client_id: username}
         self.server_lock = threading.Lock()
 
-        self.db = Database(db_name)
+        # With more than one shard, users and their inboxes are split over chat_shard<i>.db files.
+        if shards > 1:
+            self.db = ShardedDatabase(db_name, shards)
+            db_files = [shard.db_name for shard in self.db.shards]
+        else:
+            self.db = Database(db_name)
+            db_files = [db_name]
         self.actions = ActionHandler(self.db, self.protocol_handler, self.logged_in_users)
 
+        # Archives old delivered messages and shrinks the file; 0 disables it.
+        self.maintenance = []
+        if maintenance_interval > 0:
+            self.maintenance = [
+                MaintenanceTask(
+                    db_file,
+                    archive_after_secs=archive_after_days * 24 * 3600,
+                    interval_secs=maintenance_interval
+                )
+                for db_file in db_files
+            ]
+
+        # Records every request frame and its response for replay.py.
+        self.capture = TrafficCapture(capture_path, self.protocol) if capture_path else None
+
+        # One timer wheel drops clients that went silent without closing the socket.
+        self.monitor = ConnectionMonitor(idle_timeout=idle_timeout, read_timeout=read_timeout)
+        self.stats_interval = stats_interval
+        self._last_stats = time.monotonic()
+        self.monitor.wheel.on_tick = self._maybe_report_stats
+
     def start_server(self):
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.sock.bind((self.host, self.port))
         self.sock.listen(5)
         print(f"Server listening on {self.host}:{self.port} (protocol={self.protocol})")
+        for task in self.maintenance:
+            task.start()
+        self.monitor.start()
 
         try:
             while True:
@@ -49,26 +84,54 @@ class Server:
             print("Shutting down server...")
         finally:
             self.sock.close()
+            if self.capture:
+                self.capture.close()
 
     def handle_client(self, conn, client_id):
         print(f"[+] Client connected: {client_id}")
+        conn = self.monitor.register(client_id, conn)
+        if self.capture:
+            conn = CaptureConnection(conn, self.capture.now_us)
         try:
             while True:
                 message = self.protocol_handler.receive(conn)
+                conn.frame_done()
+                recv_us = self.capture.now_us() if self.capture else None
                 print('server gets', message)
                 if not message:
                     print(f"[-] Client disconnected: {client_id}")
                     break
                 self.client_queues[client_id].put(message)
                 self.process_job_queue(client_id, conn)
+                if self.capture:
+                    request, response, sent_us = conn.take()
+                    self.capture.record(client_id, recv_us, request, response, sent_us)
         except Exception as e:
             print(f"Error handling {client_id}: {e}")
         finally:
+            self.monitor.unregister(client_id)
             conn.close()
             if client_id in self.client_queues:
                 del self.client_queues[client_id]
             if client_id in self.logged_in_users:
                 del self.logged_in_users[client_id]
+            if self.capture:
+                self.capture.forget(client_id)
+
+    def stats(self):
+        stats = {
+            "connections": len(self.client_queues),
+            "logged_in": len(self.logged_in_users),
+            "timers": len(self.monitor.wheel),
+        }
+        stats.update(self.monitor.stats)
+        return stats
+
+    def _maybe_report_stats(self):
+        if self.stats_interval <= 0 or time.monotonic() - self._last_stats < self.stats_interval:
+            return
+        self._last_stats = time.monotonic()
+        print("[stats] " + ", ".join(f"{k}={v}" for k, v in self.stats().items()))
 
     def process_job_queue(self, client_id, conn):
         queue = self.client_queues[client_id]
@@ -91,9 +154,33 @@ if __name__ == "__main__":
     parser.add_argument("--host", type=str, default="127.0.0.1", help="IP address to bind the server (default: 127.0.0.1)")
     parser.add_argument("--port", type=int, default=5555, help="Port to listen on (default: 5555)")
     parser.add_argument("--protocol", type=str, choices=["json", "custom"], default="custom", help="Protocol to use (default: json)")
+    parser.add_argument("--archive-after-days", type=float, default=30, help="Archive delivered messages older than this many days (default: 30)")
+    parser.add_argument("--maintenance-interval", type=float, default=300, help="Seconds between archive/vacuum runs, 0 to disable (default: 300)")
+    parser.add_argument("--shards", type=int, default=1, help="Number of SQLite files to split users and messages over (default: 1)")
+    parser.add_argument("--capture", type=str, default=None, help="Record inbound traffic and responses to this file for replay.py")
+    parser.add_argument("--idle-timeout", type=float, default=300, help="Drop clients that send nothing for this many seconds (default: 300)")
+    parser.add_argument("--read-timeout", type=float, default=10, help="Drop clients that leave a frame incomplete for this many seconds (default: 10)")
+    parser.add_argument("--stats-interval", type=float, default=60, help="Seconds between [stats] lines, 0 to disable (default: 60)")
+    parser.add_argument("--convert-vacuum", action="store_true",
+                        help="Switch existing database files to incremental vacuum with one full VACUUM each, then exit. Run it with the server stopped")
     # add reset database keyword with default no as an argument
     args = parser.parse_args()
 
-    server = Server(host=args.host, port=args.port, protocol=args.protocol)
+    if args.convert_vacuum:
+        databases = ShardedDatabase("chat.db", args.shards).shards if args.shards > 1 else [Database("chat.db")]
+        for db in databases:
+            size = os.path.getsize(db.db_name)
+            print(f"Rewriting {db.db_name} ({size} bytes)...")
+            print(f"Converted {db.db_name} in {db.convert_to_incremental_vacuum():.1f}s")
+        sys.exit(0)
+
+    server = Server(host=args.host, port=args.port, protocol=args.protocol,
+                    archive_after_days=args.archive_after_days,
+                    maintenance_interval=args.maintenance_interval,
+                    shards=args.shards,
+                    capture_path=args.capture,
+                    idle_timeout=args.idle_timeout,
+                    read_timeout=args.read_timeout,
+                    stats_interval=args.stats_interval)
     server.start_server()
 
@@ -0,0 +1,108 @@
+from test_base import BaseTest
+
+class TestGroupMessages(BaseTest):
+    def _signup_all(self, *users):
+        for username in users:
+            self.send_message("signup", {"username": username, "password": "pw"}, is_response=0)
+            self.receive_response()
+
+    def test_group_message_reaches_every_member(self):
+        """
+        1. Alice, Bob and Carol sign up, Alice creates a group with Bob and Carol
+        2. Alice sends one group message
+        3. Bob and Carol each see it as an unread message and can fetch it
+        """
+        self.reset_database()
+        self._signup_all("Alice", "Bob", "Carol")
+
+        self.send_message("login", {"username": "Alice", "password": "pw"}, is_response=0)
+        self.receive_response()
+
+        self.send_message("create_group", {"group": "friends", "members": ["Bob", "Carol"]}, is_response=0)
+        create_resp = self.receive_response()
+        self.assertEqual(create_resp["status"], "ok", "❌ Creating the group should succeed")
+
+        self.send_message("send_group_message", {"sender": "Alice", "group": "friends", "content": "Hi all!"}, is_response=0)
+        send_resp = self.receive_response()
+        self.assertEqual(send_resp["status"], "ok", "❌ Sending to the group should succeed")
+        self.assertEqual(send_resp["recipient_count"], 2, "❌ Both other members should be recipients")
+
+        self.send_message("logout", {}, is_response=0)
+        self.receive_response()
+
+        for member in ("Bob", "Carol"):
+            self.send_message("login", {"username": member, "password": "pw"}, is_response=0)
+            login_resp = self.receive_response()
+            self.assertEqual(login_resp["unread_count"], 1, f"❌ {member} should have 1 unread message")
+
+            self.send_message("fetch_away_msgs", {"limit": 5}, is_response=0)
+            fetch_resp = self.receive_response()
+            self.assertEqual(len(fetch_resp["msg"]), 1)
+            self.assertEqual(fetch_resp["msg"][0]["sender"], "Alice")
+            self.assertEqual(fetch_resp["msg"][0]["content"], "Hi all!", "❌ Content should follow the pointer")
+
+            self.send_message("logout", {}, is_response=0)
+            self.receive_response()
+
+    def test_broadcast_and_non_member(self):
+        """
+        1. Broadcasting with group '*' reaches every other account
+        2. Sending to a group you are not a member of fails
+        """
+        self.reset_database()
+        self._signup_all("Alice", "Bob", "Carol")
+
+        self.send_message("login", {"username": "Bob", "password": "pw"}, is_response=0)
+        self.receive_response()
+        self.send_message("create_group", {"group": "pair", "members": ["Carol"]}, is_response=0)
+        self.receive_response()
+        self.send_message("logout", {}, is_response=0)
+        self.receive_response()
+
+        self.send_message("login", {"username": "Alice", "password": "pw"}, is_response=0)
+        self.receive_response()
+
+        self.send_message("send_group_message", {"sender": "Alice", "group": "pair", "content": "let me in"}, is_response=0)
+        denied = self.receive_response()
+        self.assertEqual(denied["status"], "error", "❌ Non-members should not send to a group")
+
+        self.send_message("send_group_message", {"sender": "Alice", "group": "*", "content": "Announcement"}, is_response=0)
+        broadcast = self.receive_response()
+        self.assertEqual(broadcast["status"], "ok")
+        self.assertEqual(broadcast["recipient_count"], 2, "❌ Broadcast should reach every other account")
+
+    def test_delete_group_message_copy(self):
+        """
+        Deleting one recipient's copy leaves the other recipient's copy intact.
+        """
+        self.reset_database()
+        self._signup_all("Alice", "Bob", "Carol")
+
+        self.send_message("login", {"username": "Alice", "password": "pw"}, is_response=0)
+        self.receive_response()
+        self.send_message("send_group_message", {"sender": "Alice", "group": "*", "content": "Shared"}, is_response=0)
+        self.receive_response()
+        self.send_message("logout", {}, is_response=0)
+        self.receive_response()
+
+        self.send_message("login", {"username": "Bob", "password": "pw"}, is_response=0)
+        self.receive_response()
+        self.send_message("fetch_away_msgs", {"limit": 5}, is_response=0)
+        bob_msgs = self.receive_response()["msg"]
+        self.send_message("delete_messages", {"message_ids_to_delete": [bob_msgs[0]["id"]]}, is_response=0)
+        del_resp = self.receive_response()
+        self.assertEqual(del_resp["deleted_count"], 1)
+        self.send_message("logout", {}, is_response=0)
+        self.receive_response()
+
+        self.send_message("login", {"username": "Carol", "password": "pw"}, is_response=0)
+        self.receive_response()
+        self.send_message("fetch_away_msgs", {"limit": 5}, is_response=0)
+        carol_msgs = self.receive_response()["msg"]
+        self.assertEqual(len(carol_msgs), 1)
+        self.assertEqual(carol_msgs[0]["content"], "Shared", "❌ Carol's copy should survive Bob's delete")
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+import sys
+# The maintenance task runs against the database directly, no server needed.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database import Database
+from maintenance import MaintenanceTask
+
+class TestMaintenance(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmpdir.name, "chat.db")
+        self.db = Database(self.db_name)
+
+    def tearDown(self):
+        self.db.conn.close()
+        self.tmpdir.cleanup()
+
+    def _insert(self, n, to_deliver, age_secs, content="x" * 2000):
+        created_at = int(time.time() - age_secs)
+        for _ in range(n):
+            self.db.execute(
+                "INSERT INTO messages (sender, recipient, content, to_deliver, created_at) VALUES (?, ?, ?, ?, ?)",
+                ("Alice", "Bob", content, to_deliver, created_at)
+            )
+        self.db.conn.commit()
+
+    def test_archives_only_old_delivered_messages(self):
+        """Old delivered rows move to the archive; undelivered and recent rows stay."""
+        self._insert(30, to_deliver=1, age_secs=3600)
+        self._insert(5, to_deliver=0, age_secs=3600)
+        self._insert(7, to_deliver=1, age_secs=0)
+
+        task = MaintenanceTask(self.db_name, archive_after_secs=60, batch_size=8, pause_secs=0)
+        archived, _ = task.run_once()
+
+        self.assertEqual(archived, 30)
+        self.assertEqual(self.db.execute("SELECT COUNT(*) FROM messages")[0][0], 12)
+        archive_count = task.conn.execute("SELECT COUNT(*) FROM archive.messages_archive").fetchone()[0]
+        self.assertEqual(archive_count, 30)
+        task.conn.close()
+
+    def test_reclaims_pages_after_delete(self):
+        """Pages freed by deletes are handed back by the incremental vacuum."""
+        self._insert(200, to_deliver=0, age_secs=0)
+        self.db.execute("DELETE FROM messages", commit=True)
+        self.assertGreater(self.db.conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+        task = MaintenanceTask(self.db_name, vacuum_pages=16, pause_secs=0)
+        _, reclaimed = task.run_once()
+
+        self.assertGreater(reclaimed, 0)
+        self.assertEqual(self.db.conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+        task.conn.close()
+
+    def test_vacuum_is_capped_per_run(self):
+        """A run hands back at most max_vacuum_pages; the rest waits for later runs."""
+        self._insert(200, to_deliver=0, age_secs=0)
+        self.db.execute("DELETE FROM messages", commit=True)
+        free = self.db.conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        task = MaintenanceTask(self.db_name, vacuum_pages=16, max_vacuum_pages=40, pause_secs=0)
+        self.assertEqual(task.run_once()[1], 40)
+        self.assertEqual(self.db.conn.execute("PRAGMA freelist_count").fetchone()[0], free - 40)
+        task.conn.close()
+
+    def test_file_without_incremental_vacuum(self):
+        """
+        1. Opening an older file neither rewrites it nor switches its mode
+        2. Maintenance stops when the pragma frees nothing instead of spinning
+        3. The explicit conversion switches the file to incremental vacuum
+        """
+        legacy_name = os.path.join(self.tmpdir.name, "legacy.db")
+        legacy = sqlite3.connect(legacy_name)
+        legacy.execute("CREATE TABLE filler (data TEXT)")
+        legacy.executemany("INSERT INTO filler VALUES (?)", [("x" * 2000,)] * 200)
+        legacy.execute("DELETE FROM filler")
+        legacy.commit()
+        legacy.close()
+
+        db = Database(legacy_name)
+        self.assertEqual(db.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 0, "❌ Startup must not VACUUM an existing file")
+        self.assertGreater(db.conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+        task = MaintenanceTask(legacy_name, pause_secs=0)
+        task.incremental = True  # as if the mode check were wrong: the loop must still end
+        runner = threading.Thread(target=task.run_once)
+        runner.start()
+        runner.join(5)
+        task.stop()
+        self.assertFalse(runner.is_alive(), "❌ The vacuum loop should stop once a slice frees nothing")
+        task.conn.close()
+
+        db.convert_to_incremental_vacuum()
+        self.assertEqual(db.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        self.assertEqual(db.conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+        db.conn.close()
+
+    def test_group_bodies_are_archived_with_content(self):
+        """Archived group pointers carry the shared content; the orphaned body is dropped."""
+        self.db.store_group_message(None, "Alice", "Announcement", [("Bob", 1), ("Carol", 1)])
+        self.db.execute("UPDATE messages SET created_at=0", commit=True)
+
+        task = MaintenanceTask(self.db_name, archive_after_secs=60, pause_secs=0)
+        archived, _ = task.run_once()
+
+        self.assertEqual(archived, 2)
+        contents = task.conn.execute("SELECT content FROM archive.messages_archive").fetchall()
+        self.assertEqual(contents, [("Announcement",), ("Announcement",)])
+        self.assertEqual(self.db.execute("SELECT COUNT(*) FROM group_messages")[0][0], 0)
+        task.conn.close()
+
+    def test_rows_of_unknown_age_are_kept(self):
+        """Rows from before created_at existed get their age from the upgrade, not archived at once."""
+        legacy_name = os.path.join(self.tmpdir.name, "legacy.db")
+        legacy = sqlite3.connect(legacy_name)
+        legacy.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, sender TEXT, recipient TEXT, content TEXT, to_deliver INTEGER DEFAULT 0)")
+        legacy.executemany("INSERT INTO messages (sender, recipient, content, to_deliver) VALUES (?, ?, ?, 1)", [("Alice", "Bob", "old")] * 5)
+        legacy.commit()
+        legacy.close()
+
+        upgraded = Database(legacy_name)
+        self.assertEqual(upgraded.execute("SELECT COUNT(*) FROM messages WHERE created_at IS NULL")[0][0], 0)
+        upgraded.execute("INSERT INTO messages (sender, recipient, content, to_deliver, created_at) VALUES ('Alice', 'Bob', 'unknown', 1, NULL)", commit=True)
+
+        task = MaintenanceTask(legacy_name, archive_after_secs=60, pause_secs=0)
+        archived, _ = task.run_once()
+
+        self.assertEqual(archived, 0)
+        self.assertEqual(upgraded.execute("SELECT COUNT(*) FROM messages")[0][0], 6)
+        task.conn.close()
+        upgraded.conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
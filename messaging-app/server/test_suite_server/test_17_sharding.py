@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+import sys
+# Shard routing is exercised against the database directly, no server needed.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database import ShardedDatabase
+
+USERS = ["Alice", "Bob", "Carol", "Dave", "Erin", "Frank", "Grace", "Heidi"]
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = ShardedDatabase(os.path.join(self.tmpdir.name, "chat.db"), num_shards=3)
+        for username in USERS:
+            self.db.create_user(username, "pw")
+
+    def tearDown(self):
+        self.db.pool.shutdown()
+        for shard in self.db.shards:
+            shard.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_users_and_inbox_live_on_recipient_shard(self):
+        """Each user row and the messages addressed to it land on the same shard file."""
+        used = {self.db.shard_index(u) for u in USERS}
+        self.assertGreater(len(used), 1, "❌ Users should be spread over several shards")
+
+        self.db.store_message("Alice", "Bob", "hi", 0)
+        home = self.db.shard_for("Bob")
+        self.assertEqual(home.execute("SELECT COUNT(*) FROM users WHERE username='Bob'")[0][0], 1)
+        self.assertEqual(home.execute("SELECT COUNT(*) FROM messages WHERE recipient='Bob'")[0][0], 1)
+        self.assertEqual(self.db.count_unread("Bob"), 1)
+
+        fetched = self.db.take_away_messages("Bob", 5)
+        self.assertEqual([(r[1], r[2]) for r in fetched], [("Alice", "hi")])
+        self.assertEqual(self.db.count_unread("Bob"), 0)
+
+    def test_list_users_merges_shards_in_order(self):
+        """Pages are taken from the merged, globally sorted result with distinct ids."""
+        everyone = self.db.list_users("", 0, 100)
+        self.assertEqual([u for _, u in everyone], sorted(USERS))
+        self.assertEqual(len({i for i, _ in everyone}), len(USERS), "❌ Ids should not collide across shards")
+
+        page = self.db.list_users("", 2, 3)
+        self.assertEqual([u for _, u in page], sorted(USERS)[2:5])
+
+    def test_delete_user_removes_sent_messages_on_every_shard(self):
+        """Messages a user sent are removed from all recipients' shards."""
+        for recipient in USERS[1:]:
+            self.db.store_message("Alice", recipient, "bye", 0)
+        self.db.store_message("Bob", "Alice", "reply", 0)
+
+        self.db.delete_user("Alice")
+
+        self.assertFalse(self.db.user_exists("Alice"))
+        for recipient in USERS[1:]:
+            self.assertEqual(self.db.count_unread(recipient), 0, f"❌ {recipient} should have no message left")
+        for shard in self.db.shards:
+            self.assertEqual(shard.execute("SELECT COUNT(*) FROM messages")[0][0], 0)
+
+    def test_group_message_spans_shards(self):
+        """A broadcast reaches every user and keeps one body per shard that holds a recipient."""
+        recipients = self.db.all_usernames(exclude="Alice")
+        self.assertEqual(sorted(recipients), sorted(USERS[1:]))
+
+        self.db.store_group_message(None, "Alice", "Announcement", [(r, 0) for r in recipients])
+        for recipient in recipients:
+            rows = self.db.take_away_messages(recipient, 5)
+            self.assertEqual([r[2] for r in rows], ["Announcement"])
+
+        shards_with_recipients = {self.db.shard_index(r) for r in recipients}
+        bodies = sum(s.execute("SELECT COUNT(*) FROM group_messages")[0][0] for s in self.db.shards)
+        self.assertEqual(bodies, len(shards_with_recipients))
+
+
+if __name__ == "__main__":
+    unittest.main()
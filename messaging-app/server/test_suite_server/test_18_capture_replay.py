@@ -0,0 +1,166 @@
+import argparse
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+import unittest
+
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from protocol.protocol import Message, CustomProtocolHandler, JSONProtocolHandler
+from capture import TrafficCapture, BufferConnection, read_capture
+from replay import parse_speed, replay
+from test_base import SERVER_HOST, SERVER_PORT
+
+class TestCaptureReplay(unittest.TestCase):
+    """Replays a hand-built capture against the running test server."""
+    def setUp(self):
+        self.handler = CustomProtocolHandler()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "traffic.mcap")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _frame(self, msg_type, data, is_response):
+        buf = BufferConnection()
+        self.handler.send(buf, Message(msg_type, data), is_response=is_response)
+        return bytes(buf.written)
+
+    def _write_capture(self, exchanges):
+        """exchanges: [(conn_id, recv_us, service_us, msg_type, request, response)]"""
+        capture = TrafficCapture(self.path, "custom")
+        for conn_id, recv_us, service_us, msg_type, request, response in exchanges:
+            capture.record(
+                ("client", conn_id),
+                recv_us,
+                self._frame(msg_type, request, 0),
+                self._frame(msg_type, response, 1),
+                sent_us=recv_us + service_us
+            )
+        capture.close()
+
+    def _session(self, bob_unread):
+        return [
+            (0, 0, 100, "reset_db", {}, {"status": "ok", "msg": "Database reset."}),
+            (0, 200, 100, "signup", {"username": "Alice", "password": "pw"}, {"status": "ok", "msg": "Signup successful"}),
+            (0, 400, 100, "signup", {"username": "Bob", "password": "pw"}, {"status": "ok", "msg": "Signup successful"}),
+            (0, 600, 100, "login", {"username": "Alice", "password": "pw"},
+             {"status": "ok", "msg": "Login successful.", "unread_count": 0}),
+            (0, 800, 100, "send_message", {"sender": "Alice", "recipient": "Bob", "content": "hi"},
+             {"status": "ok", "msg": "Message stored."}),
+            # Bob's login on a second connection depends on Alice's send above.
+            (1, 1000, 100, "login", {"username": "Bob", "password": "pw"},
+             {"status": "ok", "msg": "Login successful.", "unread_count": bob_unread}),
+        ]
+
+    def test_capture_round_trip(self):
+        """Records come back in arrival order with their connection ids and frames intact."""
+        self._write_capture(self._session(bob_unread=1))
+        protocol, records = read_capture(self.path)
+        self.assertEqual(protocol, "custom")
+        self.assertEqual([r.conn_id for r in records], [0, 0, 0, 0, 0, 1])
+        self.assertEqual([r.recv_us for r in records], [0, 200, 400, 600, 800, 1000])
+        decoded = self.handler.receive(BufferConnection(records[1].request))
+        self.assertEqual(decoded.msg_type, "signup")
+        self.assertEqual(decoded.data["username"], "Alice")
+
+    def test_replay_matches_server(self):
+        """Replaying at max speed keeps cross-connection order, so every response matches."""
+        self._write_capture(self._session(bob_unread=1))
+        report = replay(self.path, host=SERVER_HOST, port=SERVER_PORT, speed=None)
+        self.assertEqual(report.errors, [])
+        self.assertEqual(report.mismatches, [], report.summary())
+        self.assertTrue(all(l is not None for l in report.latencies_ms))
+
+    def test_replay_reports_mismatch(self):
+        """A response that differs from the capture is reported with its index."""
+        self._write_capture(self._session(bob_unread=5))
+        report = replay(self.path, host=SERVER_HOST, port=SERVER_PORT, speed=50)
+        self.assertEqual([m[0] for m in report.mismatches], [5])
+
+class BrokenServer:
+    """Speaks the JSON protocol, but answers "garbage" with undecodable bytes and "silent" not at all."""
+    def __init__(self):
+        self.handler = JSONProtocolHandler()
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = self.handler.receive(conn)
+                except (OSError, ValueError):
+                    return
+                if request is None:
+                    return
+                mode = request.data.get("mode")
+                if mode == "garbage":
+                    conn.sendall(struct.pack("!I", 5) + b"{bad}")
+                elif mode == "ok":
+                    self.handler.send(conn, Message(request.msg_type, {"status": "ok"}), is_response=True)
+
+    def close(self):
+        self.listener.close()
+
+class TestReplayFailures(unittest.TestCase):
+    """A broken response is reported, and never stalls the rest of the replay."""
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "traffic.mcap")
+        self.server = BrokenServer()
+
+    def tearDown(self):
+        self.server.close()
+        self.tmpdir.cleanup()
+
+    def test_bad_and_missing_responses_are_errors(self):
+        """
+        1. Connection 0 gets an undecodable response, so its second request is abandoned
+        2. Connection 1 never gets a response and times out
+        3. Connection 2, dispatched after both, still replays and matches
+        """
+        handler = JSONProtocolHandler()
+        def frame(mode, is_response):
+            buf = BufferConnection()
+            data = {"status": "ok"} if is_response else {"mode": mode}
+            handler.send(buf, Message("list_accounts", data), is_response=is_response)
+            return bytes(buf.written)
+
+        capture = TrafficCapture(self.path, "json")
+        for conn_id, recv_us, mode in [(0, 0, "garbage"), (0, 200, "ok"), (1, 400, "silent"), (2, 10000, "ok")]:
+            capture.record(("client", conn_id), recv_us, frame(mode, False), frame(mode, True), sent_us=recv_us + 100)
+        capture.close()
+
+        started = time.perf_counter()
+        report = replay(self.path, port=self.server.port, speed=None, timeout=0.5)
+        self.assertLess(time.perf_counter() - started, 3.0, "❌ A broken response should not hang the replay")
+        self.assertEqual(sorted(index for index, _ in report.errors), [0, 1, 2])
+        self.assertEqual(report.mismatches, [])
+        self.assertIsNotNone(report.latencies_ms[3])
+
+
+class TestSpeedArgument(unittest.TestCase):
+    def test_speed_forms(self):
+        self.assertEqual([parse_speed(text) for text in ("1", "2x", "0.5X", "max")], [1.0, 2.0, 0.5, None])
+        for bad in ("x", "fast", "0x", "-2", "inf"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_speed(bad)
+
+
+if __name__ == "__main__":
+    unittest.main()
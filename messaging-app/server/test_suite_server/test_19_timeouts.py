@@ -0,0 +1,97 @@
+import os
+import socket
+import time
+import unittest
+
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from timeouts import TimerWheel, ConnectionMonitor
+from test_base import BaseTest
+
+class TestTimerWheel(unittest.TestCase):
+    """Drives the wheel by hand with advance(), no thread involved."""
+    def setUp(self):
+        self.wheel = TimerWheel(tick_secs=1.0, slots=8)
+        self.fired = []
+
+    def _fire(self, key):
+        self.fired.append(key)
+
+    def test_fires_when_due(self):
+        now = time.monotonic()
+        self.wheel.schedule("a", 2, self._fire)
+        self.wheel.schedule("b", 4, self._fire)
+        self.wheel.advance(now + 3)
+        self.assertEqual(self.fired, ["a"])
+        self.wheel.advance(now + 5)
+        self.assertEqual(self.fired, ["a", "b"])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_extend_and_cancel(self):
+        """Extending a timer postpones it in place; cancelled timers never fire."""
+        now = time.monotonic()
+        self.wheel.schedule("a", 2, self._fire)
+        self.wheel.schedule("a", 6, self._fire)
+        self.wheel.schedule("b", 2, self._fire)
+        self.wheel.cancel("b")
+        self.wheel.advance(now + 4)
+        self.assertEqual(self.fired, [])
+        self.wheel.advance(now + 7)
+        self.assertEqual(self.fired, ["a"])
+
+    def test_deadline_beyond_one_lap(self):
+        """A deadline further out than slots * tick goes round the wheel until due."""
+        now = time.monotonic()
+        self.wheel.schedule("far", 20, self._fire)
+        self.wheel.advance(now + 10)
+        self.assertEqual(self.fired, [])
+        self.wheel.advance(now + 21)
+        self.assertEqual(self.fired, ["far"])
+
+
+class TestConnectionMonitor(unittest.TestCase):
+    def setUp(self):
+        self.monitor = ConnectionMonitor(idle_timeout=0.1, read_timeout=0.1, tick_secs=0.01)
+        self.monitor.start()
+        self.server_side, self.client_side = socket.socketpair()
+
+    def tearDown(self):
+        self.monitor.wheel.stop()
+        self.server_side.close()
+        self.client_side.close()
+
+    def test_idle_connection_is_evicted(self):
+        conn = self.monitor.register("idle-client", self.server_side)
+        self.server_side.settimeout(2)
+        self.assertEqual(conn.recv(2), b"", "❌ recv should return once the idle timer shuts the socket")
+        self.assertEqual(self.monitor.stats["evicted_idle"], 1)
+
+    def test_partial_frame_hits_read_timeout(self):
+        conn = self.monitor.register("slow-client", self.server_side)
+        self.server_side.settimeout(2)
+        self.client_side.sendall(b"\x02")  # first byte of a login header, then nothing
+        self.assertEqual(conn.recv(1), b"\x02")
+        self.assertEqual(conn.recv(1), b"")
+        self.assertEqual(self.monitor.stats["evicted_read_timeout"], 1)
+        self.assertEqual(self.monitor.stats["evicted_idle"], 0)
+
+    def test_activity_keeps_connection_open(self):
+        conn = self.monitor.register("busy-client", self.server_side)
+        for _ in range(5):
+            time.sleep(0.05)
+            conn.frame_done()
+        self.assertEqual(self.monitor.stats["evicted_idle"], 0)
+        self.monitor.unregister("busy-client")
+
+
+class TestPing(BaseTest):
+    def test_ping(self):
+        """Ping works before login and gets an ok response."""
+        self.send_message("ping", {}, is_response=0)
+        response = self.receive_response()
+        self.assertEqual(response["status"], "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
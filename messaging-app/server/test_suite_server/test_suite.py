@@ -15,6 +15,11 @@ from test_10_delete_single_message import TestDeleteSingleMessage
 from test_11_delete_multiple_messages import TestDeleteMultipleMessages
 from test_12_delete_account import TestDeleteAccount
 from test_13_list_accounts import TestListAccounts
+from test_15_group_messages import TestGroupMessages
+from test_16_maintenance import TestMaintenance
+from test_17_sharding import TestSharding
+from test_18_capture_replay import TestCaptureReplay, TestReplayFailures, TestSpeedArgument
+from test_19_timeouts import TestTimerWheel, TestConnectionMonitor, TestPing
 
 if __name__ == "__main__":
     unittest.TextTestRunner(verbosity=2).run(
@@ -32,6 +37,15 @@ if __name__ == "__main__":
             unittest.defaultTestLoader.loadTestsFromTestCase(TestDeleteSingleMessage),
             unittest.defaultTestLoader.loadTestsFromTestCase(TestDeleteMultipleMessages),
             unittest.defaultTestLoader.loadTestsFromTestCase(TestDeleteAccount),
-            unittest.defaultTestLoader.loadTestsFromTestCase(TestListAccounts)
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestListAccounts),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestGroupMessages),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestMaintenance),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestSharding),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestCaptureReplay),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestReplayFailures),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestSpeedArgument),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestTimerWheel),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestConnectionMonitor),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestPing)
         ])
     )
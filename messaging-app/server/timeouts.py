@@ -0,0 +1,164 @@
+import socket
+import threading
+import time
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: one thread and a ring of slots, each covering tick_secs.
+
+    A timer is filed in slot (deadline_tick % slots); on each tick the thread only looks
+    at the current slot. Extending a timer (the common case: a connection sent another
+    frame) just updates its deadline in place, and the stale entry re-files itself
+    when its old slot comes round, so steady traffic costs no wheel operations.
+    """
+    def __init__(self, tick_secs=1.0, slots=256):
+        self.tick_secs = tick_secs
+        self.slots = [[] for _ in range(slots)]
+        self.timers = {}            # key -> [deadline, callback, generation]
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.start_time = time.monotonic()
+        self.current_tick = 0
+        self.on_tick = None         # optional callable run once per tick, outside the lock
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _tick_of(self, deadline):
+        return int((deadline - self.start_time) / self.tick_secs)
+
+    def _file(self, key, timer):
+        tick = max(self._tick_of(timer[0]), self.current_tick + 1)
+        self.slots[tick % len(self.slots)].append((key, timer[2]))
+
+    def schedule(self, key, delay_secs, callback):
+        """Fires callback(key) after delay_secs unless rescheduled or cancelled first."""
+        deadline = time.monotonic() + delay_secs
+        with self.lock:
+            timer = self.timers.get(key)
+            if timer is not None and deadline >= timer[0]:
+                # Later deadline: the entry already in the wheel will re-file itself.
+                timer[0], timer[1] = deadline, callback
+                return
+            self.generation += 1
+            timer = [deadline, callback, self.generation]
+            self.timers[key] = timer
+            self._file(key, timer)
+
+    def cancel(self, key):
+        with self.lock:
+            self.timers.pop(key, None)
+
+    def __len__(self):
+        return len(self.timers)
+
+    def _run(self):
+        while not self._stop.wait(self.tick_secs):
+            self.advance(time.monotonic())
+            if self.on_tick:
+                self.on_tick()
+
+    def advance(self, now):
+        """Processes every slot up to `now` and fires the timers that are due."""
+        due = []
+        with self.lock:
+            target = self._tick_of(now)
+            while self.current_tick < target:
+                self.current_tick += 1
+                slot = self.slots[self.current_tick % len(self.slots)]
+                entries, slot[:] = list(slot), []
+                for key, generation in entries:
+                    timer = self.timers.get(key)
+                    if timer is None or timer[2] != generation:
+                        continue  # cancelled or replaced by an earlier deadline
+                    if self._tick_of(timer[0]) > self.current_tick:
+                        self._file(key, timer)  # extended, or more than one lap away
+                    else:
+                        del self.timers[key]
+                        due.append((key, timer[1]))
+        for key, callback in due:
+            callback(key)
+
+
+class ConnectionMonitor:
+    """
+    Enforces per-connection timeouts with a single TimerWheel:
+      - idle_timeout: no new frame has started for this long,
+      - read_timeout: a frame started arriving but is not complete after this long.
+    An expired connection is shut down, which wakes its handle_client thread so the
+    usual disconnect path cleans up client_queues and logged_in_users.
+    """
+    def __init__(self, idle_timeout=300, read_timeout=10, tick_secs=1.0):
+        self.idle_timeout = idle_timeout
+        self.read_timeout = read_timeout
+        self.wheel = TimerWheel(tick_secs=tick_secs)
+        self.conns = {}
+        self.lock = threading.Lock()
+        self.stats = {"evicted_idle": 0, "evicted_read_timeout": 0}
+
+    def start(self):
+        self.wheel.start()
+
+    def register(self, client_id, conn):
+        with self.lock:
+            self.conns[client_id] = conn
+        self.frame_done(client_id)
+        return MonitoredConnection(conn, self, client_id)
+
+    def unregister(self, client_id):
+        self.wheel.cancel(client_id)
+        with self.lock:
+            self.conns.pop(client_id, None)
+
+    def frame_started(self, client_id):
+        self.wheel.schedule(client_id, self.read_timeout, self._evict_read_timeout)
+
+    def frame_done(self, client_id):
+        self.wheel.schedule(client_id, self.idle_timeout, self._evict_idle)
+
+    def _evict_idle(self, client_id):
+        self._evict(client_id, "evicted_idle")
+
+    def _evict_read_timeout(self, client_id):
+        self._evict(client_id, "evicted_read_timeout")
+
+    def _evict(self, client_id, reason):
+        with self.lock:
+            conn = self.conns.pop(client_id, None)
+            if conn is None:
+                return
+            self.stats[reason] += 1
+        print(f"[-] Evicting {client_id}: {reason.replace('evicted_', '').replace('_', ' ')}")
+        try:
+            conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # already gone
+
+
+class MonitoredConnection:
+    """Reports the first bytes of each frame to the monitor; everything else passes through."""
+    def __init__(self, conn, monitor, client_id):
+        self._conn = conn
+        self._monitor = monitor
+        self._client_id = client_id
+        self._in_frame = False
+
+    def recv(self, nbytes):
+        chunk = self._conn.recv(nbytes)
+        if chunk and not self._in_frame:
+            self._in_frame = True
+            self._monitor.frame_started(self._client_id)
+        return chunk
+
+    def frame_done(self):
+        self._in_frame = False
+        self._monitor.frame_done(self._client_id)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
@@ -94,7 +94,17 @@ class ChatServiceStub(object):
         self.Replicate = channel.unary_unary(
                 '/ChatService/Replicate',
                 request_serializer=protocol_dot_chat__service__pb2.ReplicationRequest.SerializeToString,
-                response_deserializer=protocol_dot_chat__service__pb2.GenericResponse.FromString,
+                response_deserializer=protocol_dot_chat__service__pb2.ReplicationResponse.FromString,
+                _registered_method=True)
+        self.ReplicateBatch = channel.unary_unary(
+                '/ChatService/ReplicateBatch',
+                request_serializer=protocol_dot_chat__service__pb2.ReplicationBatch.SerializeToString,
+                response_deserializer=protocol_dot_chat__service__pb2.ReplicationResponse.FromString,
+                _registered_method=True)
+        self.FetchLog = channel.unary_unary(
+                '/ChatService/FetchLog',
+                request_serializer=protocol_dot_chat__service__pb2.FetchLogRequest.SerializeToString,
+                response_deserializer=protocol_dot_chat__service__pb2.FetchLogResponse.FromString,
                 _registered_method=True)
         self.Heartbeat = channel.unary_unary(
                 '/ChatService/Heartbeat',
@@ -195,6 +205,18 @@ class ChatServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ReplicateBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def FetchLog(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def Heartbeat(self, request, context):
         """Heartbeat for leader election
         """
@@ -282,7 +304,17 @@ def add_ChatServiceServicer_to_server(servicer, server):
             'Replicate': grpc.unary_unary_rpc_method_handler(
                     servicer.Replicate,
                     request_deserializer=protocol_dot_chat__service__pb2.ReplicationRequest.FromString,
-                    response_serializer=protocol_dot_chat__service__pb2.GenericResponse.SerializeToString,
+                    response_serializer=protocol_dot_chat__service__pb2.ReplicationResponse.SerializeToString,
+            ),
+            'ReplicateBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReplicateBatch,
+                    request_deserializer=protocol_dot_chat__service__pb2.ReplicationBatch.FromString,
+                    response_serializer=protocol_dot_chat__service__pb2.ReplicationResponse.SerializeToString,
+            ),
+            'FetchLog': grpc.unary_unary_rpc_method_handler(
+                    servicer.FetchLog,
+                    request_deserializer=protocol_dot_chat__service__pb2.FetchLogRequest.FromString,
+                    response_serializer=protocol_dot_chat__service__pb2.FetchLogResponse.SerializeToString,
             ),
             'Heartbeat': grpc.unary_unary_rpc_method_handler(
                     servicer.Heartbeat,
@@ -630,7 +662,61 @@ class ChatService(object):
             target,
             '/ChatService/Replicate',
             protocol_dot_chat__service__pb2.ReplicationRequest.SerializeToString,
-            protocol_dot_chat__service__pb2.GenericResponse.FromString,
+            protocol_dot_chat__service__pb2.ReplicationResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReplicateBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ChatService/ReplicateBatch',
+            protocol_dot_chat__service__pb2.ReplicationBatch.SerializeToString,
+            protocol_dot_chat__service__pb2.ReplicationResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def FetchLog(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ChatService/FetchLog',
+            protocol_dot_chat__service__pb2.FetchLogRequest.SerializeToString,
+            protocol_dot_chat__service__pb2.FetchLogResponse.FromString,
             options,
             channel_credentials,
             insecure,
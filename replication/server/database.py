@@ -1,8 +1,13 @@
 import sqlite3
+import threading
+from contextlib import contextmanager
 
 class Database:
     def __init__(self, db_name="chat.db"):
         self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        # the connection is shared by every handler thread; the lock keeps a transaction() to itself
+        self.lock = threading.RLock()
+        self._in_transaction = False
         self._init_db()
 
     def _init_db(self):
@@ -23,19 +28,70 @@ class Database:
                 to_deliver INTEGER DEFAULT 0
             );
         """)
-        self.conn.commit()
+        self._commit()
         c.execute("""
             CREATE TABLE IF NOT EXISTS sessions (
                 auth_token TEXT PRIMARY KEY,
                 username TEXT NOT NULL
             );
         """)
+        # the replicated operation log (see oplog.py); entries are serialized ReplicationRequests
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS oplog (
+                idx INTEGER PRIMARY KEY,
+                entry BLOB NOT NULL
+            );
+        """)
+        # oplog bookkeeping, e.g. the index a snapshot left off at
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS oplog_state (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        self._commit()
 
-    def execute(self, query, params=(), commit=False):
-        c = self.conn.cursor()
-        c.execute(query, params)
-        if commit:
+    @contextmanager
+    def transaction(self):
+        """
+        Runs a block of calls as one transaction: its writes are committed together at
+        the end, or rolled back if the block raises. Other threads' statements wait for
+        it, and commit=True inside it is deferred.
+        """
+        with self.lock:
+            if self.conn.in_transaction:
+                self.conn.commit()
+            self.conn.execute("BEGIN")
+            self._in_transaction = True
+            try:
+                yield self
+            except BaseException:
+                self.conn.rollback()
+                raise
+            else:
+                self.conn.commit()
+            finally:
+                self._in_transaction = False
+
+    def _commit(self):
+        if not self._in_transaction:
             self.conn.commit()
-        if query.strip().upper().startswith("SELECT"):
-            return c.fetchall()
-        return c.rowcount
+
+    def insert(self, query, params=(), commit=False):
+        """Runs an INSERT and returns the id of the new row."""
+        with self.lock:
+            c = self.conn.cursor()
+            c.execute(query, params)
+            if commit:
+                self._commit()
+            return c.lastrowid
+
+    def execute(self, query, params=(), commit=False):
+        with self.lock:
+            c = self.conn.cursor()
+            c.execute(query, params)
+            if commit:
+                self._commit()
+            if query.strip().upper().startswith("SELECT"):
+                return c.fetchall()
+            return c.rowcount
@@ -0,0 +1,66 @@
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from protocol import chat_service_pb2
+
+# Entries kept behind the newest one. A replica further behind than this gets a
+# snapshot instead of the entries it missed.
+OPLOG_RETAIN_ENTRIES = 10000
+# trim once every this many appends rather than on each one
+OPLOG_TRIM_EVERY = 1000
+
+
+class OpLog:
+    """
+    The numbered log of every replicated write, stored in the same SQLite file as the
+    data and appended in the same transaction as the write it records. A server's data
+    therefore always reflects exactly the entries up to last_index. Entries up to
+    base_index are not held: they were trimmed, or arrived inside a snapshot.
+
+    Callers serialize appends and hold db.transaction() around them.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        row = db.execute("SELECT value FROM oplog_state WHERE name='base_index'")
+        self.base_index = row[0][0] if row else 0
+        row = db.execute("SELECT MAX(idx) FROM oplog")
+        self.last_index = max(row[0][0] or 0, self.base_index)
+
+    def append(self, entry):
+        """Stores entry under its index, giving it the next one if it has none yet."""
+        if not entry.index:
+            entry.index = self.last_index + 1
+        self.db.execute("INSERT INTO oplog (idx, entry) VALUES (?, ?)", (entry.index, entry.SerializeToString(deterministic=True)))
+        self.last_index = entry.index
+        trim_to = entry.index - OPLOG_RETAIN_ENTRIES
+        if entry.index % OPLOG_TRIM_EVERY == 0 and trim_to > self.base_index:
+            self._set_base(trim_to)
+
+    def matches(self, entry):
+        """False if this log holds a different entry under entry's index (the logs have diverged)."""
+        row = self.db.execute("SELECT entry FROM oplog WHERE idx=?", (entry.index,))
+        return not row or row[0][0] == entry.SerializeToString(deterministic=True)
+
+    def covers(self, index):
+        """True if every entry after index is still held, so a replica at index can catch up from it."""
+        return self.base_index <= index <= self.last_index
+
+    def entries_after(self, index, limit):
+        """Up to limit entries after index, oldest first, or None if some were already trimmed."""
+        if not self.covers(index):
+            return None
+        rows = self.db.execute("SELECT entry FROM oplog WHERE idx > ? ORDER BY idx LIMIT ?", (index, limit))
+        return [chat_service_pb2.ReplicationRequest.FromString(row[0]) for row in rows]
+
+    def reset(self, index):
+        """Empties the log after a snapshot that includes everything up to index."""
+        self.db.execute("DELETE FROM oplog")
+        self._set_base(index)
+        self.last_index = index
+
+    def _set_base(self, index):
+        self.db.execute("DELETE FROM oplog WHERE idx <= ?", (index,))
+        self.db.execute("INSERT OR REPLACE INTO oplog_state (name, value) VALUES ('base_index', ?)", (index,))
+        self.base_index = index
@@ -0,0 +1,241 @@
+import collections
+import threading
+import time
+import grpc
+import sys, os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from protocol import chat_service_pb2
+from protocol import chat_service_pb2_grpc
+
+# One connection per peer, opened once and kept for the life of the server.
+# Keepalive pings every 10 s hold it open while no heartbeats flow over it (a
+# follower only talks to its peers during an election), and expose a peer that
+# vanished without closing its socket. A peer that goes down is redialed after
+# 0.25 s, backing off to at most one heartbeat interval between attempts.
+PEER_CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 10000),
+    ("grpc.keepalive_timeout_ms", 5000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.initial_reconnect_backoff_ms", 250),
+    ("grpc.min_reconnect_backoff_ms", 250),
+    ("grpc.max_reconnect_backoff_ms", 2000),
+]
+
+# What the server needs to accept those pings instead of answering them with GOAWAY.
+PEER_SERVER_OPTIONS = [
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_ping_interval_without_data_ms", 5000),
+]
+
+# How log entries are batched on their way to one follower (see PeerSender)
+MAX_BATCH_ENTRIES = 200
+MAX_BATCH_BYTES = 1 << 20      # well under gRPC's 4 MB message limit
+MAX_IN_FLIGHT = 4              # ReplicateBatch calls outstanding to one follower at a time
+BATCH_LINGER_SECS = 0.001      # while a batch is in flight, wait this long for the next one to fill
+MAX_QUEUED_ENTRIES = 10000     # a follower further behind than this catches up from the log instead
+
+# How long closing a channel waits for gRPC's connectivity poller to stop watching it
+POLLER_EXIT_SECS = 1.0
+
+
+class PeerChannel:
+    """A channel and stub to one peer, plus the connectivity state gRPC last reported for it."""
+
+    def __init__(self, address, owner_id=None, replication_timeout=2.0, acked=None):
+        self.address = address
+        self.owner_id = owner_id
+        self.state = grpc.ChannelConnectivity.IDLE
+        # False after a ReplicateBatch to this peer failed, until one succeeds again
+        self.responsive = True
+        self.channel = grpc.insecure_channel(address, options=PEER_CHANNEL_OPTIONS)
+        self.channel.subscribe(self._on_state, try_to_connect=True)
+        self.stub = chat_service_pb2_grpc.ChatServiceStub(self.channel)
+        self.sender = PeerSender(self, replication_timeout, acked)
+
+    def _on_state(self, state):
+        previous, self.state = self.state, state
+        # only report the transitions that matter: lost and regained
+        if state != previous and state in (grpc.ChannelConnectivity.READY, grpc.ChannelConnectivity.TRANSIENT_FAILURE):
+            print(f"[Server {self.owner_id}] Connection to {self.address} is {state.name}")
+
+    def reachable(self):
+        return self.state not in (grpc.ChannelConnectivity.TRANSIENT_FAILURE, grpc.ChannelConnectivity.SHUTDOWN)
+
+    def close(self):
+        self.sender.close()
+        self.channel.unsubscribe(self._on_state)
+        # gRPC's connectivity poller only notices the unsubscribe when its current watch
+        # (at most 0.2 s) returns; closing the channel under that watch kills the thread
+        # with "Cannot monitor channel state: Channel closed!".
+        poller = getattr(self.channel, "_connectivity_state", None)
+        deadline = time.time() + POLLER_EXIT_SECS
+        while poller is not None and poller.polling and time.time() < deadline:
+            time.sleep(0.01)
+        self.channel.close()
+
+
+class PeerSender:
+    """
+    Sends log entries to one follower with ReplicateBatch, from its own thread. Entries
+    queued while earlier batches are in flight are coalesced into the next batch, and up
+    to MAX_IN_FLIGHT batches are outstanding at once. So a lone write goes out at once,
+    while under load the leader sends a few large RPCs instead of one per write, and
+    never waits for one batch's answer before sending the next.
+
+    Entries must be queued in index order. The follower reports the last entry it has
+    applied, and writers wait on that with wait_applied(). If given, the acked condition
+    is notified too, for writers waiting on several followers at once.
+    """
+
+    def __init__(self, peer, timeout, acked=None):
+        self.peer = peer
+        self.timeout = timeout
+        self.acked = acked
+        self.cond = threading.Condition()
+        self.queue = collections.deque()
+        self.in_flight = 0
+        self.match_index = 0   # newest entry the follower reported applied
+        self.failed_index = 0  # newest entry in a batch that failed
+        self.closed = False
+        self.thread = None
+
+    def enqueue(self, entry):
+        with self.cond:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            if len(self.queue) >= MAX_QUEUED_ENTRIES:
+                # the follower is not keeping up; it will fetch these from the log
+                self.failed_index = self.queue[-1].index
+                self.queue.clear()
+            self.queue.append(entry)
+            self.cond.notify_all()
+
+    def wait_applied(self, index, timeout):
+        """True once the follower has applied entry index; False if its batch failed or time ran out."""
+        deadline = time.time() + timeout
+        with self.cond:
+            while self.match_index < index and self.failed_index < index and not self.closed:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            return self.match_index >= index
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(self.timeout)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.closed and (not self.queue or self.in_flight >= MAX_IN_FLIGHT):
+                    self.cond.wait()
+                if self.closed:
+                    return
+                if self.in_flight and len(self.queue) < MAX_BATCH_ENTRIES:
+                    # the follower is busy with an earlier batch anyway; let this one fill up
+                    self.cond.wait(BATCH_LINGER_SECS)
+                batch = self._take_batch()
+                self.in_flight += 1
+            try:
+                call = self.peer.stub.ReplicateBatch.future(batch, timeout=self.timeout)
+            except ValueError:
+                return  # the channel was closed under us
+            call.add_done_callback(lambda call, batch=batch: self._sent(batch, call))
+
+    def _take_batch(self):
+        batch = chat_service_pb2.ReplicationBatch()
+        size = 0
+        while self.queue and len(batch.entries) < MAX_BATCH_ENTRIES:
+            entry_size = self.queue[0].ByteSize()
+            if batch.entries and size + entry_size > MAX_BATCH_BYTES:
+                break
+            batch.entries.append(self.queue.popleft())
+            size += entry_size
+        return batch
+
+    def _sent(self, batch, call):
+        error = call.exception()
+        if error is None and call.result().status != "ok":
+            error = call.result().msg  # answered, but has not applied the entries (yet)
+        with self.cond:
+            self.in_flight -= 1
+            if call.exception() is None:
+                self.match_index = max(self.match_index, call.result().applied_index)
+            if error is not None:
+                self.failed_index = max(self.failed_index, batch.entries[-1].index)
+            self.cond.notify_all()
+        if self.acked is not None:
+            with self.acked:
+                self.acked.notify_all()
+
+        peer = self.peer
+        if error is None:
+            if not peer.responsive:
+                print(f"[Server {peer.owner_id}] {peer.address} is answering replication again")
+            peer.responsive = True
+        else:
+            peer.responsive = False
+            first, last = batch.entries[0].index, batch.entries[-1].index
+            print(f"[Server {peer.owner_id}] Failed to replicate entries {first}-{last} to {peer.address}: {error}")
+
+
+class PeerPool:
+    """
+    The channels a server holds to the rest of the cluster, keyed by peer address.
+    Heartbeats, elections, replication and joining all take their stub from here, so
+    each peer costs one TCP + HTTP/2 handshake per server lifetime instead of one per RPC.
+    """
+
+    def __init__(self, owner_id=None, replication_timeout=2.0):
+        self.owner_id = owner_id
+        self.replication_timeout = replication_timeout
+        self.lock = threading.Lock()
+        self.channels = {}
+        # notified whenever any follower reports progress (see wait_for_acks)
+        self.acked = threading.Condition()
+
+    def get(self, address):
+        with self.lock:
+            peer = self.channels.get(address)
+            if peer is None:
+                peer = PeerChannel(address, self.owner_id, self.replication_timeout, self.acked)
+                self.channels[address] = peer
+            return peer
+
+    def stub(self, address):
+        return self.get(address).stub
+
+    def wait_for_acks(self, senders, index, needed, timeout):
+        """
+        True once at least needed of the senders' followers have applied entry index,
+        whichever ones they are; False if that has not happened within timeout.
+        """
+        deadline = time.time() + timeout
+        with self.acked:
+            while sum(sender.match_index >= index for sender in senders) < needed:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self.acked.wait(remaining)
+            return True
+
+    def discard(self, address):
+        """Closes the channel to an address no peer uses any more."""
+        with self.lock:
+            peer = self.channels.pop(address, None)
+        if peer is not None:
+            peer.close()
+
+    def close(self):
+        with self.lock:
+            peers, self.channels = list(self.channels.values()), {}
+        for peer in peers:
+            peer.close()
@@ -15,26 +15,57 @@ from protocol import chat_service_pb2_grpc
 
 # You have your own database.py with a Database class
 from database import Database
+from peers import PeerPool, PEER_SERVER_OPTIONS
+from oplog import OpLog
 
 HEARTBEAT_INTERVAL_SECS = 2.0
 LEADER_TIMEOUT_SECS     = 6.0  # If we don't hear from the leader for this many seconds, we attempt election
+REPLICATION_TIMEOUT_SECS = 2.0
+REORDER_WAIT_SECS = 0.5    # how long a follower holds an entry that overtook an earlier one in flight
+CATCH_UP_BATCH = 500       # log entries per FetchLog while catching up
+# When the leader acknowledges a write (see _write):
+#   all      - once every responsive follower has applied it, or REPLICATION_TIMEOUT_SECS passed
+#   majority - once a quorum of the cluster, the leader included, has applied it
+# In majority mode, a write that misses its quorum in time is answered with
+# status="unknown", msg="NO_QUORUM". It is not undone: it stays applied on the servers
+# that have it and still reaches the others, so it usually takes effect after all. A
+# client that retries must expect that (a retried Signup may find the name taken).
+COMMIT_MODES = ("all", "majority")
 
 class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
-    def __init__(self, db, server_id, host, port, peers):
+    def __init__(self, db, server_id, host, port, peers, commit_mode="all", quorum=0):
         """
         :param db: Database instance
         :param server_id: unique integer ID for this server
         :param peers: list of (peer_id, peer_address) for all servers in the cluster (including self)
+        :param commit_mode: one of COMMIT_MODES
+        :param quorum: servers that must apply a write in "majority" mode; 0 means a majority of the cluster
         """
+        if commit_mode not in COMMIT_MODES:
+            raise ValueError(f"Unknown commit mode {commit_mode!r}, expected one of {COMMIT_MODES}")
         self.db = db
         self.server_id = server_id
         self.my_addr = f"{host}:{port}"
+        self.commit_mode = commit_mode
+        self.quorum = quorum
 
         # Dictionary: peer_id -> peer_address
         self.peers = {server_id: self.my_addr}
         for pid, addr in peers:
             self.peers[pid] = addr
         print(self.peers)
+        if quorum and not 1 <= quorum <= len(self.peers):
+            raise ValueError(f"A quorum of {quorum} is impossible in a cluster of {len(self.peers)} servers")
+        if commit_mode == "majority" and self.quorum_size() <= len(self.peers) // 2:
+            print(f"[Server {server_id}] Warning: a quorum of {self.quorum_size()} out of {len(self.peers)} servers is not a majority; "
+                  f"acknowledged writes can be lost in a failover")
+        # one long-lived channel per peer, shared by every intra-cluster RPC
+        self.peer_pool = PeerPool(server_id, REPLICATION_TIMEOUT_SECS)
+        # every write, numbered; followers apply them in order and fetch what they missed
+        self.oplog = OpLog(db)
+        self.log_cond = threading.Condition()
+        self.catch_up_lock = threading.Lock()
+        self.needs_snapshot = False
 
 
         # For leader election
@@ -55,8 +86,9 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
     def join_cluster_if_needed(self):
         """
         A minimal function that attempts to find the cluster leader among self.peers
-        and then calls AddReplica on that leader, applying the returned snapshot.
-        It adds the data whether or not the server that we are joining has a db with data.
+        and then calls AddReplica on that leader. If the leader's log still holds every
+        entry after the last one we applied, we fetch just those; otherwise we apply the
+        full snapshot it returns in place of our data.
         """
 
         # 1) Find leader among known peers, by trying everyone we got as argument and breaking
@@ -68,9 +100,8 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
             if pid == self.server_id:
                 continue
             try:
-                channel = grpc.insecure_channel(addr)
-                stub = chat_service_pb2_grpc.ChatServiceStub(channel)
-                resp = stub.ClusterInfo(chat_service_pb2.EmptyRequest())
+                stub = self.peer_pool.stub(addr)
+                resp = stub.ClusterInfo(chat_service_pb2.EmptyRequest(), timeout=3.0)
 
                 # only when we query the leader and the leader says itself is the leader!
                 # most robust option
@@ -90,44 +121,65 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
 
         # 3) Call AddReplica on the leader
         print(f"[Server {self.server_id}] Attempting AddReplica on {leader_id} @ {leader_addr}")
-        channel = grpc.insecure_channel(leader_addr)
-        stub = chat_service_pb2_grpc.ChatServiceStub(channel)
-        req = chat_service_pb2.AddReplicaRequest(new_server_id=self.server_id, new_server_address=self.my_addr)
+        stub = self.peer_pool.stub(leader_addr)
+        req = chat_service_pb2.AddReplicaRequest(new_server_id=self.server_id, new_server_address=self.my_addr,
+                                                 applied_index=self.oplog.last_index)
         try:
             resp = stub.AddReplica(req, timeout=3.0)
             if resp.status == "ok":
-                print(f"[Server {self.server_id}] AddReplica succeeded. Now adding snapshot")
-                # 4) Apply the snapshot
-                self.apply_snapshot(resp.snapshot)
-                # 5) Update local peer list with the new replica
+                # 4) Update local peer list with the new replica
                 for server in resp.peers:
-                    self.peers[server.server_id] = server.address
+                    self._set_peer(server.server_id, server.address)
                 print(f"[Server {self.server_id}] Now sees peers: {self.peers}")
+                # 5) Catch up from the log, or apply the snapshot
+                self.current_leader_id = leader_id
+                if resp.from_log:
+                    print(f"[Server {self.server_id}] AddReplica succeeded. Catching up from entry {self.oplog.last_index}")
+                    self._catch_up()
+                else:
+                    print(f"[Server {self.server_id}] AddReplica succeeded. Now adding snapshot")
+                    self.apply_snapshot(resp.snapshot)
             else:
                 print(f"[Server {self.server_id}] AddReplica error: {resp.msg}")
         except Exception as e:
             print(f"[Server {self.server_id}] Error calling AddReplica on leader: {e}")
 
+    def _set_peer(self, peer_id, address):
+        """
+        Records a peer's address. A peer that rejoins from a new address leaves its old
+        channel behind, so that one is closed unless another peer still uses it.
+        """
+        old_addr = self.peers.get(peer_id)
+        self.peers[peer_id] = address
+        if old_addr and old_addr != address and old_addr not in self.peers.values():
+            self.peer_pool.discard(old_addr)
+
     # this is the one helper to join the cluster.
     def apply_snapshot(self, snapshot):
         """
-        Wipes local DB and replaces it with the data in 'snapshot'.
+        Wipes local DB and replaces it with the data in 'snapshot'. The log restarts
+        after the last entry the snapshot includes.
         """
-        self.db.execute("DROP TABLE IF EXISTS users", commit=True)
-        self.db.execute("DROP TABLE IF EXISTS messages", commit=True)
-        self.db.execute("DROP TABLE IF EXISTS sessions", commit=True)
-        self.db._init_db()
+        with self.log_cond:
+            with self.db.transaction():
+                self.db.execute("DROP TABLE IF EXISTS users")
+                self.db.execute("DROP TABLE IF EXISTS messages")
+                self.db.execute("DROP TABLE IF EXISTS sessions")
+                self.db._init_db()
 
-        for user in snapshot.users:
-            self.db.execute( "INSERT INTO users (id, username, password_hash) VALUES (?, ?, ?)", (user.id, user.username, user.password_hash), commit=True)
+                for user in snapshot.users:
+                    self.db.execute("INSERT INTO users (id, username, password_hash) VALUES (?, ?, ?)", (user.id, user.username, user.password_hash))
 
-        for msg in snapshot.messages:
-            self.db.execute("INSERT INTO messages (id, sender, recipient, content, to_deliver) VALUES (?, ?, ?, ?, ?)", (msg.id, msg.sender, msg.recipient, msg.content, 1 if msg.to_deliver else 0), commit=True )
+                for msg in snapshot.messages:
+                    self.db.execute("INSERT INTO messages (id, sender, recipient, content, to_deliver) VALUES (?, ?, ?, ?, ?)", (msg.id, msg.sender, msg.recipient, msg.content, 1 if msg.to_deliver else 0))
 
-        for sess in snapshot.sessions:
-            self.db.execute( "INSERT INTO sessions (auth_token, username) VALUES (?, ?)", (sess.auth_token, sess.username), commit=True)
+                for sess in snapshot.sessions:
+                    self.db.execute("INSERT INTO sessions (auth_token, username) VALUES (?, ?)", (sess.auth_token, sess.username))
 
-        print(f"[Server {self.server_id}] Snapshot applied successfully. Including the leader's peer list")
+                self.oplog.reset(snapshot.last_index)
+            self.log_cond.notify_all()
+
+        print(f"[Server {self.server_id}] Snapshot up to entry {snapshot.last_index} applied successfully. Including the leader's peer list")
 
     def _heartbeat_manager(self):
         """
@@ -144,11 +196,11 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
                     if pid == self.server_id:
                         continue  # skip ourselves
                     try:
-                        channel = grpc.insecure_channel(paddr)
-                        stub = chat_service_pb2_grpc.ChatServiceStub(channel)
+                        stub = self.peer_pool.stub(paddr)
                         req = chat_service_pb2.HeartbeatRequest(
                             leader_id=self.server_id,
-                            server_id=self.server_id
+                            server_id=self.server_id,
+                            last_index=self.oplog.last_index
                         )
                         print(f"[Server {self.server_id}] Sending heartbeat to {pid} with leader_id={self.server_id}")
 
@@ -175,8 +227,7 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
             if pid == self.server_id:
                 continue
             try:
-                channel = grpc.insecure_channel(paddr)
-                stub = chat_service_pb2_grpc.ChatServiceStub(channel)
+                stub = self.peer_pool.stub(paddr)
                 req = chat_service_pb2.HeartbeatRequest(leader_id=-1, server_id=self.server_id)
                 resp = stub.Heartbeat(req, timeout=1.0)
                 # If we got here, it's alive
@@ -226,6 +277,9 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
             if self.server_id != claimed_leader and self.is_leader:
                 self.is_leader = False
                 print(f"[Server {self.server_id}] im not the leader, new leader is {claimed_leader}")
+            # The leader has entries we never got (we were down, or a Replicate timed out)
+            if not self.is_leader and request.last_index > self.oplog.last_index:
+                self._start_catch_up()
         else:
             # It's just some follower or meaningless call.
             # That still updates last_leader_heartbeat if they gave a valid claimed_leader
@@ -243,115 +297,241 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
     # ----------------------------------------------------
     # Helper to replicate to all peers if I'm the leader
     # ----------------------------------------------------
-    def replicate_to_peers(self, op_type, **kwargs):
+    def replicate_to_peers(self, entry):
+        """Sends entry to every follower. Returns whether it reached the commit quorum, when one applies."""
+        return self._await_commit(entry, self._queue_for_followers(entry))
+
+    def _queue_for_followers(self, entry):
+        """
+        Queues one log entry on every follower's sender (see PeerSender), which batches
+        it with other writes on their way to that follower. Called in index order.
+        Returns the senders it was queued on.
+        """
         if not self.is_leader:
-            return  # only the leader replicates
-        for pid, paddr in self.peers.items():
+            return []  # only the leader replicates
+        senders = []
+        for pid, paddr in list(self.peers.items()):
             if pid == self.server_id:
                 continue  # skip self
-            try:
-                channel = grpc.insecure_channel(paddr)
-                stub = chat_service_pb2_grpc.ChatServiceStub(channel)
-                req = chat_service_pb2.ReplicationRequest(op_type=op_type)
-                if "sender" in kwargs:
-                    req.sender = kwargs["sender"]
-                if "recipient" in kwargs:
-                    req.recipient = kwargs["recipient"]
-                if "content" in kwargs:
-                    req.content = kwargs["content"]
-                if "message_ids" in kwargs:
-                    req.message_ids.extend(kwargs["message_ids"])
-                if "auth_token" in kwargs:
-                    req.auth_token = kwargs["auth_token"]
-                if "new_server_id" in kwargs:
-                    req.new_server_id = kwargs["new_server_id"] 
-                if "new_server_address" in kwargs:
-                    req.new_server_address = kwargs["new_server_address"]
-
-                stub.Replicate(req, timeout=2.0)
-            except Exception as e:
-                print(f"[Server {self.server_id}] Failed to replicate {op_type} to {paddr}: {e}")
+            peer = self.peer_pool.get(paddr)
+            peer.sender.enqueue(entry)
+            senders.append(peer.sender)
+        return senders
+
+    def _await_commit(self, entry, senders):
+        """Waits on the followers as the commit mode asks. False if the write did not reach its quorum."""
+        if self.commit_mode == "majority":
+            return self._await_quorum(entry, senders)
+        self._await_followers(entry, senders)
+        return True
+
+    def _await_followers(self, entry, senders):
+        """
+        Waits until each sender's follower has applied entry, or REPLICATION_TIMEOUT_SECS
+        have passed. The followers work in parallel, so a write costs the slowest one's
+        round trip rather than the sum of them all. Followers whose last batch failed or
+        whose connection is down are not waited on; they still get the entry, and are
+        waited on again once they answer. One that does not make it in time is marked so.
+        """
+        deadline = time.time() + REPLICATION_TIMEOUT_SECS
+        for sender in senders:
+            if not (sender.peer.responsive and sender.peer.reachable()):
+                continue
+            if not sender.wait_applied(entry.index, max(deadline - time.time(), 0)):
+                sender.peer.responsive = False
 
-    # ----------------------------------------------------
-    # Replicate RPC - if we are a follower, we just do the operation locally
-    # ----------------------------------------------------
-    def Replicate(self, request, context):
-        op_type = request.op_type
+    def quorum_size(self):
+        """Servers, the leader included, that must apply a write before "majority" mode acknowledges it."""
+        return self.quorum or len(self.peers) // 2 + 1
+
+    def _await_quorum(self, entry, senders):
+        """
+        Waits until enough followers have applied entry to make a quorum with the leader,
+        for at most REPLICATION_TIMEOUT_SECS. Any followers count, so a write costs the
+        round trip of the fastest ones it needs, and slower followers apply it on their
+        own time (a lagging one catches up from the log). Returns False on timeout.
+        """
+        needed = self.quorum_size() - 1
+        if self.peer_pool.wait_for_acks(senders, entry.index, needed, REPLICATION_TIMEOUT_SECS):
+            return True
+        print(f"[Server {self.server_id}] Entry {entry.index} did not reach a quorum of {self.quorum_size()} in time")
+        return False
+
+    def _write(self, op_type, **fields):
+        """
+        The leader's path for every write: applies it locally as the next entry of the
+        operation log, in one transaction, then replicates that entry. Returns the entry,
+        with the id of any row it created filled in, or None if the commit mode needed a
+        quorum that did not apply it in time. The write then stays on the servers that
+        did apply it, and the others still get it, so the client is told its outcome is
+        unknown (see COMMIT_MODES) rather than that it failed.
+        """
+        entry = chat_service_pb2.ReplicationRequest(op_type=op_type, **fields)
+        with self.log_cond:
+            with self.db.transaction():
+                self._apply(entry)
+                self.oplog.append(entry)
+            # still under the lock, so every follower's queue is in index order
+            senders = self._queue_for_followers(entry)
+        return entry if self._await_commit(entry, senders) else None
+
+    def _apply(self, entry):
+        """
+        Makes one log entry's change to the local database. The leader and every follower
+        apply entries through here, so all of them end up with the same rows and IDs.
+        """
+        op_type = entry.op_type
 
         if op_type == "INSERT_MESSAGE":
-            self.db.execute(
-                """INSERT INTO messages (sender, recipient, content, to_deliver)
-                   VALUES (?, ?, ?, ?)""",
-                (request.sender, request.recipient, request.content, 1),
-                commit=True
+            # row_id is 0 on the leader, and SQLite picks the id
+            entry.row_id = self.db.insert(
+                "INSERT INTO messages (id, sender, recipient, content, to_deliver) VALUES (?, ?, ?, ?, ?)",
+                (entry.row_id or None, entry.sender, entry.recipient, entry.content, 1 if entry.to_deliver else 0)
             )
-            return chat_service_pb2.GenericResponse(status="ok", msg="Replicated insert")
 
         elif op_type == "DELETE_MESSAGES":
-            placeholders = ",".join(["?" for _ in request.message_ids])
+            placeholders = ",".join(["?"] * len(entry.message_ids))
             self.db.execute(
-                f"DELETE FROM messages WHERE id IN ({placeholders})",
-                tuple(request.message_ids),
-                commit=True
+                f"DELETE FROM messages WHERE recipient=? AND id IN ({placeholders})",
+                (entry.recipient, *entry.message_ids)
             )
-            return chat_service_pb2.GenericResponse(status="ok", msg="Replicated delete")
 
         elif op_type == "SIGNUP_USER":
-            row = self.db.execute("SELECT id FROM users WHERE username=?", (request.sender,), commit=True)
-            if not row:
-                self.db.execute(
-                    "INSERT INTO users (username, password_hash) VALUES (?, ?)",
-                    (request.sender, request.content),
-                    commit=True
-                )
-            return chat_service_pb2.GenericResponse(status="ok", msg="Replicated signup")
+            entry.row_id = self.db.insert(
+                "INSERT INTO users (id, username, password_hash) VALUES (?, ?, ?)",
+                (entry.row_id or None, entry.sender, entry.content)
+            )
 
         elif op_type == "DELETE_ACCOUNT":
-            user_to_del = request.sender
-            self.db.execute("DELETE FROM messages WHERE sender=? OR recipient=?", (user_to_del, user_to_del), commit=True)
-            self.db.execute("DELETE FROM users WHERE username=?",(user_to_del,), commit=True)
-            self.db.execute("DELETE FROM sessions WHERE username=?", (user_to_del,), commit=True)
-
-            return chat_service_pb2.GenericResponse(status="ok", msg="Replicated account delete")
+            self.db.execute("DELETE FROM messages WHERE sender=? OR recipient=?", (entry.sender, entry.sender))
+            self.db.execute("DELETE FROM users WHERE username=?", (entry.sender,))
+            self.db.execute("DELETE FROM sessions WHERE username=?", (entry.sender,))
 
         elif op_type == "CREATE_SESSION":
-            self.db.execute(
-                "INSERT OR REPLACE INTO sessions (auth_token, username) VALUES (?, ?)",
-                (request.auth_token, request.sender),
-                commit=True
-            )
-            return chat_service_pb2.GenericResponse(status="ok", msg="Replicated session creation")
-            
+            # a new login logs the user out everywhere else
+            self.db.execute("DELETE FROM sessions WHERE username=?", (entry.sender,))
+            self.db.execute("INSERT INTO sessions (auth_token, username) VALUES (?, ?)", (entry.auth_token, entry.sender))
+
         elif op_type == "MARK_DELIVERED":
-            if request.message_ids:
-                placeholders = ",".join(["?"] * len(request.message_ids))
-                self.db.execute(
-                    f"UPDATE messages SET to_deliver=1 WHERE id IN ({placeholders})",
-                    tuple(request.message_ids),
-                    commit=True
-                )
-            return chat_service_pb2.GenericResponse(status="ok", msg="Marked messages delivered")
+            placeholders = ",".join(["?"] * len(entry.message_ids))
+            self.db.execute(f"UPDATE messages SET to_deliver=1 WHERE id IN ({placeholders})", tuple(entry.message_ids))
 
         elif op_type == "RESET_DB":
-            # Drop tables and recreate them
-            self.db.execute("DROP TABLE IF EXISTS users", commit=True)
-            self.db.execute("DROP TABLE IF EXISTS messages", commit=True)
-            self.db.execute("DROP TABLE IF EXISTS sessions", commit=True)  # If you want to remove sessions too
+            # Drop tables and recreate them; the log itself is kept
+            self.db.execute("DROP TABLE IF EXISTS users")
+            self.db.execute("DROP TABLE IF EXISTS messages")
+            self.db.execute("DROP TABLE IF EXISTS sessions")
             self.db._init_db()
-            return chat_service_pb2.GenericResponse(status="ok", msg="Replicated DB reset")
 
         elif op_type == "ADD_REPLICA":
-            new_id = request.new_server_id
-            new_addr = request.new_server_address
-            self.peers[new_id] = new_addr
-            print(f"[Server {self.server_id}] Received replication request to add server {new_id} at {new_addr} to peer list. Welcome")
-            return chat_service_pb2.AddReplicaResponse(status="ok", msg="Replicated add replica", )
-        
+            self._set_peer(entry.new_server_id, entry.new_server_address)
+            print(f"[Server {self.server_id}] Server {entry.new_server_id} at {entry.new_server_address} is in the peer list. Welcome")
+
         elif op_type == "DELETE_SESSION":
-            self.db.execute("DELETE FROM sessions WHERE auth_token=?", (request.auth_token,), commit=True)
-            return chat_service_pb2.GenericResponse(status="ok", msg="Replicated session deletion")
+            self.db.execute("DELETE FROM sessions WHERE auth_token=?", (entry.auth_token,))
 
-        return chat_service_pb2.GenericResponse(status="error", msg="Unknown replication op_type")
+        else:
+            raise ValueError(f"Unknown replication op_type {op_type!r}")
+
+    # ----------------------------------------------------
+    # Replicate RPC - if we are a follower, we apply the leader's log entry locally
+    # ----------------------------------------------------
+    def Replicate(self, request, context):
+        return self._replication_response([request])
+
+    def ReplicateBatch(self, request, context):
+        if not request.entries:
+            return chat_service_pb2.ReplicationResponse(status="ok", msg="Empty batch", applied_index=self.oplog.last_index)
+        return self._replication_response(request.entries)
+
+    def _replication_response(self, entries):
+        try:
+            applied = self._apply_replicated(entries, REORDER_WAIT_SECS)
+        except Exception as e:
+            return chat_service_pb2.ReplicationResponse(status="error", msg=f"Could not apply entries from {entries[0].index}: {e}",
+                                                        applied_index=self.oplog.last_index)
+        if not applied:
+            # missed something: fetch it from the leader instead of applying out of order
+            self._start_catch_up()
+            return chat_service_pb2.ReplicationResponse(status="error", msg="CATCHING_UP", applied_index=self.oplog.last_index)
+        return chat_service_pb2.ReplicationResponse(status="ok", msg=f"Replicated {len(entries)} entries", applied_index=self.oplog.last_index)
+
+    def _apply_replicated(self, entries, wait_secs):
+        """
+        Applies consecutive log entries from the leader, strictly in index order and in
+        one transaction. A batch that arrives ahead of an earlier one still in flight
+        waits up to wait_secs for it. Entries already applied are skipped. Returns False
+        if the batch could not be applied: entries before it are missing, or this
+        server's log disagrees with the leader's (then it is marked for a fresh snapshot).
+        """
+        deadline = time.time() + wait_secs
+        with self.log_cond:
+            while entries[0].index > self.oplog.last_index + 1:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self.log_cond.wait(remaining)
+            new_entries = []
+            for entry in entries:
+                if entry.index > self.oplog.last_index:
+                    new_entries.append(entry)
+                elif not self.oplog.matches(entry):
+                    # a former leader wrote something else at this index
+                    print(f"[Server {self.server_id}] Log diverged from the leader's at entry {entry.index}; resyncing from a snapshot")
+                    self.needs_snapshot = True
+                    return False
+            if new_entries:
+                with self.db.transaction():
+                    for entry in new_entries:
+                        self._apply(entry)
+                        self.oplog.append(entry)
+                self.log_cond.notify_all()
+            return True
+
+    def _start_catch_up(self):
+        threading.Thread(target=self._catch_up, daemon=True).start()
+
+    def _catch_up(self):
+        """
+        Pulls the log entries this server is missing from the leader and applies them. It
+        falls back to a full snapshot when the leader no longer holds those entries, or
+        this server's log has diverged from the leader's. Runs one at a time.
+        """
+        if not self.catch_up_lock.acquire(blocking=False):
+            return  # already catching up
+        try:
+            leader_addr = self.peers.get(self.current_leader_id)
+            if self.is_leader or not leader_addr:
+                return
+            stub = self.peer_pool.stub(leader_addr)
+            while not self.needs_snapshot:
+                start = self.oplog.last_index
+                resp = stub.FetchLog(chat_service_pb2.FetchLogRequest(after_index=start, max_entries=CATCH_UP_BATCH), timeout=5.0)
+                if resp.status != "ok":
+                    self.needs_snapshot = True
+                    break
+                if resp.entries and not self._apply_replicated(resp.entries, 0):
+                    break
+                print(f"[Server {self.server_id}] Caught up from entry {start} to {self.oplog.last_index} of {resp.last_index}")
+                if self.oplog.last_index == start or self.oplog.last_index >= resp.last_index:
+                    break
+            if self.needs_snapshot:
+                self.apply_snapshot(stub.GetFullSnapshot(chat_service_pb2.EmptyRequest(), timeout=10.0))
+                self.needs_snapshot = False
+        except grpc.RpcError as e:
+            print(f"[Server {self.server_id}] Catching up from the leader failed: {e}")
+        finally:
+            self.catch_up_lock.release()
+
+    def FetchLog(self, request, context):
+        entries = self.oplog.entries_after(request.after_index, request.max_entries or CATCH_UP_BATCH)
+        if entries is None:
+            return chat_service_pb2.FetchLogResponse(status="error", msg="SNAPSHOT_NEEDED", last_index=self.oplog.last_index)
+        return chat_service_pb2.FetchLogResponse(status="ok", msg=f"{len(entries)} entries", entries=entries,
+                                                 last_index=self.oplog.last_index)
+
+    def GetFullSnapshot(self, request, context):
+        return self._snapshot()
 
 
     # ----------------------------------------------------
@@ -370,8 +550,8 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
         if result:
             return chat_service_pb2.GenericResponse(status="error", msg="Username already taken")
 
-        self.db.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", (username, password), commit=True)
-        self.replicate_to_peers("SIGNUP_USER", sender=username, content=password)
+        if self._write("SIGNUP_USER", sender=username, content=password) is None:
+            return chat_service_pb2.GenericResponse(status="unknown", msg="NO_QUORUM")
 
         return chat_service_pb2.GenericResponse(status="ok", msg="Signup successful")
 
@@ -383,14 +563,6 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
         if not username or not password:
             return chat_service_pb2.LoginResponse(status="error", msg="Username/password required")
 
-        # If user is already logged in, forcibly log them out so they can re-login
-            # for tok, logged_in_username in list(self.logged_in_users.items()):
-            #     if logged_in_username == username:
-            #         del self.logged_in_users[tok]
-        # Invalidate any existing sessions for this user (log them out everywhere)
-        self.db.execute("DELETE FROM sessions WHERE username=?", (username,), commit=True)
-
-
         row = self.db.execute("SELECT password_hash FROM users WHERE username=?", (username,), commit=True)
         if not row:
             return chat_service_pb2.LoginResponse(status="error", msg="Username not found")
@@ -399,9 +571,9 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
             return chat_service_pb2.LoginResponse(status="error", msg="Incorrect password")
 
         auth_token = secrets.token_hex(16)
-        #self.logged_in_users[auth_token] = username
-        self.db.execute("INSERT INTO sessions (auth_token, username) VALUES (?, ?)", (auth_token, username), commit=True)
-        self.replicate_to_peers("CREATE_SESSION", auth_token=auth_token, sender=username)
+        # Invalidates any existing sessions for this user (logs them out everywhere)
+        if self._write("CREATE_SESSION", auth_token=auth_token, sender=username) is None:
+            return chat_service_pb2.LoginResponse(status="unknown", msg="NO_QUORUM")
 
         # unread count
         rows = self.db.execute(
@@ -429,11 +601,9 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
         if not row:
             return chat_service_pb2.GenericResponse(status="error", msg="Not logged in")
         
-        # Then delete the session
-        self.db.execute("DELETE FROM sessions WHERE auth_token=?", (request.auth_token,), commit=True)
-        
-        # Replicate to peers
-        self.replicate_to_peers("DELETE_SESSION", auth_token=request.auth_token)
+        # Then delete the session, on every replica
+        if self._write("DELETE_SESSION", auth_token=request.auth_token) is None:
+            return chat_service_pb2.GenericResponse(status="unknown", msg="NO_QUORUM")
 
         return chat_service_pb2.GenericResponse(status="ok", msg="You have been logged out.")
 
@@ -473,9 +643,8 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
             delivered_value = 0
 
 
-        self.db.execute( "INSERT INTO messages (sender, recipient, content, to_deliver) VALUES (?, ?, ?, ?)", (sender, recipient, content, delivered_value), commit=True)
-
-        self.replicate_to_peers("INSERT_MESSAGE", sender=sender, recipient=recipient, content=content)
+        if self._write("INSERT_MESSAGE", sender=sender, recipient=recipient, content=content, to_deliver=bool(delivered_value)) is None:
+            return chat_service_pb2.GenericResponse(status="unknown", msg="NO_QUORUM")
 
         return chat_service_pb2.GenericResponse(status="ok", msg="Message sent")
 
@@ -553,14 +722,8 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
         # Mark them delivered
         if rows:
             msg_ids = [r[0] for r in rows]
-            placeholders = ",".join(["?" for _ in msg_ids])
-            self.db.execute(
-                f"UPDATE messages SET to_deliver=1 WHERE id IN ({placeholders})",
-                tuple(msg_ids),
-                commit=True
-            )
-
-            self.replicate_to_peers("MARK_DELIVERED", message_ids=msg_ids)
+            if self._write("MARK_DELIVERED", message_ids=msg_ids) is None:
+                return chat_service_pb2.ListMessagesResponse(status="unknown", msg="NO_QUORUM", messages=[])
 
         messages = [
             chat_service_pb2.ChatMessage(id=r[0], sender=r[1], content=r[2]) for r in rows
@@ -623,10 +786,8 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
         username = row[0][0]
         msg_ids = list(request.message_ids_to_delete)
 
-        placeholders = ",".join(["?"] * len(msg_ids))
-        params = [username] + msg_ids
-        self.db.execute(f"DELETE FROM messages WHERE recipient=? AND id IN ({placeholders})", params, commit=True)
-        self.replicate_to_peers("DELETE_MESSAGES", message_ids=msg_ids)
+        if self._write("DELETE_MESSAGES", recipient=username, message_ids=msg_ids) is None:
+            return chat_service_pb2.DeleteMessagesResponse(status="unknown", msg="NO_QUORUM", deleted_count=0)
 
         return chat_service_pb2.DeleteMessagesResponse(status="ok", msg="Messages deleted successfully", deleted_count=len(msg_ids))
 
@@ -641,13 +802,8 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
 
         username = row[0][0]
 
-        self.db.execute("DELETE FROM messages WHERE sender=? OR recipient=?", (username, username), commit=True)
-        self.db.execute("DELETE FROM users WHERE username=?", (username,), commit=True)
-        self.db.execute("DELETE FROM sessions WHERE username=?", (username,), commit=True)
-
-
-        self.replicate_to_peers("DELETE_ACCOUNT", sender=username)
-        # replicate other changes.
+        if self._write("DELETE_ACCOUNT", sender=username) is None:
+            return chat_service_pb2.GenericResponse(status="unknown", msg="NO_QUORUM")
         return chat_service_pb2.GenericResponse(status="ok", msg="Account deleted successfully")
 
     def ResetDB(self, request, context):
@@ -660,14 +816,9 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
         if not row:
             return chat_service_pb2.GenericResponse(status="error", msg="Not logged in")
 
-        # 3) Drop tables & re-init
-        self.db.execute("DROP TABLE IF EXISTS users", commit=True)
-        self.db.execute("DROP TABLE IF EXISTS messages", commit=True)
-        self.db.execute("DROP TABLE IF EXISTS sessions", commit=True)
-        self.db._init_db()
-
-        # (Optional) replicate if you want all nodes to do it
-        self.replicate_to_peers("RESET_DB")
+        # 3) Drop tables & re-init, on every replica
+        if self._write("RESET_DB") is None:
+            return chat_service_pb2.GenericResponse(status="unknown", msg="NO_QUORUM")
 
         return chat_service_pb2.GenericResponse(status="ok", msg="Database reset successfully")
     
@@ -702,20 +853,28 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
         new_id = request.new_server_id
         new_addr = request.new_server_address
 
-        # Update local membership
-        self.peers[new_id] = new_addr
+        # Update local membership, here and on every follower
         print(f"[Leader, {self.server_id}] Adding new server with ID {new_id} at address {new_addr} to peer list, asking others to follow")
-        # Replicate to followers
-        # We'll define an op_type="ADD_REPLICA"
-        self.replicate_to_peers("ADD_REPLICA", new_server_id=new_id, new_server_address=new_addr)
+        # Not refused without a quorum: the response brings the new server up to date itself
+        self._write("ADD_REPLICA", new_server_id=new_id, new_server_address=new_addr)
         # maybe should check if it is still online here.
 
-        # GET FULL SNAPSHOT inline
-        # 2) Query DB for all data
-        user_rows = self.db.execute("SELECT id, username, password_hash FROM users")
-        msg_rows = self.db.execute("SELECT id, sender, recipient, content, to_deliver FROM messages")
-        session_rows = self.db.execute("SELECT auth_token, username FROM sessions")
-        snap = chat_service_pb2.FullSnapshot()
+        peer_list = []
+        for sid, addr in self.peers.items():
+            peer_list.append(chat_service_pb2.ServerInfo(server_id=sid, address=addr))
+
+        # A server rejoining with data only needs the entries it missed, if we still hold them
+        if request.applied_index > 0 and self.oplog.covers(request.applied_index):
+            return chat_service_pb2.AddReplicaResponse(status="ok", msg="Replica added, catch up from the log", peers=peer_list, from_log=True)
+        return chat_service_pb2.AddReplicaResponse(status="ok", msg="Replica added, here is your snapshot", snapshot=self._snapshot(), peers=peer_list)
+
+    def _snapshot(self):
+        """All users, messages and sessions, and the log entry they are current as of."""
+        with self.log_cond:
+            user_rows = self.db.execute("SELECT id, username, password_hash FROM users")
+            msg_rows = self.db.execute("SELECT id, sender, recipient, content, to_deliver FROM messages")
+            session_rows = self.db.execute("SELECT auth_token, username FROM sessions")
+            snap = chat_service_pb2.FullSnapshot(last_index=self.oplog.last_index)
 
         for (uid, uname, pwhash) in user_rows:
             u = snap.users.add()
@@ -733,14 +892,7 @@ class ChatServiceServicer(chat_service_pb2_grpc.ChatServiceServicer):
             s = snap.sessions.add()
             s.auth_token = atk
             s.username   = usr
-
-        peer_list = []
-        for sid, addr in self.peers.items():
-            peer_list.append(chat_service_pb2.ServerInfo(server_id=sid, address=addr))
-
-            
-        return chat_service_pb2.AddReplicaResponse(status="ok", msg="Replica added, here is your snapshot",snapshot=snap, peers=peer_list)
-
+        return snap
 
 
 def serve():
@@ -750,6 +902,10 @@ def serve():
     parser.add_argument("--db_file", type=str, default="chat.db", help="SQLite DB file name")
     parser.add_argument("--peers", type=str, default="", help="Comma-separated list of peer definitions, e.g. '1:127.0.0.1:50051,2:127.0.0.1:50052'")
     parser.add_argument("--host", type=str, default="127.0.0.1", help="Host IP to use (default: 127.0.0.1)")
+    parser.add_argument("--commit_mode", choices=COMMIT_MODES, default="all",
+                        help="Acknowledge a write once every responsive follower has it ('all'), or once a quorum has it ('majority')")
+    parser.add_argument("--quorum", type=int, default=0,
+                        help="Servers, the leader included, that must apply a write in majority mode (default: a majority of the cluster)")
     args = parser.parse_args()
     
 
@@ -765,10 +921,14 @@ def serve():
             sid = int(sid_str)
             peers.append((sid, address))
 
+    cluster_size = len({args.server_id} | {sid for sid, _ in peers})
+    if args.quorum and not 1 <= args.quorum <= cluster_size:
+        parser.error(f"--quorum must be between 1 and the cluster size ({cluster_size}), got {args.quorum}")
+
     db = Database(args.db_file)
 
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    servicer = ChatServiceServicer(db, args.server_id, args.host, args.port, peers)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), options=PEER_SERVER_OPTIONS)
+    servicer = ChatServiceServicer(db, args.server_id, args.host, args.port, peers, args.commit_mode, args.quorum)
     chat_service_pb2_grpc.add_ChatServiceServicer_to_server(servicer, server)
 
     listen_addr = f"[::]:{args.port}"
@@ -0,0 +1,66 @@
+import unittest
+import time
+import grpc
+from concurrent import futures
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from peers import PeerPool
+from test_base import fail_on_thread_errors
+from protocol import chat_service_pb2
+
+def wait_for_state(peer, state, timeout_secs=5):
+    deadline = time.time() + timeout_secs
+    while peer.state != state and time.time() < deadline:
+        time.sleep(0.05)
+    return peer.state
+
+class TestPeerPool(unittest.TestCase):
+    """The channels a server holds to its peers are opened once and reused."""
+
+    def setUp(self):
+        # an empty server is enough to connect to
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+        self.port = self.server.add_insecure_port("127.0.0.1:0")
+        self.server.start()
+        self.address = f"127.0.0.1:{self.port}"
+        self.pool = PeerPool(owner_id=1)
+        fail_on_thread_errors(self)
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.stop(None)
+
+    def test_one_channel_per_peer(self):
+        self.assertIs(self.pool.get(self.address), self.pool.get(self.address))
+        self.assertIs(self.pool.stub(self.address), self.pool.stub(self.address))
+        self.assertIsNot(self.pool.get(self.address), self.pool.get("127.0.0.1:1"))
+
+    def test_state_follows_the_peer(self):
+        """
+        1. The channel connects to a live peer on its own
+        2. Once the peer is gone, the next call (a heartbeat, say) finds it unreachable
+        """
+        peer = self.pool.get(self.address)
+        self.assertEqual(wait_for_state(peer, grpc.ChannelConnectivity.READY), grpc.ChannelConnectivity.READY)
+        self.assertTrue(peer.reachable())
+
+        self.server.stop(None)
+        with self.assertRaises(grpc.RpcError):
+            peer.stub.Heartbeat(chat_service_pb2.HeartbeatRequest(leader_id=-1, server_id=1), timeout=1.0)
+        wait_for_state(peer, grpc.ChannelConnectivity.TRANSIENT_FAILURE)
+        self.assertFalse(peer.reachable(), "❌ A stopped peer should be reported unreachable")
+
+    def test_discarded_address_gets_a_new_channel(self):
+        first = self.pool.get(self.address)
+        self.pool.discard(self.address)
+        with self.assertRaises(ValueError):
+            # the old channel is closed
+            first.stub.Heartbeat(chat_service_pb2.HeartbeatRequest(leader_id=-1, server_id=1), timeout=1.0)
+        self.assertIsNot(self.pool.get(self.address), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
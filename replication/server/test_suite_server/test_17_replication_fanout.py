@@ -0,0 +1,145 @@
+import unittest
+import tempfile
+import threading
+import time
+import grpc
+from concurrent import futures
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+import server
+from database import Database
+from test_base import fail_on_thread_errors
+from protocol import chat_service_pb2
+from protocol import chat_service_pb2_grpc
+
+class SlowFollower(chat_service_pb2_grpc.ChatServiceServicer):
+    """Answers ReplicateBatch after a fixed delay and remembers what it was sent."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.received = []
+        self.batches = []
+
+    def ReplicateBatch(self, request, context):
+        time.sleep(self.delay)
+        self.received.extend(entry.content for entry in request.entries)
+        self.batches.append([entry.index for entry in request.entries])
+        return chat_service_pb2.ReplicationResponse(status="ok", msg="Replicated", applied_index=request.entries[-1].index)
+
+class TestReplicationFanout(unittest.TestCase):
+    """The leader replicates to all followers at once, in an in-process cluster of fakes."""
+
+    def setUp(self):
+        self.saved_timeout = server.REPLICATION_TIMEOUT_SECS
+        server.REPLICATION_TIMEOUT_SECS = 0.5
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.followers, self.servers = [], []
+        fail_on_thread_errors(self)
+
+    def tearDown(self):
+        server.REPLICATION_TIMEOUT_SECS = self.saved_timeout
+        # the heartbeat thread outlives the test; leave it no one to send to
+        self.leader.peers = {1: self.leader.my_addr}
+        self.leader.peer_pool.close()
+        for follower_server in self.servers:
+            follower_server.stop(None)
+        self.tmpdir.cleanup()
+
+    def start_cluster(self, delays, commit_mode="all", quorum=0):
+        peers = []
+        for i, delay in enumerate(delays):
+            follower = SlowFollower(delay)
+            follower_server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+            chat_service_pb2_grpc.add_ChatServiceServicer_to_server(follower, follower_server)
+            port = follower_server.add_insecure_port("127.0.0.1:0")
+            follower_server.start()
+            self.followers.append(follower)
+            self.servers.append(follower_server)
+            peers.append((i + 2, f"127.0.0.1:{port}"))
+        db = Database(os.path.join(self.tmpdir.name, "leader.db"))
+        self.leader = server.ChatServiceServicer(db, 1, "127.0.0.1", 0, peers, commit_mode, quorum)
+        self.leader.is_leader = True
+        self.index = 0
+
+    def timed_replicate(self, content):
+        self.index += 1
+        entry = chat_service_pb2.ReplicationRequest(op_type="INSERT_MESSAGE", index=self.index, sender="Alice", recipient="Bob", content=content)
+        started = time.perf_counter()
+        self.leader.replicate_to_peers(entry)
+        return time.perf_counter() - started
+
+    def test_waits_for_slowest_not_sum(self):
+        self.start_cluster([0.2, 0.2, 0.2])
+        elapsed = self.timed_replicate("hello")
+        self.assertLess(elapsed, 0.45, "❌ Three 0.2 s followers should cost about 0.2 s, not 0.6 s")
+        self.assertEqual([f.received for f in self.followers], [["hello"]] * 3)
+
+    def test_hung_follower_does_not_stall_every_write(self):
+        """
+        1. The first write waits for the hung follower until the replication timeout
+        2. Later writes only wait for the healthy follower, and still reach the hung one
+        """
+        self.start_cluster([0.0, 2.0])
+        self.assertGreaterEqual(self.timed_replicate("first"), 0.45)
+        for i in range(3):
+            self.assertLess(self.timed_replicate(f"next{i}"), 0.3, "❌ A hung follower should not cost every write its timeout")
+        self.assertEqual(self.followers[0].received, ["first", "next0", "next1", "next2"])
+
+    def test_concurrent_writes_share_batches(self):
+        """
+        1. 40 writers hit a leader whose follower takes 0.1 s per batch
+        2. Every entry reaches the follower exactly once, in far fewer than 40 RPCs
+        """
+        self.start_cluster([0.1])
+        writers = [threading.Thread(target=self.leader._write, args=("INSERT_MESSAGE",),
+                                    kwargs=dict(sender="Alice", recipient="Bob", content=f"m{i}")) for i in range(40)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        batches = self.followers[0].batches
+        self.assertEqual(sorted(i for batch in batches for i in batch), list(range(1, 41)))
+        self.assertLess(len(batches), 20, "❌ Writes queued behind a batch in flight should go out together")
+        self.assertTrue(all(batch == sorted(batch) for batch in batches))
+
+    def test_majority_waits_for_median_follower(self):
+        """
+        1. In a 5-server cluster, two followers answer at once and two take 0.4 s
+        2. A majority write returns once the fast two have it; the slow two still get it
+        """
+        self.start_cluster([0.0, 0.4, 0.0, 0.4], commit_mode="majority")
+        self.assertEqual(self.leader.quorum_size(), 3)
+        self.assertLess(self.timed_replicate("hello"), 0.3, "❌ A majority write should not wait for the slowest followers")
+        time.sleep(0.6)
+        self.assertEqual([f.received for f in self.followers], [["hello"]] * 4)
+
+    def test_write_without_quorum_is_refused(self):
+        """
+        1. Both followers of a 3-server cluster are hung
+        2. The write is applied on the leader, and the client is told its outcome is unknown
+        """
+        self.start_cluster([2.0, 2.0], commit_mode="majority")
+        resp = self.leader.Signup(chat_service_pb2.SignupRequest(username="Alice", password="pw"), None)
+        self.assertEqual((resp.status, resp.msg), ("unknown", "NO_QUORUM"))
+        self.assertEqual(self.leader.db.execute("SELECT username FROM users"), [("Alice",)])
+
+    def test_quorum_flag_overrides_majority(self):
+        self.start_cluster([0.0, 0.4], commit_mode="majority", quorum=3)
+        self.assertGreaterEqual(self.timed_replicate("everyone"), 0.35, "❌ A quorum of 3 out of 3 needs the slow follower too")
+
+    def test_impossible_quorum_is_rejected(self):
+        db = Database(os.path.join(self.tmpdir.name, "leader.db"))
+        peers = [(2, "127.0.0.1:1"), (3, "127.0.0.1:2")]
+        for quorum in (4, -1):
+            with self.assertRaises(ValueError):
+                server.ChatServiceServicer(db, 1, "127.0.0.1", 0, peers, "majority", quorum)
+        # leave tearDown a leader to clean up
+        self.leader = server.ChatServiceServicer(db, 1, "127.0.0.1", 0, peers, "majority", 3)
+        self.assertEqual(self.leader.quorum_size(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import tempfile
+import threading
+import time
+import sys, os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+import oplog
+import server
+from database import Database
+from test_base import fail_on_thread_errors
+from oplog import OpLog
+from protocol import chat_service_pb2
+
+def entry(op_type, **fields):
+    return chat_service_pb2.ReplicationRequest(op_type=op_type, **fields)
+
+class TestOpLog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "chat.db")
+        self.db = Database(self.path)
+        self.log = OpLog(self.db)
+
+    def tearDown(self):
+        self.db.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_numbered_and_durable(self):
+        for name in ("Alice", "Bob", "Carol"):
+            with self.db.transaction():
+                self.log.append(entry("SIGNUP_USER", sender=name, content="pw"))
+        self.assertEqual(self.log.last_index, 3)
+        self.assertEqual([e.sender for e in self.log.entries_after(1, 10)], ["Bob", "Carol"])
+        self.assertEqual(OpLog(Database(self.path)).last_index, 3, "❌ The log should survive a restart")
+
+    def test_trimmed_entries_need_a_snapshot(self):
+        saved = oplog.OPLOG_RETAIN_ENTRIES, oplog.OPLOG_TRIM_EVERY
+        oplog.OPLOG_RETAIN_ENTRIES, oplog.OPLOG_TRIM_EVERY = 5, 10
+        try:
+            for i in range(20):
+                with self.db.transaction():
+                    self.log.append(entry("DELETE_SESSION", auth_token=str(i)))
+        finally:
+            oplog.OPLOG_RETAIN_ENTRIES, oplog.OPLOG_TRIM_EVERY = saved
+        self.assertEqual(self.log.base_index, 15)
+        self.assertIsNone(self.log.entries_after(3, 10))
+        self.assertEqual(len(self.log.entries_after(15, 10)), 5)
+
+    def test_reset_after_snapshot(self):
+        with self.db.transaction():
+            self.log.append(entry("RESET_DB"))
+            self.log.reset(40)
+        self.assertEqual((self.log.base_index, self.log.last_index), (40, 40))
+        self.assertFalse(self.log.covers(1))
+        self.assertEqual(self.log.entries_after(40, 10), [])
+
+class TestFollowerApply(unittest.TestCase):
+    """A follower applies the leader's entries in order, with the leader's row IDs."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.follower = server.ChatServiceServicer(Database(os.path.join(self.tmpdir.name, "chat.db")), 2, "127.0.0.1", 0, [])
+        fail_on_thread_errors(self)
+
+    def tearDown(self):
+        self.follower.peer_pool.close()
+        self.tmpdir.cleanup()
+
+    def test_out_of_order_entries_wait_for_each_other(self):
+        """
+        1. Entry 2 arrives before entry 1 and waits for it
+        2. Both end up applied, with the leader's message ids
+        """
+        results = {}
+        second = threading.Thread(target=lambda: results.update(second=self.follower.Replicate(
+            entry("INSERT_MESSAGE", index=2, row_id=8, sender="Alice", recipient="Bob", content="second"), None)))
+        second.start()
+        time.sleep(0.1)  # entry 2 is now waiting
+        results["first"] = self.follower.Replicate(entry("SIGNUP_USER", index=1, row_id=5, sender="Bob", content="pw"), None)
+        second.join()
+
+        self.assertEqual(results["first"].status, "ok")
+        self.assertEqual((results["second"].status, results["second"].applied_index), ("ok", 2))
+        self.assertEqual(self.follower.db.execute("SELECT id, username FROM users"), [(5, "Bob")])
+        self.assertEqual(self.follower.db.execute("SELECT id, content FROM messages"), [(8, "second")])
+
+    def test_gap_is_not_applied(self):
+        saved = server.REORDER_WAIT_SECS
+        server.REORDER_WAIT_SECS = 0.1
+        try:
+            resp = self.follower.Replicate(entry("SIGNUP_USER", index=3, row_id=1, sender="Bob", content="pw"), None)
+        finally:
+            server.REORDER_WAIT_SECS = saved
+        self.assertEqual((resp.status, resp.msg, resp.applied_index), ("error", "CATCHING_UP", 0))
+        self.assertEqual(self.follower.db.execute("SELECT * FROM users"), [])
+
+    def test_duplicate_is_ignored_and_conflict_detected(self):
+        first = entry("SIGNUP_USER", index=1, row_id=1, sender="Bob", content="pw")
+        self.follower.Replicate(first, None)
+        self.assertEqual(self.follower.Replicate(first, None).status, "ok")
+        self.assertEqual(len(self.follower.db.execute("SELECT * FROM users")), 1)
+
+        self.follower.Replicate(entry("SIGNUP_USER", index=1, row_id=1, sender="Mallory", content="pw"), None)
+        self.assertTrue(self.follower.needs_snapshot, "❌ A different entry at an applied index means the logs diverged")
+
+
+if __name__ == "__main__":
+    unittest.main()
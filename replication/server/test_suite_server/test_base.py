@@ -1,3 +1,5 @@
+import threading
+import time
 import unittest
 import grpc
 import sys, os
@@ -10,6 +12,21 @@ from protocol import chat_service_pb2_grpc
 
 SERVER_ADDRESS = "localhost:50051"
 
+def fail_on_thread_errors(test, settle_secs=0.3):
+    """
+    Fails test if a background thread dies with an exception while it runs, or within
+    settle_secs after its tearDown (say, a gRPC poller still watching a closed channel).
+    """
+    errors = []
+    saved = threading.excepthook
+    threading.excepthook = errors.append
+    def check():
+        time.sleep(settle_secs)
+        threading.excepthook = saved
+        died = [f"{args.thread.name if args.thread else '?'}: {args.exc_type.__name__}: {args.exc_value}" for args in errors]
+        test.assertEqual(died, [], "❌ A background thread raised")
+    test.addCleanup(check)
+
 class BaseTest(unittest.TestCase):
     """Base test class that resets the database before each test and manages gRPC connections."""
 
@@ -15,6 +15,9 @@ from test_12_persistence import TestPersistence
 from test_13_replication import TestReplication
 from test_14_failover import TestFailover
 from test_15_rejoin import TestRejoin
+from test_16_peer_pool import TestPeerPool
+from test_17_replication_fanout import TestReplicationFanout
+from test_18_oplog import TestOpLog, TestFollowerApply
 
 
 if __name__ == "__main__":
@@ -35,5 +38,9 @@ if __name__ == "__main__":
             unittest.defaultTestLoader.loadTestsFromTestCase(TestReplication),
             unittest.defaultTestLoader.loadTestsFromTestCase(TestFailover),
             unittest.defaultTestLoader.loadTestsFromTestCase(TestRejoin),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestPeerPool),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestReplicationFanout),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestOpLog),
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestFollowerApply),
         ])
     )